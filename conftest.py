@@ -0,0 +1,11 @@
+import pytest
+
+import modules.contracts as co
+
+
+@pytest.fixture(autouse=True, scope='session')
+def full_contracts():
+    """Check every contract in tests and doctests, whatever the environment."""
+
+    with co.policy('full'):
+        yield
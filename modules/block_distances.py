@@ -0,0 +1,143 @@
+"""Module for block-sparse distance matrices of labelled points."""
+
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+from numpy import ndarray
+from scipy.spatial.distance import cdist
+
+
+def label_layers(labels: ndarray) -> Dict[int, slice]:
+    """
+    Return the contiguous block of nodes for each label.
+
+    Parameters
+    ----------
+    labels : (N,) ndarray
+        Array of labels for N positions.
+        The labels are sorted in ascending order.
+
+    Returns
+    -------
+    dict
+        layers[A] is the slice of nodes with label A.
+
+    Examples
+    --------
+    >>> label_layers(np.array([0, 1, 1, 2, 2, 2]))
+    {0: slice(0, 1, None), 1: slice(1, 3, None), 2: slice(3, 6, None)}
+
+    """
+    labels_unique, index_start = np.unique(labels, return_index=True)
+    index_stop = np.append(index_start[1:], len(labels))
+
+    return {int(label): slice(i, j) for label, i, j in zip(labels_unique, index_start, index_stop)}
+
+
+class BlockDistances:
+    """
+    Distances between labelled points, computed only for pairs of connected labels.
+
+    The points are sorted by label, so the distances between points with
+    labels A and B form a dense block of the full distance matrix.
+    Only the blocks of the given label pairs are computed.
+
+    The object can be indexed like the full distance matrix in two ways:
+    with two slices that select a block, or with arrays of node indices.
+    Distances outside of the computed blocks are NaN.
+
+    Parameters
+    ----------
+    population : (N, D) ndarray
+        Points sorted by label.
+    labels : (N,) ndarray
+        Array of labels for N positions.
+        The labels are sorted in ascending order.
+    label_pairs : iterable
+        Pairs of labels (A, B) that need distances.
+
+    Examples
+    --------
+    >>> population = np.array([[0, 0], [0, 10], [0, 12], [0, 20]])
+    >>> labels = np.array([0, 1, 1, 2])
+
+    >>> dist_blocks = BlockDistances(population, labels, [(0, 1), (1, 2)])
+
+    >>> dist_blocks[1:3, 3:4]
+    array([[10.],
+           [ 8.]])
+
+    >>> dist_blocks[np.array([0, 2]), np.array([1, 3])]
+    array([10.,  8.])
+
+    >>> dist_blocks[0, 3]
+    nan
+
+    >>> np.asarray(dist_blocks)
+    array([[nan, 10., 12., nan],
+           [nan, nan, nan, 10.],
+           [nan, nan, nan,  8.],
+           [nan, nan, nan, nan]])
+
+    """
+
+    __slots__ = ('labels', 'layers', 'blocks', 'shape')
+
+    def __init__(self, population: ndarray, labels: ndarray, label_pairs: Iterable[Tuple[int, int]]):
+
+        self.labels = labels
+        self.layers = label_layers(labels)
+        self.shape = (len(labels), len(labels))
+
+        self.blocks: Dict[Tuple[int, int], ndarray] = {}
+
+        for label_a, label_b in label_pairs:
+
+            if label_a in self.layers and label_b in self.layers:
+
+                points_a = population[self.layers[label_a]]
+                points_b = population[self.layers[label_b]]
+
+                self.blocks[int(label_a), int(label_b)] = cdist(points_a, points_b)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the total size of the blocks in bytes."""
+        return sum(block.nbytes for block in self.blocks.values())
+
+    def __getitem__(self, index: Tuple[Any, Any]) -> Any:
+        """Return a block of distances, or the distances between pairs of nodes."""
+        index_u, index_v = index
+
+        if isinstance(index_u, slice) and isinstance(index_v, slice):
+            # Find the block that matches the slices.
+            for (label_a, label_b), block in self.blocks.items():
+                if self.layers[label_a] == index_u and self.layers[label_b] == index_v:
+                    return block
+
+            return np.full((index_u.stop - index_u.start, index_v.stop - index_v.start), np.nan)
+
+        nodes_u, nodes_v = np.broadcast_arrays(index_u, index_v)
+        labels_u, labels_v = self.labels[nodes_u], self.labels[nodes_v]
+
+        distances = np.full(nodes_u.shape, np.nan)
+
+        for (label_a, label_b), block in self.blocks.items():
+
+            is_pair = (labels_u == label_a) & (labels_v == label_b)
+
+            rows = nodes_u[is_pair] - self.layers[label_a].start
+            cols = nodes_v[is_pair] - self.layers[label_b].start
+
+            distances[is_pair] = block[rows, cols]
+
+        return distances if distances.ndim else distances.item()
+
+    def __array__(self, dtype: Any = None) -> ndarray:
+        """Return the full distance matrix, with NaN outside of the blocks."""
+        dist_matrix = np.full(self.shape, np.nan)
+
+        for (label_a, label_b), block in self.blocks.items():
+            dist_matrix[self.layers[label_a], self.layers[label_b]] = block
+
+        return dist_matrix if dtype is None else dist_matrix.astype(dtype)
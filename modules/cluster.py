@@ -1,17 +1,28 @@
 """Module for clustering points in space."""
 
-from queue import Queue
-from typing import Any
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Tuple
 
 import numpy as np
 from numpy import ndarray
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 from scipy.spatial.distance import cdist
 
+import modules.numpy_funcs as nf
+import modules.point_processing as pp
 from modules.typing import array_like
 
 
 def dbscan_st(
-    points: array_like, times: array_like = None, eps_spatial: float = 0.5, eps_temporal: float = 0.5, min_pts: int = 5
+    points: array_like,
+    times: array_like = None,
+    eps_spatial: float = 0.5,
+    eps_temporal: float = 0.5,
+    min_pts: int = 5,
+    *,
+    backend: str = 'matrix',
 ) -> ndarray:
     """
     Cluster points with spatiotemporal DBSCAN algorithm.
@@ -31,12 +42,23 @@ def dbscan_st(
     min_pts : int, optional
         Number of points in a neighbourhood for a point to be considered
         a core point.
+    backend : {'matrix', 'sweep'}, optional
+        Method for finding the neighbourhoods (default 'matrix').
+        'matrix' uses full matrices of spatial and temporal distances.
+        'sweep' searches a window of the points sorted by time (see `SweepIndex`),
+        so the memory is linear in the number of points.
+        Both give the same labels.
 
     Returns
     -------
     labels : (N,) ndarray
         Array of cluster labels.
 
+    Raises
+    ------
+    ValueError
+        If the backend name is not recognized.
+
     Examples
     --------
     >>> points = [[0, 0], [1, 0], [2, 0], [0, 5], [1, 5], [2, 5]]
@@ -44,220 +66,865 @@ def dbscan_st(
     >>> dbscan_st(points, eps_spatial=1, min_pts=2)
     array([0, 0, 0, 1, 1, 1])
 
+    >>> dbscan_st(points, times=[0, 1, 2, 10, 11, 12], eps_spatial=1, eps_temporal=1, min_pts=2, backend='sweep')
+    array([0, 0, 0, 1, 1, 1])
+
+    """
+    # Find every neighbourhood once.
+    indptr, indices = neighbourhoods_st(points, times, eps_spatial, eps_temporal, backend=backend)
+
+    is_core = np.diff(indptr) >= min_pts
+
+    return expand_clusters(indptr, indices, is_core)
+
+
+def neighbourhoods_st(
+    points: array_like, times: array_like, eps_spatial: float, eps_temporal: float, *, backend: str = 'matrix'
+) -> Tuple[ndarray, ndarray]:
     """
-    D_spatial = cdist(points, points)
+    Return the spatiotemporal neighbourhoods of all points as a CSR neighbour list.
+
+    Parameters
+    ----------
+    points : (N, D) array_like
+        Array of N points with dimension D.
+    times : (N,) array_like
+        Array of N times corresponding to the points.
+        If None, all of the times are zero.
+    eps_spatial : float
+        Maximum distance between two points for one to be
+        considered in the neighbourhood of the other.
+    eps_temporal : float
+        Maximum distance between two times for one to be
+        considered in the neighbourhood of the other.
+    backend : {'matrix', 'sweep'}, optional
+        Method for finding the neighbourhoods (default 'matrix').
+        See `dbscan_st`.
+
+    Returns
+    -------
+    indptr : (N + 1,) ndarray
+        The neighbours of point i are indices[indptr[i]:indptr[i + 1]].
+    indices : ndarray
+        Indices of the neighbours, in ascending order for each point.
+
+    Raises
+    ------
+    ValueError
+        If the backend name is not recognized.
+
+    Examples
+    --------
+    >>> points = [[0, 0], [1, 0], [2, 0], [0, 5]]
+
+    >>> indptr, indices = neighbourhoods_st(points, None, eps_spatial=1, eps_temporal=1)
+
+    >>> indptr
+    array([0, 2, 5, 7, 8])
 
+    >>> indices
+    array([0, 1, 0, 1, 2, 1, 2, 3])
+
+    """
     n_points = len(points)
 
     if times is None:
         times = np.zeros(n_points)
 
     times = np.array(times).reshape(-1, 1)
-    D_temporal = cdist(times, times)
 
-    labels = np.zeros(n_points, dtype=int)
+    if backend == 'matrix':
+
+        is_neighbour = (cdist(points, points) <= eps_spatial) & (cdist(times, times) <= eps_temporal)
+        rows, indices = np.nonzero(is_neighbour)
+
+    elif backend == 'sweep':
+
+        rows, indices, _, _ = neighbour_pairs_st(points, times, eps_spatial, eps_temporal)
+
+    else:
+        raise ValueError("The backend must be 'matrix' or 'sweep'.")
+
+    indptr = np.zeros(n_points + 1, dtype=int)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=n_points))
+
+    return indptr, indices
+
+
+def neighbour_pairs_st(
+    points: array_like, times: array_like, eps_spatial: float, eps_temporal: float
+) -> Tuple[ndarray, ndarray, ndarray, ndarray]:
+    """
+    Return all pairs of spatiotemporal neighbours with their distances.
+
+    The pairs are found by sweeping over the points sorted by time (see `SweepIndex`).
+    The distances are summed as in `cdist`, so they are identical to the full matrices.
+    The neighbours for smaller values of eps are a subset of the pairs,
+    which can be found by filtering the distances.
+
+    Parameters
+    ----------
+    points : (N, D) array_like
+        Array of N points with dimension D.
+    times : (N,) array_like
+        Array of N times corresponding to the points.
+    eps_spatial : float
+        Maximum distance between two points for one to be
+        considered in the neighbourhood of the other.
+    eps_temporal : float
+        Maximum distance between two times for one to be
+        considered in the neighbourhood of the other.
+
+    Returns
+    -------
+    rows, cols : ndarray
+        Indices of the neighbouring points, sorted by row and then column.
+        Each point is its own neighbour.
+    dist_spatial, dist_temporal : ndarray
+        Spatial and temporal distances of the pairs.
+
+    Examples
+    --------
+    >>> rows, cols, dist_spatial, dist_temporal = neighbour_pairs_st([[0], [1], [3]], [0, 1, 1], 2, 1)
+
+    >>> rows
+    array([0, 0, 1, 1, 1, 2, 2])
+    >>> cols
+    array([0, 1, 0, 1, 2, 1, 2])
+    >>> dist_spatial
+    array([0., 1., 1., 0., 2., 2., 0.])
+    >>> dist_temporal
+    array([0., 1., 1., 0., 0., 0., 0.])
+
+    """
+    index = SweepIndex(points, times, eps_spatial, eps_temporal)
+
+    # All pairs of points within the temporal window of each other.
+    starts, stops = index.windows()
+    rows_sorted, cols_sorted = nf.window_pairs(starts, stops)
+    rows, cols = index.order[rows_sorted], index.order[cols_sorted]
+
+    dist_temporal = pp.batch_cdist(index.times[rows, np.newaxis], index.times[cols, np.newaxis]).ravel()
+    dist_spatial = pp.batch_cdist(index.points[rows, np.newaxis], index.points[cols, np.newaxis]).ravel()
+
+    is_neighbour = (dist_spatial <= eps_spatial) & (dist_temporal <= eps_temporal)
+
+    # Sort the neighbours of each point in ascending order.
+    index_sorted = np.flatnonzero(is_neighbour)[np.lexsort((cols[is_neighbour], rows[is_neighbour]))]
+
+    return rows[index_sorted], cols[index_sorted], dist_spatial[index_sorted], dist_temporal[index_sorted]
+
+
+def dbscan_st_grid(
+    points: array_like, times: array_like, settings: Iterable[Tuple[float, float, int]]
+) -> Dict[Tuple[float, float, int], ndarray]:
+    """
+    Cluster points with spatiotemporal DBSCAN for a grid of hyperparameters.
+
+    The neighbour pairs are found once at the largest values of eps.
+    The neighbourhoods of each setting are then found by filtering the pairs,
+    and the clusters of each value of `min_pts` share the neighbourhoods.
+    The labels are the same as `dbscan_st` with each setting.
+
+    Parameters
+    ----------
+    points : (N, D) array_like
+        Array of N points with dimension D.
+    times : (N,) array_like
+        Array of N times corresponding to the points.
+    settings : iterable
+        Settings (eps_spatial, eps_temporal, min_pts) of the hyperparameters.
+
+    Returns
+    -------
+    dict
+        Array of cluster labels for each setting.
+
+    Examples
+    --------
+    >>> points = [[0, 0], [1, 0], [2, 0], [0, 5], [1, 5], [2, 5]]
+    >>> times = [0, 1, 2, 10, 11, 12]
+
+    >>> dict_labels = dbscan_st_grid(points, times, [(1, 1, 2), (1, 1, 4), (5, 10, 4)])
+
+    >>> dict_labels[1, 1, 2]
+    array([0, 0, 0, 1, 1, 1])
+    >>> dict_labels[1, 1, 4]
+    array([-1, -1, -1, -1, -1, -1])
+    >>> dict_labels[5, 10, 4]
+    array([0, 0, 0, 0, 0, 0])
+
+    """
+    settings = list(settings)
+    n_points = len(points)
+
+    eps_spatial_max = max(setting[0] for setting in settings)
+    eps_temporal_max = max(setting[1] for setting in settings)
+
+    rows, cols, dist_spatial, dist_temporal = neighbour_pairs_st(points, times, eps_spatial_max, eps_temporal_max)
+
+    dict_labels = {}
+
+    for eps_spatial, eps_temporal in dict.fromkeys(setting[:2] for setting in settings):
 
-    label_cluster = 0
+        # The filtered pairs are still sorted by row and then column.
+        is_neighbour = (dist_spatial <= eps_spatial) & (dist_temporal <= eps_temporal)
 
-    for idx_pt in range(n_points):
+        indptr = np.zeros(n_points + 1, dtype=int)
+        indptr[1:] = np.cumsum(np.bincount(rows[is_neighbour], minlength=n_points))
+        indices = cols[is_neighbour]
+
+        for setting in settings:
+
+            if setting[:2] == (eps_spatial, eps_temporal):
+
+                is_core = np.diff(indptr) >= setting[2]
+                dict_labels[setting] = expand_clusters(indptr, indices, is_core)
+
+    return dict_labels
+
+
+def expand_clusters(indptr: ndarray, indices: ndarray, is_core: ndarray) -> ndarray:
+    """
+    Label clusters by expanding from core points over precomputed neighbourhoods.
+
+    The points are visited in the same order as `dbscan_st`:
+    each unlabelled core point seeds a new cluster, and a border point
+    joins the first cluster that reaches it.
+
+    Parameters
+    ----------
+    indptr, indices : ndarray
+        CSR neighbour list from `neighbourhoods_st`.
+    is_core : (N,) ndarray
+        Boolean array.
+        Element i is True if point i is a core point.
+
+    Returns
+    -------
+    labels : (N,) ndarray
+        Array of cluster labels.
+        Noise points have a label of -1.
+
+    Examples
+    --------
+    >>> indptr, indices = neighbourhoods_st([[0], [1], [2], [5]], None, eps_spatial=1, eps_temporal=1)
+    >>> is_core = np.diff(indptr) >= 2
 
-        if labels[idx_pt] != 0:
-            # Only unlabelled points can be considered as seed points.
+    >>> expand_clusters(indptr, indices, is_core)
+    array([ 0,  0,  0, -1])
+
+    """
+    labels = np.full(len(is_core), -1)
+
+    label_cluster = -1
+
+    for idx_pt in np.flatnonzero(is_core):
+
+        if labels[idx_pt] != -1:
+            # The core point is already in a cluster.
             continue
 
-        set_neighbours = region_query_st(D_spatial, D_temporal, eps_spatial, eps_temporal, idx_pt)
+        label_cluster += 1
+        labels[idx_pt] = label_cluster
 
-        if len(set_neighbours) < min_pts:
-            # The neighbourhood of the point is smaller than the minimum.
-            # The point is marked as noise.
-            labels[idx_pt] = -1
+        # Frontier of core points with neighbourhoods still to be searched.
+        frontier = deque([idx_pt])
 
-        else:
-            label_cluster += 1
+        while frontier:
 
-            # Assign the point to the current cluster
-            labels[idx_pt] = label_cluster
+            idx_next = frontier.popleft()
+            neighbours = indices[indptr[idx_next] : indptr[idx_next + 1]]
 
-            grow_cluster_st(
-                D_spatial, D_temporal, labels, set_neighbours, label_cluster, eps_spatial, eps_temporal, min_pts
-            )
+            # Claim the unlabelled neighbours (including noise, which become border points).
+            neighbours_new = neighbours[labels[neighbours] == -1]
+            labels[neighbours_new] = label_cluster
 
-    # Subtract 1 from non-noise labels so they begin at zero (this is consistent with scikit-learn).
-    labels[labels != -1] -= 1
+            frontier.extend(neighbours_new[is_core[neighbours_new]])
 
     return labels
 
 
-def grow_cluster_st(
-    D_spatial: ndarray,
-    D_temporal: ndarray,
-    labels: ndarray,
-    set_neighbours: set,
-    label_cluster: int,
-    eps_spatial: float,
-    eps_temporal: float,
-    min_pts: int,
-) -> None:
+def dbscan_st_1d(
+    signal: array_like, times: array_like, eps_spatial: float = 0.5, eps_temporal: float = 0.5, min_pts: int = 5
+) -> ndarray:
     """
-    Grow a cluster starting from a seed point.
+    Cluster a one-dimensional signal with spatiotemporal DBSCAN.
+
+    This gives the same labels as `dbscan_st` with (N, 1) points,
+    in O(N log N) time for bounded neighbourhoods.
+
+    The points are sorted by time, and a window of the points within
+    `eps_temporal` slides over them. The signal values in the window are kept
+    in a sorted list, so the spatial neighbours of each point are counted with
+    binary searches. The core points are then connected with their core neighbours,
+    and each border point joins the earliest cluster with a core neighbour.
 
     Parameters
     ----------
-    D_spatial : (N, N) ndarray
-        Matrix of distances between points.
-    D_temporal : (N, N) ndarray
-        Matrix of distances between times.
+    signal : (N,) array_like
+        Array of N signal values.
+    times : (N,) array_like
+        Array of N times corresponding to the signal values.
+    eps_spatial : float, optional
+        Maximum distance between two values for one to be
+        considered in the neighbourhood of the other.
+    eps_temporal : float, optional
+        Maximum distance between two times for one to be
+        considered in the neighbourhood of the other.
+    min_pts : int, optional
+        Number of points in a neighbourhood for a point to be considered
+        a core point.
+
+    Returns
+    -------
     labels : (N,) ndarray
         Array of cluster labels.
-    set_neighbours : set
-        Set of indices for neighbours of the seed point.
-    label_cluster : int
-        Label of the current cluster.
+
+    Examples
+    --------
+    >>> signal = [0, 1, 2, 5, 6, 7, 20]
+    >>> times = [0, 1, 2, 10, 11, 12, 13]
+
+    >>> dbscan_st_1d(signal, times, eps_spatial=1, eps_temporal=1, min_pts=2)
+    array([ 0,  0,  0,  1,  1,  1, -1])
+
+    """
+    signal = np.asarray(signal, dtype=float).ravel()
+    times = np.asarray(times, dtype=float).ravel()
+
+    n_points = len(signal)
+
+    order = np.argsort(times, kind='stable')
+    values_sorted, times_sorted = signal[order].tolist(), times[order].tolist()
+
+    # Temporal window [starts[i], stops[i]) of each point in the sorted order.
+    starts = np.zeros(n_points, dtype=int)
+    stops = np.zeros(n_points, dtype=int)
+
+    counts = np.zeros(n_points, dtype=int)
+
+    # Sorted signal values of the points in the current window.
+    values_window: List[float] = []
+
+    index_start, index_stop = 0, 0
+
+    for i, (value, time) in enumerate(zip(values_sorted, times_sorted)):
+
+        while index_stop < n_points and times_sorted[index_stop] - time <= eps_temporal:
+            insort(values_window, values_sorted[index_stop])
+            index_stop += 1
+
+        while time - times_sorted[index_start] > eps_temporal:
+            del values_window[bisect_left(values_window, values_sorted[index_start])]
+            index_start += 1
+
+        starts[i], stops[i] = index_start, index_stop
+
+        counts[i] = count_within(values_window, value, eps_spatial)
+
+    is_core = counts >= min_pts
+
+    labels_sorted = np.full(n_points, -1)
+
+    if is_core.any():
+
+        # Connect each core point with the later core points in its neighbourhood.
+        cores = np.flatnonzero(is_core)
+        n_cores_before = np.concatenate(([0], np.cumsum(is_core)))
+
+        pairs_a, pairs_b = nf.window_pairs(np.arange(len(cores)) + 1, n_cores_before[stops[cores]])
+        is_edge = np.abs(signal[order[cores[pairs_b]]] - signal[order[cores[pairs_a]]]) <= eps_spatial
+
+        graph = coo_matrix((np.ones(is_edge.sum()), (pairs_a[is_edge], pairs_b[is_edge])), shape=(len(cores),) * 2)
+        _, components = connected_components(graph, directed=False)
+
+        # The clusters are numbered in order of their first core point, as in `dbscan_st`.
+        index_first = np.full(components.max() + 1, n_points)
+        np.minimum.at(index_first, components, order[cores])
+
+        rank = np.empty_like(index_first)
+        rank[np.argsort(index_first)] = np.arange(len(index_first))
+
+        labels_sorted[cores] = rank[components]
+
+        # Each border point joins the earliest cluster that has a core point in its neighbourhood.
+        borders = np.flatnonzero(~is_core)
+
+        pairs_a, pairs_b = nf.window_pairs(n_cores_before[starts[borders]], n_cores_before[stops[borders]])
+        points_border, points_core = borders[pairs_a], cores[pairs_b]
+
+        is_edge = np.abs(signal[order[points_core]] - signal[order[points_border]]) <= eps_spatial
+
+        labels_border = np.full(n_points, n_points)
+        np.minimum.at(labels_border, points_border[is_edge], labels_sorted[points_core[is_edge]])
+
+        has_cluster = labels_border[borders] < n_points
+        labels_sorted[borders[has_cluster]] = labels_border[borders[has_cluster]]
+
+    labels = np.empty(n_points, dtype=int)
+    labels[order] = labels_sorted
+
+    return labels
+
+
+def count_within(values_sorted: List[float], value: float, eps: float) -> int:
+    """
+    Count the sorted values within a distance `eps` of a value.
+
+    Parameters
+    ----------
+    values_sorted : list
+        Values in ascending order.
+    value : float
+        Centre of the interval.
+    eps : float
+        Maximum distance from the value.
+
+    Returns
+    -------
+    int
+        Number of values x with abs(x - value) <= eps.
+
+    Examples
+    --------
+    >>> count_within([0, 1, 1, 2, 5], 1, 1)
+    4
+
+    """
+    index_lower = bisect_left(values_sorted, value - eps)
+    index_upper = bisect_right(values_sorted, value + eps)
+
+    # The bounds are rounded, so check the values at the ends of the interval.
+    # The values within the distance are contiguous, because subtraction is monotonic.
+    while index_lower > 0 and abs(values_sorted[index_lower - 1] - value) <= eps:
+        index_lower -= 1
+
+    while index_lower < index_upper and abs(values_sorted[index_lower] - value) > eps:
+        index_lower += 1
+
+    while index_upper < len(values_sorted) and abs(values_sorted[index_upper] - value) <= eps:
+        index_upper += 1
+
+    while index_upper > index_lower and abs(values_sorted[index_upper - 1] - value) > eps:
+        index_upper -= 1
+
+    return index_upper - index_lower
+
+
+class SweepIndex:
+    """
+    Spatiotemporal region queries on points sorted by time.
+
+    The temporal neighbours of a point are a contiguous window of the points
+    sorted by time, which is found with a binary search.
+    The spatial distances are only computed within the windows (see `neighbour_pairs_st`),
+    so no matrices of distances are needed.
+
+    Parameters
+    ----------
+    points : (N, D) array_like
+        Array of N points with dimension D.
+    times : (N,) array_like
+        Array of N times corresponding to the points.
     eps_spatial : float
         Maximum distance between two points for one to be
         considered in the neighbourhood of the other.
     eps_temporal : float
         Maximum distance between two times for one to be
         considered in the neighbourhood of the other.
-    min_pts : int
-        Number of points in a neighbourhood for a point to be considered
-        a core point.
 
     Examples
     --------
     >>> points = [[0, 0], [1, 0], [2, 0], [0, 5], [1, 5], [2, 5]]
+    >>> times = [1, 2, 3, 4, 5, 1]
 
-    >>> idx_pt, label = 0, 1
-    >>> eps_spatial, eps_temporal, min_pts = 1, 1, 2
+    >>> index = SweepIndex(points, times, eps_spatial=1, eps_temporal=1)
 
-    >>> D_spatial = cdist(points, points)
-    >>> D_temporal = np.zeros_like(D_spatial)
+    >>> index.order
+    array([0, 5, 1, 2, 3, 4])
 
-    >>> labels = np.zeros(len(points))
+    >>> index.windows()
+    (array([0, 0, 0, 2, 3, 4]), array([3, 3, 4, 5, 6, 6]))
 
-    >>> set_neighbours = region_query_st(D_spatial, D_temporal, eps_spatial, eps_temporal, idx_pt)
+    """
 
-    >>> grow_cluster_st(D_spatial, D_temporal, labels, set_neighbours, label, eps_spatial, eps_temporal, min_pts)
+    __slots__ = ('points', 'times', 'order', 'times_sorted', 'eps_spatial', 'eps_temporal')
 
-    >>> labels
-    array([1., 1., 1., 0., 0., 0.])
+    def __init__(self, points: array_like, times: array_like, eps_spatial: float, eps_temporal: float):
 
-    """
-    # Initialize a queue with the current neighbourhood.
-    queue_search: Any = Queue()
+        points = np.asarray(points, dtype=float)
 
-    for i in set_neighbours:
-        queue_search.put(i)
+        # A 1D array is a column of values, so an empty (0, D) array keeps its shape.
+        self.points = points.reshape(-1, 1) if points.ndim == 1 else points
+        self.times = np.asarray(times, dtype=float).reshape(-1, 1)
 
-    while not queue_search.empty():
+        self.order = np.argsort(self.times.ravel(), kind='stable')
+        self.times_sorted = self.times.ravel()[self.order]
 
-        # Consider the next point in the queue.
-        idx_next = queue_search.get()
+        self.eps_spatial = eps_spatial
+        self.eps_temporal = eps_temporal
 
-        label_next = labels[idx_next]
+    def windows(self) -> Tuple[ndarray, ndarray]:
+        """
+        Return the temporal window of every point.
 
-        if label_next == -1:
-            # This neighbour was labelled as noise.
-            # It is now a border point of the cluster.
-            labels[idx_next] = label_cluster
+        Returns
+        -------
+        starts, stops : (N,) ndarray
+            The window of the point at position i in the time order is
+            positions starts[i] to stops[i] (exclusive) in the time order.
+            The windows may contain a few extra points near the ends.
 
-        elif label_next == 0:
-            # The neighbour was unclaimed.
-            # Add the next point to the cluster.
-            labels[idx_next] = label_cluster
+        """
+        tolerance = 4 * np.spacing(np.abs(self.times_sorted) + self.eps_temporal)
 
-            set_neighbours_next = region_query_st(D_spatial, D_temporal, eps_spatial, eps_temporal, idx_next)
+        starts = np.searchsorted(self.times_sorted, self.times_sorted - self.eps_temporal - tolerance, side='left')
+        stops = np.searchsorted(self.times_sorted, self.times_sorted + self.eps_temporal + tolerance, side='right')
 
-            if len(set_neighbours_next) >= min_pts:
-                # The next point is a core point.
-                # Add its neighbourhood to the queue to be searched.
-                for i in set_neighbours_next:
-                    queue_search.put(i)
+        return starts, stops
 
 
-def region_query(dist_matrix: ndarray, eps: float, idx_pt: int) -> set:
+class OnlineDBSCAN:
     """
-    Find which points are within a distance `eps` of the point with index `idx_pt`.
+    Spatiotemporal DBSCAN for points that arrive in time order.
+
+    The points are added frame by frame (e.g., the foot points of a walking pass
+    while the participant is still walking). Only the points within `eps_temporal`
+    of the latest time are searched for neighbours.
+
+    The neighbourhood of a point is complete once the latest time is more than
+    `eps_temporal` after the time of the point, so it is then known whether the point
+    is a core point. A cluster can no longer grow once every point that is not decided
+    is more than `eps_temporal` after its last core point, which takes about
+    `2 * eps_temporal`. The clusters are finalised in order of their first point,
+    so a label is emitted once it is the same as the label from `dbscan_st`
+    on the complete set of points.
+
+    The work for each frame is bounded by the number of points in the temporal window.
 
     Parameters
     ----------
-    dist_matrix : (N, N) ndarray
-        Distance matrix.
-    eps : float
+    eps_spatial : float, optional
         Maximum distance between two points for one to be
         considered in the neighbourhood of the other.
-    idx_pt : int
-        Index of the current point.
-
-    Returns
-    -------
-    set
-        Set of indices for the points neighbouring the current point.
+    eps_temporal : float, optional
+        Maximum distance between two times for one to be
+        considered in the neighbourhood of the other.
+    min_pts : int, optional
+        Number of points in a neighbourhood for a point to be considered
+        a core point.
 
     Examples
     --------
-    >>> points = [[0, 0], [1, 0], [2, 0], [0, 5], [1, 5], [2, 5]]
+    >>> clusterer = OnlineDBSCAN(eps_spatial=1, eps_temporal=1, min_pts=2)
+
+    >>> clusterer.update([[0, 0]], time=0)
+    []
+    >>> clusterer.update([[1, 0]], time=1)
+    []
+    >>> clusterer.update([[9, 9]], time=2)
+    []
 
-    >>> dist_matrix = cdist(points, points)
+    The first cluster is finalised once no later point can join it.
+    The third point has no neighbours, so it is noise.
 
-    >>> region_query(dist_matrix, 0.5, 0)
-    {0}
-    >>> region_query(dist_matrix, 1, 0)
-    {0, 1}
-    >>> region_query(dist_matrix, 5, 0)
-    {0, 1, 2, 3}
+    >>> clusterer.update([[9, 9]], time=4)
+    [(0, 0), (1, 0), (2, -1)]
+
+    >>> clusterer.finish()
+    [(3, -1)]
 
     """
-    return set(np.nonzero(dist_matrix[idx_pt] <= eps)[0])
 
+    __slots__ = (
+        'eps_spatial',
+        'eps_temporal',
+        'min_pts',
+        'time_latest',
+        'n_points',
+        'window',
+        'times',
+        'neighbours',
+        'is_core',
+        'undecided',
+        'pending',
+        'parents',
+        'components',
+        'label_next',
+    )
+
+    def __init__(self, eps_spatial: float = 0.5, eps_temporal: float = 0.5, min_pts: int = 5):
+
+        self.eps_spatial = eps_spatial
+        self.eps_temporal = eps_temporal
+        self.min_pts = min_pts
+
+        self.time_latest = -np.inf
+        self.n_points = 0
+
+        # Points that can still be neighbours of new points, as (index, point, time).
+        self.window: deque = deque()
+
+        # Points without a final label.
+        self.times: Dict[int, float] = {}
+        self.neighbours: Dict[int, List[int]] = {}
+        self.is_core: Dict[int, bool] = {}
+
+        # Points without a decided core status, and decided non-core points, in time order.
+        self.undecided: deque = deque()
+        self.pending: deque = deque()
+
+        # Union-find forest of the core points.
+        # Each root has a component [first index, time of last core point, core points].
+        self.parents: Dict[int, int] = {}
+        self.components: Dict[int, list] = {}
+
+        self.label_next = 0
 
-def region_query_st(
-    D_spatial: ndarray, D_temporal: ndarray, eps_spatial: float, eps_temporal: float, idx_pt: int
-) -> set:
+    def update(self, points: array_like, time: float) -> List[Tuple[int, int]]:
+        """
+        Add the points of a frame.
+
+        Parameters
+        ----------
+        points : (N, D) array_like
+            Points of the frame.
+        time : float
+            Time of the frame.
+            The times of the frames must be non-decreasing.
+
+        Returns
+        -------
+        list
+            Pairs (index, label) of the points with a final label.
+            The index counts all points in order of arrival.
+
+        Raises
+        ------
+        ValueError
+            If the time is earlier than the previous time.
+
+        """
+        if time < self.time_latest:
+            raise ValueError("The times must be non-decreasing.")
+
+        self.time_latest = time
+
+        # The neighbourhoods of these points are complete.
+        self.decide(lambda time_point: time - time_point > self.eps_temporal)
+
+        while self.window and time - self.window[0][2] > self.eps_temporal:
+            self.window.popleft()
+
+        points = np.asarray(points, dtype=float).reshape(len(points), -1)
+
+        for point in points:
+            self.add_point(point, time)
+
+        return self.emit()
+
+    def finish(self) -> List[Tuple[int, int]]:
+        """
+        Finalise all of the remaining points at the end of the stream.
+
+        Returns
+        -------
+        list
+            Pairs (index, label) of the remaining points.
+
+        """
+        self.time_latest = np.inf
+
+        self.decide(lambda time_point: True)
+        self.window.clear()
+
+        return self.emit()
+
+    def add_point(self, point: ndarray, time: float) -> None:
+        """Add a point and link it with its neighbours in the window."""
+        index = self.n_points
+        self.n_points += 1
+
+        self.times[index] = time
+        self.neighbours[index] = [index]
+
+        if self.window:
+
+            indices_window, points_window, times_window = zip(*self.window)
+
+            # The distances are computed as in the full distance matrices of `dbscan_st`.
+            dist_spatial = cdist([point], points_window)[0]
+            dist_temporal = cdist([[time]], np.reshape(times_window, (-1, 1)))[0]
+
+            for index_window, is_neighbour in zip(
+                indices_window, (dist_spatial <= self.eps_spatial) & (dist_temporal <= self.eps_temporal)
+            ):
+                if is_neighbour:
+                    self.neighbours[index].append(index_window)
+                    self.neighbours[index_window].append(index)
+
+        self.window.append((index, point, time))
+        self.undecided.append(index)
+
+    def decide(self, is_complete: Callable[[float], bool]) -> None:
+        """Decide which points are core points, for the points with a complete neighbourhood."""
+        while self.undecided and is_complete(self.times[self.undecided[0]]):
+
+            index = self.undecided.popleft()
+
+            self.is_core[index] = len(self.neighbours[index]) >= self.min_pts
+
+            if not self.is_core[index]:
+                self.pending.append(index)
+                continue
+
+            self.parents[index] = index
+            self.components[index] = [index, self.times[index], [index]]
+
+            for index_other in self.neighbours[index]:
+                if self.is_core.get(index_other) and index_other != index:
+                    self.union(index, index_other)
+
+    def find(self, index: int) -> int:
+        """Return the root of the component of a core point."""
+        while self.parents[index] != index:
+            self.parents[index] = self.parents[self.parents[index]]
+            index = self.parents[index]
+
+        return index
+
+    def union(self, index_a: int, index_b: int) -> None:
+        """Merge the components of two core points."""
+        root_a, root_b = self.find(index_a), self.find(index_b)
+
+        if root_a == root_b:
+            return
+
+        if len(self.components[root_a][2]) < len(self.components[root_b][2]):
+            root_a, root_b = root_b, root_a
+
+        first_a, time_a, cores_a = self.components[root_a]
+        first_b, time_b, cores_b = self.components.pop(root_b)
+
+        cores_a.extend(cores_b)
+        self.components[root_a] = [min(first_a, first_b), max(time_a, time_b), cores_a]
+        self.parents[root_b] = root_a
+
+    def emit(self) -> List[Tuple[int, int]]:
+        """Return the final labels that are now known, and forget those points."""
+        labels_final: List[Tuple[int, int]] = []
+
+        # Emit the finished clusters in order of their first point.
+        while self.components:
+
+            root = min(self.components, key=lambda x: self.components[x][0])
+            _, time_last, cores = self.components[root]
+
+            # The first cluster can still grow if a new point or an undecided point
+            # could be a neighbour of its last core point.
+            time_next = self.times[self.undecided[0]] if self.undecided else self.time_latest
+
+            if not time_next - time_last > self.eps_temporal:
+                break
+
+            del self.components[root]
+
+            for index_core in sorted(cores):
+
+                for index in self.neighbours[index_core]:
+                    # Unlabelled border points join the earliest cluster that reaches them.
+                    if index in self.times and (index == index_core or not self.is_core[index]):
+                        labels_final.append((index, self.label_next))
+                        self.forget(index)
+
+            for index_core in cores:
+                del self.parents[index_core]
+
+            self.label_next += 1
+
+        # Non-core points are noise if none of their neighbours are core points.
+        # Points that are no longer stored already have a final label, so they are decided.
+        while self.pending:
+
+            index = self.pending[0]
+
+            if index in self.times:
+
+                if not all(x in self.is_core or x not in self.times for x in self.neighbours[index]):
+                    # Wait for the neighbours to be decided.
+                    break
+
+                if not any(self.is_core.get(x, False) for x in self.neighbours[index]):
+                    labels_final.append((index, -1))
+                    self.forget(index)
+
+            self.pending.popleft()
+
+        return sorted(labels_final)
+
+    def forget(self, index: int) -> None:
+        """Remove a point with a final label."""
+        del self.times[index]
+        del self.neighbours[index]
+        del self.is_core[index]
+
+
+def dbscan_st_online(
+    points: array_like, times: array_like, eps_spatial: float = 0.5, eps_temporal: float = 0.5, min_pts: int = 5
+) -> ndarray:
     """
-    Perform spatiotemporal region query for DBSCAN.
+    Cluster points with `OnlineDBSCAN`, adding the points of each time as a frame.
 
-    Returns the intersection of spatial and temporal reqion queries.
+    The labels are the same as `dbscan_st`.
 
     Parameters
     ----------
-    D_spatial : (N, N) ndarray
-        Matrix of distances between points.
-    D_temporal : (N, N) ndarray
-        Matrix of distances between times.
-    eps_spatial : float
+    points : (N, D) array_like
+        Array of N points with dimension D.
+    times : (N,) array_like
+        Array of N times corresponding to the points.
+        The times must be non-decreasing.
+    eps_spatial : float, optional
         Maximum distance between two points for one to be
         considered in the neighbourhood of the other.
-    eps_temporal : float
+    eps_temporal : float, optional
         Maximum distance between two times for one to be
         considered in the neighbourhood of the other.
-    idx_pt : int
-        Index of the current point.
+    min_pts : int, optional
+        Number of points in a neighbourhood for a point to be considered
+        a core point.
 
     Returns
     -------
-    set
-        Intersection of the spatial and temporal neighbourhoods.
+    labels : (N,) ndarray
+        Array of cluster labels.
 
     Examples
     --------
     >>> points = [[0, 0], [1, 0], [2, 0], [0, 5], [1, 5], [2, 5]]
-    >>> times = np.row_stack([1, 2, 3, 4, 5, 1])
 
-    >>> eps_spatial, eps_temporal = 1, 5
-    >>> idx_pt = 5
+    >>> dbscan_st_online(points, [0, 1, 2, 3, 4, 5], eps_spatial=1, eps_temporal=1, min_pts=2)
+    array([0, 0, 0, 1, 1, 1])
 
-    >>> D_spatial = cdist(points, points)
-    >>> D_temporal = cdist(times, times)
+    """
+    points = np.asarray(points, dtype=float).reshape(len(points), -1)
+    times = np.asarray(times)
 
-    >>> region_query_st(D_spatial, D_temporal, eps_spatial, eps_temporal, idx_pt)
-    {4, 5}
+    clusterer = OnlineDBSCAN(eps_spatial, eps_temporal, min_pts)
 
-    >>> region_query_st(D_spatial, D_temporal, eps_spatial, 1, idx_pt)
-    {5}
+    labels = np.zeros(len(points), dtype=int)
+    list_labels: List[Tuple[int, int]] = []
 
-    """
-    set_neighbours_spatial = region_query(D_spatial, eps_spatial, idx_pt)
-    set_neighbours_temporal = region_query(D_temporal, eps_temporal, idx_pt)
+    # Each run of equal times is one frame.
+    index_frames = np.flatnonzero(np.diff(times, prepend=np.nan) != 0).tolist() + [len(times)]
 
-    return set_neighbours_spatial.intersection(set_neighbours_temporal)
+    for index_start, index_stop in zip(index_frames[:-1], index_frames[1:]):
+        list_labels.extend(clusterer.update(points[index_start:index_stop], times[index_start]))
+
+    list_labels.extend(clusterer.finish())
+
+    for index, label in list_labels:
+        labels[index] = label
+
+    return labels
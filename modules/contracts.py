@@ -0,0 +1,172 @@
+"""
+Module for checking contracts (preconditions and postconditions) with a project-wide policy.
+
+The `require` and `ensure` decorators wrap those of `dpcontracts`.
+The policy decides on each call whether the contracts of a function are checked:
+
+- 'full': every call is checked (default).
+- 'sampled': one call in every `every` calls of each function is checked.
+- 'off': no calls are checked.
+
+The initial policy is read from the environment variables GAIT_CONTRACTS (the mode)
+and GAIT_CONTRACTS_EVERY (the sampling interval, default 10).
+Worker processes read the environment when they import the module.
+
+"""
+
+import os
+from contextlib import contextmanager
+from functools import wraps
+from itertools import count
+from typing import Any, Callable, Iterator, Optional
+
+import dpcontracts
+
+MODES = ('full', 'sampled', 'off')
+
+
+class ContractPolicy:
+    """
+    Policy for checking contracts.
+
+    Parameters
+    ----------
+    mode : {'full', 'sampled', 'off'}
+        Which calls are checked.
+    every : int
+        Interval between checked calls in the 'sampled' mode.
+
+    Raises
+    ------
+    ValueError
+        If the mode is not recognized, or the interval is less than one.
+
+    """
+
+    __slots__ = ('mode', 'every')
+
+    def __init__(self, mode: str, every: int):
+
+        if mode not in MODES:
+            raise ValueError("The contract mode must be 'full', 'sampled' or 'off'.")
+
+        if every < 1:
+            raise ValueError("The sampling interval must be at least one.")
+
+        self.mode = mode
+        self.every = every
+
+    def __repr__(self) -> str:
+        """Return the representation of the policy."""
+        return "ContractPolicy(mode={!r}, every={})".format(self.mode, self.every)
+
+
+POLICY = ContractPolicy(os.environ.get('GAIT_CONTRACTS', 'full'), int(os.environ.get('GAIT_CONTRACTS_EVERY', 10)))
+
+
+def get_policy() -> ContractPolicy:
+    """Return the current contract policy."""
+    return ContractPolicy(POLICY.mode, POLICY.every)
+
+
+def set_policy(mode: str, every: Optional[int] = None) -> None:
+    """
+    Set the contract policy of the current process.
+
+    Parameters
+    ----------
+    mode : {'full', 'sampled', 'off'}
+        Which calls are checked.
+    every : int, optional
+        Interval between checked calls in the 'sampled' mode.
+        By default, the interval is unchanged.
+
+    Examples
+    --------
+    The previous policy is restored at the end of the `with` block.
+
+    >>> with policy('full'):
+    ...     set_policy('sampled', every=100)
+    ...     get_policy()
+    ContractPolicy(mode='sampled', every=100)
+
+    """
+    policy = ContractPolicy(mode, POLICY.every if every is None else every)
+
+    POLICY.mode, POLICY.every = policy.mode, policy.every
+
+
+@contextmanager
+def policy(mode: str, every: Optional[int] = None) -> Iterator[ContractPolicy]:
+    """
+    Temporarily set the contract policy.
+
+    Examples
+    --------
+    >>> @require("The input must be positive.", lambda args: args.x > 0)
+    ... def double(x):
+    ...     return 2 * x
+
+    >>> with policy('off'):
+    ...     double(-1)
+    -2
+
+    >>> double(-1)
+    Traceback (most recent call last):
+    dpcontracts.PreconditionError: The input must be positive.
+
+    """
+    policy_prev = get_policy()
+    set_policy(mode, every)
+
+    try:
+        yield get_policy()
+    finally:
+        set_policy(policy_prev.mode, policy_prev.every)
+
+
+def apply_policy(decorator: Callable[[Callable], Callable]) -> Callable[[Callable], Callable]:
+    """
+    Wrap a contract decorator, so the policy decides on each call whether the contract is checked.
+
+    Parameters
+    ----------
+    decorator : function
+        Contract decorator from `dpcontracts`.
+
+    Returns
+    -------
+    function
+        Decorator that checks the contract according to the policy.
+
+    """
+
+    def decorate(func: Callable) -> Callable:
+
+        func_checked = decorator(func)
+        counter = count()
+
+        @wraps(func)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+
+            if POLICY.mode == 'full' or (POLICY.mode == 'sampled' and next(counter) % POLICY.every == 0):
+                return func_checked(*args, **kwargs)
+
+            return func(*args, **kwargs)
+
+        # Stacked contracts read the arguments from the signature of the original function.
+        setattr(inner, '__contract_wrapped_func__', dpcontracts.get_wrapped_func(func))
+
+        return inner
+
+    return decorate
+
+
+def require(description: str, predicate: Callable) -> Callable[[Callable], Callable]:
+    """Specify a precondition, checked according to the contract policy."""
+    return apply_policy(dpcontracts.require(description, predicate))
+
+
+def ensure(description: str, predicate: Callable) -> Callable[[Callable], Callable]:
+    """Specify a postcondition, checked according to the contract policy."""
+    return apply_policy(dpcontracts.ensure(description, predicate))
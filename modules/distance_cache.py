@@ -0,0 +1,108 @@
+"""Module for caching the distances of frame populations."""
+
+from collections import OrderedDict
+from typing import Hashable, Iterable, Tuple
+
+from numpy import ndarray
+
+from modules.block_distances import BlockDistances
+
+
+class DistanceCache:
+    """
+    Least recently used (LRU) cache of the inter-label distances of populations.
+
+    The distances of each population are stored as `BlockDistances`.
+    The total size of the cached blocks is bounded by a memory budget.
+    When a new population exceeds the budget, the least recently used populations are evicted.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Memory budget of the cache in bytes.
+    label_pairs : iterable
+        Pairs of labels (A, B) that need distances.
+
+    Examples
+    --------
+    >>> import numpy as np
+
+    >>> cache = DistanceCache(max_bytes=100, label_pairs=[(0, 1)])
+
+    >>> population = np.array([[0, 0, 0], [3, 4, 0], [6, 8, 0]])
+    >>> labels = np.array([0, 1, 1])
+
+    >>> cache.get(0, population, labels)[0:1, 1:3]
+    array([[ 5., 10.]])
+
+    >>> cache.get(0, population, labels) is cache.get(0, population, labels)
+    True
+
+    >>> cache.hits, cache.misses, cache.nbytes
+    (2, 1, 16)
+
+    The distances of a large population do not fit in the budget, so the cache is emptied.
+
+    >>> dist_blocks = cache.get(1, np.zeros((14, 3)), np.repeat([0, 1], 7))
+    >>> len(cache), cache.nbytes
+    (0, 0)
+
+    """
+
+    __slots__ = ('max_bytes', 'label_pairs', 'nbytes', 'hits', 'misses', 'entries')
+
+    def __init__(self, max_bytes: int, label_pairs: Iterable[Tuple[int, int]]):
+
+        self.max_bytes = max_bytes
+        self.label_pairs = [(int(label_a), int(label_b)) for label_a, label_b in label_pairs]
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self.entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of cached populations."""
+        return len(self.entries)
+
+    def get(self, key: Hashable, population: ndarray, labels: ndarray) -> BlockDistances:
+        """
+        Return the inter-label distances of a population.
+
+        The distances are computed and cached if they are not already in the cache.
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the population (e.g., the frame number).
+        population : (N, 3) ndarray
+            All position hypotheses on a frame.
+        labels : (N,) ndarray
+            Array of labels for N positions.
+            The labels are sorted in ascending order.
+
+        Returns
+        -------
+        BlockDistances
+            Distances between points with connected labels.
+
+        """
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+
+            return self.entries[key]
+
+        self.misses += 1
+
+        dist_blocks = BlockDistances(population, labels, self.label_pairs)
+        self.entries[key] = dist_blocks
+        self.nbytes += dist_blocks.nbytes
+
+        while self.nbytes > self.max_bytes:
+            # Evict the least recently used population.
+            _, dist_blocks_evicted = self.entries.popitem(last=False)
+            self.nbytes -= dist_blocks_evicted.nbytes
+
+        return dist_blocks
@@ -1,18 +1,29 @@
 """Module for calculating gait parameters from 3D body part positions."""
 
-from typing import Any, Dict, Iterator
+from typing import Any, Dict, Iterable, Iterator, Tuple, Union
 
 import numpy as np
 import pandas as pd
 import xarray as xr
-from dpcontracts import require, ensure
 from skspatial.objects import Vector, Line
 
 import modules.phase_detection as pde
 import modules.side_assignment as sa
 import modules.sliding_window as sw
+from modules.contracts import ensure, require
 from modules.phase_detection import Stance
 from modules.typing import array_like
+from modules.walking_pass import WalkingPass
+
+GAIT_PARAMS = [
+    'stride_length',
+    'absolute_step_length',
+    'step_length',
+    'stride_width',
+    'stride_time',
+    'stride_velocity',
+    'stance_percentage',
+]
 
 
 def spatial_parameters(point_a_i: array_like, point_b: array_like, point_a_f: array_like) -> Dict[str, np.float64]:
@@ -196,10 +207,106 @@ def stances_to_gait(df_stance: pd.DataFrame) -> pd.DataFrame:
     return df_gait
 
 
-@require(
-    "The layers must include head and two feet.",
-    lambda args: set(args.points_stacked.layers.values) == {'points_a', 'points_b', 'points_head'},
-)
+@require("The stances must be sorted by initial frame.", lambda args: np.all(np.diff(args.stances.frame_i) >= 0))
+def stances_to_gait_batch(stances: pde.StanceTable, *, fps: float = 30) -> pd.DataFrame:
+    """
+    Calculate gait parameters from a table of stance phases, for all strides at once.
+
+    A stride is three consecutive stance phases with alternating sides (L-R-L or R-L-R).
+    The parameters of all strides are computed with array operations,
+    and they are the same as `stances_to_gait` to floating-point precision.
+
+    Parameters
+    ----------
+    stances : StanceTable
+        Columnar table of stance phases, sorted by initial frame.
+    fps : int, optional
+        Camera frame rate in frames per second (default 30).
+
+    Returns
+    -------
+    DataFrame
+        Each row represents a set of gait parameters from one stride.
+        The index levels are 'side' and 'num_stride'.
+        The DataFrame is empty if there are no strides.
+
+    Raises
+    ------
+    ValueError
+        If the initial and final positions of foot A are the same in a stride.
+
+    Examples
+    --------
+    >>> stances = pde.StanceTable(
+    ...     num_stride=np.array([0, 0, 1]),
+    ...     frame_i=np.array([180, 200, 230]),
+    ...     frame_f=np.array([220, 230, 245]),
+    ...     position=np.array([[764, 28], [696, 37], [637, 24]]),
+    ...     side=np.array(['L', 'R', 'L']),
+    ... )
+
+    >>> df_gait = stances_to_gait_batch(stances)
+
+    >>> df_gait.index.to_list()
+    [('L', 0)]
+
+    >>> params = df_gait.loc[('L', 0)]
+
+    >>> params[['step_length', 'stride_width', 'stride_velocity', 'stance_percentage']].round(1).to_list()
+    [59.4, 11.1, 76.2, 80.0]
+
+    """
+    sides = stances.side
+
+    # Windows of three stance phases with alternating sides.
+    is_stride = (sides[:-2] != sides[1:-1]) & (sides[:-2] == sides[2:])
+
+    index_a_i = np.flatnonzero(is_stride)
+    index_b, index_a_f = index_a_i + 1, index_a_i + 2
+
+    if index_a_i.size == 0:
+        return pd.DataFrame()
+
+    positions = np.asarray(stances.position, dtype=float)
+    points_a_i, points_b, points_a_f = positions[index_a_i], positions[index_b], positions[index_a_f]
+
+    directions = points_a_f - points_a_i
+    norms_sq = (directions * directions).sum(axis=1)
+
+    if np.any(norms_sq == 0):
+        # Foot A has not moved, so there is no line to project onto (as in `spatial_parameters`).
+        raise ValueError("The vector must not be the zero vector.")
+
+    # Project foot B onto the line from the initial to the final position of foot A.
+    coefficients = (directions * (points_b - points_a_i)).sum(axis=1) / norms_sq
+    points_b_proj = points_a_i + coefficients[:, np.newaxis] * directions
+
+    stride_length = np.linalg.norm(directions, axis=1)
+
+    stride_time = (stances.frame_i[index_a_f] - stances.frame_i[index_a_i]) / fps
+    stance_time = (stances.frame_f[index_a_i] - stances.frame_i[index_a_i]) / fps
+
+    dict_gait = {
+        'stride_length': stride_length,
+        'absolute_step_length': np.linalg.norm(points_a_f - points_b, axis=1),
+        'step_length': np.linalg.norm(points_a_f - points_b_proj, axis=1),
+        'stride_width': np.linalg.norm(points_b - points_b_proj, axis=1),
+        'stride_time': stride_time,
+        'stride_velocity': stride_length / stride_time,
+        'stance_percentage': (stance_time / stride_time) * 100,
+    }
+
+    # The index is built from its levels and codes, which is faster than setting it from columns.
+    levels_side, codes_side = np.unique(sides[index_a_i], return_inverse=True)
+    levels_num, codes_num = np.unique(stances.num_stride[index_a_i], return_inverse=True)
+
+    index = pd.MultiIndex(
+        levels=[levels_side.astype(object), levels_num], codes=[codes_side, codes_num], names=['side', 'num_stride']
+    )
+
+    return pd.DataFrame(dict_gait, index=index)
+
+
 @ensure(
     "The output must contain gait params.",
     lambda _, result: 'stride_length' in result.columns if not result.empty else True,
@@ -208,15 +315,15 @@ def stances_to_gait(df_stance: pd.DataFrame) -> pd.DataFrame:
     "The output must have the required index.",
     lambda _, result: result.index.names == ['side', 'num_stride'] if not result.empty else True,
 )
-def walking_pass_parameters(points_stacked: xr.DataArray) -> pd.DataFrame:
+def walking_pass_parameters(points_stacked: Union[WalkingPass, xr.DataArray]) -> pd.DataFrame:
     """
     Calculate gait parameters from a single walking pass.
 
     Parameters
     ----------
-    points_stacked : xarray.DataArray
-        (N_frames, N_dims, N_layers) array of points.
-        The layers are 'points_head', 'points_a', 'points_b'.
+    points_stacked : WalkingPass or xarray.DataArray
+        Head and foot points of the walking pass.
+        A DataArray has the layers 'points_head', 'points_a', 'points_b'.
 
     Returns
     -------
@@ -228,6 +335,61 @@ def walking_pass_parameters(points_stacked: xr.DataArray) -> pd.DataFrame:
     basis, points_grouped_inlier = sa.compute_basis(points_stacked)
 
     labels_grouped_l, labels_grouped_r = pde.label_stances(points_grouped_inlier, basis)
-    df_stance = pde.get_stance_dataframe(points_grouped_inlier, labels_grouped_l, labels_grouped_r)
+    stances = pde.stance_table(points_grouped_inlier, labels_grouped_l, labels_grouped_r)
+
+    return stances_to_gait_batch(stances)
+
+
+def walking_pass_parameters_grid(
+    points_stacked: Union[WalkingPass, xr.DataArray], settings: Iterable[Tuple[float, float, int]]
+) -> pd.DataFrame:
+    """
+    Calculate gait parameters from a single walking pass for a grid of stance hyperparameters.
+
+    Parameters
+    ----------
+    points_stacked : WalkingPass or xarray.DataArray
+        Head and foot points of the walking pass.
+        A DataArray has the layers 'points_head', 'points_a', 'points_b'.
+    settings : iterable
+        Settings (eps_spatial, eps_temporal, min_pts) of the DBSCAN
+        used to detect the stance phases.
+
+    Returns
+    -------
+    DataFrame
+        Each row represents a setting.
+        The index levels are 'eps_spatial', 'eps_temporal', 'min_pts'.
+        The columns are the number of left and right stance phases, the number of strides,
+        and the median of each gait parameter (NaN if there are no strides).
+
+    """
+    settings = list(settings)
+
+    basis, points_grouped_inlier = sa.compute_basis(points_stacked)
+
+    dict_labels = pde.label_stances_grid(points_grouped_inlier, basis, settings)
+
+    list_rows = []
+
+    for setting in settings:
+
+        labels_grouped_l, labels_grouped_r = dict_labels[setting]
+        stances = pde.stance_table(points_grouped_inlier, labels_grouped_l, labels_grouped_r)
+
+        df_gait = stances_to_gait_batch(stances)
+
+        row: Dict[str, float] = {
+            'n_stances_l': len(np.unique(labels_grouped_l[labels_grouped_l != -1])),
+            'n_stances_r': len(np.unique(labels_grouped_r[labels_grouped_r != -1])),
+            'n_strides': len(df_gait),
+        }
+
+        for param in GAIT_PARAMS:
+            row[param] = df_gait[param].median() if not df_gait.empty else np.nan
+
+        list_rows.append(row)
+
+    index = pd.MultiIndex.from_tuples(settings, names=['eps_spatial', 'eps_temporal', 'min_pts'])
 
-    return df_stance.pipe(stances_to_gait)
+    return pd.DataFrame(list_rows, index=index)
@@ -1,12 +1,12 @@
 """Functions for manipulating graphs."""
 
-from typing import Any, Mapping, Tuple
+from typing import Any, Iterable, Mapping, NamedTuple, Tuple
 
 import numpy as np
 import pandas as pd
 from numpy import ndarray
 
-import modules.iterable_funcs as itf
+from modules.block_distances import label_layers
 from modules.typing import adj_list, array_like, func_ab
 
 
@@ -73,16 +73,149 @@ def adj_matrix_to_list(adj_matrix: array_like) -> adj_list:
     n_nodes = len(adj_matrix)
     graph: dict = {i: {} for i in range(n_nodes)}
 
-    for u in range(n_nodes):
-        for v in range(n_nodes):
-            element = adj_matrix[u][v]
+    is_edge = ~np.isnan(np.asarray(adj_matrix, dtype=float))
+    nodes_u, nodes_v = np.nonzero(is_edge)
 
-            if ~np.isnan(element):
-                graph[u][v] = element
+    # Keep the type of the weights in the input (e.g., int in a list of lists).
+    if isinstance(adj_matrix, ndarray):
+        weights: Iterable = adj_matrix[nodes_u, nodes_v]
+    else:
+        weights = [adj_matrix[u][v] for u, v in zip(nodes_u, nodes_v)]
+
+    for u, v, weight in zip(nodes_u.tolist(), nodes_v.tolist(), weights):
+        graph[u][v] = weight
 
     return graph
 
 
+class CSRGraph(NamedTuple):
+    """
+    Weighted directed graph in compressed sparse row (CSR) format.
+
+    The neighbours of node u are indices[indptr[u]:indptr[u + 1]],
+    and the weights of the edges to them are weights[indptr[u]:indptr[u + 1]].
+
+    """
+
+    indptr: ndarray
+    indices: ndarray
+    weights: ndarray
+
+    @property
+    def n_nodes(self) -> int:
+        """Return the number of nodes."""
+        return len(self.indptr) - 1
+
+
+def adj_matrix_to_csr(adj_matrix: array_like) -> CSRGraph:
+    """
+    Convert an adjacency matrix to a CSR graph.
+
+    Parameters
+    ----------
+    adj_matrix : (N, N) array_like
+        Adjacency matrix of N nodes.
+        NaN means there is no edge.
+
+    Returns
+    -------
+    CSRGraph
+        Graph in CSR format.
+
+    Examples
+    --------
+    >>> mat = [[np.nan, 3, 10], [np.nan, np.nan, 5], [np.nan, np.nan, np.nan]]
+
+    >>> csr_graph = adj_matrix_to_csr(mat)
+
+    >>> csr_graph.indptr
+    array([0, 2, 3, 3])
+
+    >>> csr_graph.indices
+    array([1, 2, 2])
+
+    >>> csr_graph.weights
+    array([ 3., 10.,  5.])
+
+    """
+    adj_matrix = np.asarray(adj_matrix, dtype=float)
+
+    is_edge = ~np.isnan(adj_matrix)
+    nodes_u, nodes_v = np.nonzero(is_edge)
+
+    indptr = np.zeros(len(adj_matrix) + 1, dtype=int)
+    indptr[1:] = np.cumsum(is_edge.sum(axis=1))
+
+    return CSRGraph(indptr, nodes_v, adj_matrix[nodes_u, nodes_v])
+
+
+def adj_list_to_csr(graph: adj_list) -> CSRGraph:
+    """
+    Convert an adjacency list to a CSR graph.
+
+    Parameters
+    ----------
+    graph : dict
+        Adjacency list.
+        graph[u][v] is the weight from node u to node v.
+        The nodes must be the integers 0 to N - 1.
+
+    Returns
+    -------
+    CSRGraph
+        Graph in CSR format.
+        The neighbours of each node keep their order in the adjacency list.
+
+    Examples
+    --------
+    >>> graph = {0: {2: 10, 1: 3}, 1: {2: 5}, 2: {}}
+
+    >>> adj_list_to_csr(graph)
+    CSRGraph(indptr=array([0, 2, 3, 3]), indices=array([2, 1, 2]), weights=array([10.,  3.,  5.]))
+
+    """
+    n_nodes = len(graph)
+
+    indptr = np.zeros(n_nodes + 1, dtype=int)
+    indptr[1:] = np.cumsum([len(graph[u]) for u in range(n_nodes)])
+
+    indices = np.array([v for u in range(n_nodes) for v in graph[u]], dtype=int)
+    weights = np.array([weight for u in range(n_nodes) for weight in graph[u].values()], dtype=float)
+
+    return CSRGraph(indptr, indices, weights)
+
+
+def csr_to_adj_list(csr_graph: CSRGraph) -> adj_list:
+    """
+    Convert a CSR graph to an adjacency list.
+
+    Parameters
+    ----------
+    csr_graph : CSRGraph
+        Graph in CSR format.
+
+    Returns
+    -------
+    graph : dict
+        Adjacency list.
+        graph[u][v] is the weight from node u to node v.
+
+    Examples
+    --------
+    >>> csr_graph = adj_matrix_to_csr([[np.nan, 3, 10], [np.nan, np.nan, 5], [np.nan, np.nan, np.nan]])
+
+    >>> csr_to_adj_list(csr_graph)
+    {0: {1: 3.0, 2: 10.0}, 1: {2: 5.0}, 2: {}}
+
+    """
+    indptr, indices, weights = csr_graph
+
+    return {
+        u: dict(zip(indices[indptr[u] : indptr[u + 1]].tolist(), weights[indptr[u] : indptr[u + 1]]))
+        for u in range(csr_graph.n_nodes)
+    }
+
+
 def dag_shortest_paths(
     graph: adj_list, order: array_like, source_nodes: set
 ) -> Tuple[dict, dict]:
@@ -144,6 +277,71 @@ def dag_shortest_paths(
     return prev, dist
 
 
+def dag_shortest_paths_csr(
+    csr_graph: CSRGraph, order: array_like, source_nodes: array_like
+) -> Tuple[ndarray, ndarray]:
+    """
+    Compute shortest path to each node on a directed acyclic graph in CSR format.
+
+    The edges are relaxed in the same order as `dag_shortest_paths`,
+    but the edges leaving each node are relaxed together.
+
+    Parameters
+    ----------
+    csr_graph : CSRGraph
+        Graph in CSR format.
+    order : array_like
+        Topological ordering of the nodes.
+        For each edge u to v, u comes before v in the ordering.
+    source_nodes : array_like
+        Source nodes.
+        The shortest path can begin at any of these nodes.
+
+    Returns
+    -------
+    prev : ndarray
+        For each node u in the graph, prev[u] is the previous node
+        on the shortest path to u.
+        The value is -1 if there is no previous node.
+    dist : ndarray
+        For each node u in the graph, dist[u] is the total distance (weight)
+        of the shortest path to u.
+
+    Examples
+    --------
+    >>> graph = {0: {1: 10, 2: 20}, 1: {3: 5}, 2: {3: 8, 4: 15}, 3: {4: 6}, 4: {}}
+    >>> csr_graph = adj_list_to_csr(graph)
+
+    >>> prev, dist = dag_shortest_paths_csr(csr_graph, range(5), [0, 1])
+
+    >>> prev
+    array([-1, -1,  0,  1,  3])
+
+    >>> dist
+    array([ 0.,  0., 20.,  5., 11.])
+
+    """
+    indptr, indices, weights = csr_graph
+
+    dist = np.full(csr_graph.n_nodes, np.inf)
+    prev = np.full(csr_graph.n_nodes, -1)
+
+    dist[np.asarray(source_nodes, dtype=int)] = 0
+
+    for u in order:
+
+        neighbours = indices[indptr[u] : indptr[u + 1]]
+        dist_new = dist[u] + weights[indptr[u] : indptr[u + 1]]
+
+        # Relax the edges
+        is_shorter = dist_new < dist[neighbours]
+
+        dist[neighbours[is_shorter]] = dist_new[is_shorter]
+        prev[neighbours[is_shorter]] = u
+
+    return prev, dist
+
+
 def trace_path(prev: Mapping, target_node: Any) -> list:
     """
     Trace back a path through a graph.
@@ -183,6 +381,56 @@ def trace_path(prev: Mapping, target_node: Any) -> list:
     return path[::-1]
 
 
+def trace_paths(prev: ndarray, target_nodes: array_like) -> ndarray:
+    """
+    Trace back many paths through a graph at once.
+
+    Parameters
+    ----------
+    prev : ndarray
+        For each node u in the graph, prev[u] is the previous node
+        on the path to u.
+        The value is -1 if there is no previous node.
+    target_nodes : array_like
+        Last node of each path.
+
+    Returns
+    -------
+    paths : ndarray
+        One row for each target node.
+        Each row is a path from source to target node.
+        Paths shorter than the longest path are padded with -1 at the end.
+
+    Examples
+    --------
+    >>> prev = np.array([-1, -1, 0, 1, 3])
+
+    >>> trace_paths(prev, [4, 2, 0])
+    array([[ 1,  3,  4],
+           [ 0,  2, -1],
+           [ 0, -1, -1]])
+
+    """
+    nodes = np.asarray(target_nodes, dtype=int)
+
+    # Each column is one step back along the paths.
+    steps = [nodes]
+
+    while np.any(nodes != -1):
+
+        nodes = np.where(nodes != -1, prev[nodes], -1)
+        steps.append(nodes)
+
+    paths_backward = np.column_stack(steps[:-1]) if len(steps) > 1 else np.empty((len(nodes), 0), dtype=int)
+    path_lengths = np.sum(paths_backward != -1, axis=1)
+
+    # Reverse each path so it starts at the source node.
+    index = path_lengths.reshape(-1, 1) - 1 - np.arange(paths_backward.shape[1])
+    paths = np.take_along_axis(paths_backward, np.maximum(index, 0), axis=1)
+
+    return np.where(index >= 0, paths, -1)
+
+
 def labelled_nodes_to_graph(node_labels: Mapping[int, int], label_adj_list: adj_list) -> adj_list:
     """
     Create an adjacency list from a set of labelled nodes.
@@ -234,6 +482,116 @@ def labelled_nodes_to_graph(node_labels: Mapping[int, int], label_adj_list: adj_
     return graph
 
 
+def labelled_nodes_to_matrix(labels: array_like, label_matrix: ndarray) -> ndarray:
+    """
+    Create an adjacency matrix from a set of labelled nodes.
+
+    This is the array version of `labelled_nodes_to_graph`.
+    If nodes u and v have labels A and B, the weight from node u to node v
+    is the weight from label A to label B.
+
+    Parameters
+    ----------
+    labels : (N,) array_like
+        Integer label of each node.
+    label_matrix : (N_labels, N_labels) ndarray
+        Adjacency matrix for the labels.
+        Element (A, B) is the weight from label A to label B.
+        NaN means there is no edge.
+
+    Returns
+    -------
+    (N, N) ndarray
+        Adjacency matrix of the nodes.
+
+    Examples
+    --------
+    >>> label_matrix = adj_list_to_matrix({0: {1: 10}, 1: {0: -1, 2: 9}, 2: {}})
+
+    >>> labelled_nodes_to_matrix([0, 1, 1, 2], label_matrix)
+    array([[nan, 10., 10., nan],
+           [-1., nan, nan,  9.],
+           [-1., nan, nan,  9.],
+           [nan, nan, nan, nan]])
+
+    """
+    labels = np.asarray(labels, dtype=int)
+
+    # Element (u, v) is gathered from row labels[u] and column labels[v] in one pass.
+    return label_matrix[labels[:, np.newaxis], labels]
+
+
+def points_to_adj_matrix(
+    dist_matrix: ndarray, labels: array_like, label_adj_list: adj_list, weight_func: func_ab
+) -> ndarray:
+    """
+    Construct a weighted adjacency matrix from a set of labelled points in space.
+
+    Parameters
+    ----------
+    dist_matrix : ndarray
+        Distance matrix of the points.
+    labels : array_like
+        Label of each point.
+        The labels can be any hashable values (e.g., integers or strings).
+    label_adj_list : dict
+        Adjacency list for the labels.
+        label_adj_list[A][B] is the expected distance between
+        a point with label A and a point with label B.
+        There must be a key for each label of the points.
+    weight_func : function
+        Cost function that takes two arrays as input.
+
+    Returns
+    -------
+    ndarray
+        Adjacency matrix of the points.
+        NaN means there is no edge.
+
+    Raises
+    ------
+    KeyError
+        If a label of the points is not a key of the label adjacency list.
+
+    Examples
+    --------
+    >>> from scipy.spatial.distance import cdist
+
+    >>> points = np.array([[0, 3], [0, 10], [2, 3]])
+    >>> labels = [0, 1, 1]
+    >>> expected_dists = {0: {1: 5}, 1: {}}
+    >>> weight_func = lambda a, b: abs(a - b)
+
+    >>> dist_matrix = cdist(points, points)
+    >>> points_to_adj_matrix(dist_matrix, labels, expected_dists, weight_func)
+    array([[nan,  2.,  3.],
+           [nan, nan, nan],
+           [nan, nan, nan]])
+
+    >>> points_to_adj_matrix(dist_matrix, ['head', 'foot', 'foot'], {'head': {'foot': 5}, 'foot': {}}, weight_func)
+    array([[nan,  2.,  3.],
+           [nan, nan, nan],
+           [nan, nan, nan]])
+
+    """
+    # The labels are numbered by their order in the adjacency list.
+    label_nums = {label: i for i, label in enumerate(label_adj_list)}
+
+    label_matrix = adj_list_to_matrix(
+        {
+            label_nums[label_a]: {label_nums[label_b]: w for label_b, w in label_adj_list[label_a].items()}
+            for label_a in label_adj_list
+        }
+    )
+    label_nums_points = [label_nums[label] for label in np.asarray(labels).tolist()]
+
+    # Expected distances between points
+    dist_matrix_expected = labelled_nodes_to_matrix(label_nums_points, label_matrix)
+
+    # Adjacency matrix defined by a weight function
+    return weight_func(dist_matrix, dist_matrix_expected)
+
+
 def points_to_graph(dist_matrix: ndarray, labels: ndarray, label_adj_list: adj_list, weight_func: func_ab) -> adj_list:
     """
     Construct a weighted graph from a set of labelled points in space.
@@ -270,13 +628,81 @@ def points_to_graph(dist_matrix: ndarray, labels: ndarray, label_adj_list: adj_l
     {0: {1: 2.0, 2: 3.0}, 1: {}, 2: {}}
 
     """
-    label_dict = itf.iterable_to_dict(labels)
+    return adj_matrix_to_list(points_to_adj_matrix(dist_matrix, labels, label_adj_list, weight_func))
 
-    # Expected distances between points
-    adj_list_expected = labelled_nodes_to_graph(label_dict, label_adj_list)
-    dist_matrix_expected = adj_list_to_matrix(adj_list_expected)
 
-    # Adjacency matrix defined by a weight function
-    adj_matrix = weight_func(dist_matrix, dist_matrix_expected)
+def points_to_csr(dist_matrix: Any, labels: ndarray, label_adj_list: adj_list, weight_func: func_ab) -> CSRGraph:
+    """
+    Construct a weighted CSR graph from a set of points sorted by label.
+
+    The nodes with each label form a contiguous block, so only the blocks of
+    the distance matrix between connected labels are read.
+    The graph is the same as the CSR form of `points_to_adj_matrix`.
+
+    Parameters
+    ----------
+    dist_matrix : {(N, N) ndarray, BlockDistances}
+        Distance matrix of the points.
+        It must support indexing a block with two slices.
+    labels : (N,) ndarray
+        Array of labels for N positions.
+        The labels are sorted in ascending order.
+    label_adj_list : dict
+        Adjacency list for the labels.
+        label_adj_list[A][B] is the expected distance between
+        a point with label A and a point with label B.
+    weight_func : function
+        Cost function that takes two arrays as input.
+
+    Returns
+    -------
+    CSRGraph
+        Graph representation of the points.
+        The neighbours of each node are in ascending order.
+
+    Examples
+    --------
+    >>> from scipy.spatial.distance import cdist
+
+    >>> points = np.array([[0, 3], [0, 10], [2, 3]])
+    >>> labels = np.array([0, 1, 1])
+    >>> expected_dists = {0: {1: 5}, 1: {}}
+    >>> weight_func = lambda a, b: abs(a - b)
+
+    >>> csr_graph = points_to_csr(cdist(points, points), labels, expected_dists, weight_func)
+
+    >>> csr_to_adj_list(csr_graph)
+    {0: {1: 2.0, 2: 3.0}, 1: {}, 2: {}}
+
+    """
+    n_nodes = len(labels)
+    layers = label_layers(labels)
+
+    list_u, list_v, list_weights = [np.empty(0, dtype=int)], [np.empty(0, dtype=int)], [np.empty(0)]
+
+    for label_a, layer_a in layers.items():
+        for label_b, layer_b in layers.items():
+
+            if label_b not in label_adj_list.get(label_a, {}):
+                continue
+
+            weights = np.asarray(
+                weight_func(dist_matrix[layer_a, layer_b], label_adj_list[label_a][label_b]), dtype=float
+            )
+
+            # Edges with a NaN weight are not in the graph.
+            rows, cols = np.nonzero(~np.isnan(weights))
+
+            list_u.append(rows + layer_a.start)
+            list_v.append(cols + layer_b.start)
+            list_weights.append(weights[rows, cols])
+
+    nodes_u, nodes_v = np.concatenate(list_u), np.concatenate(list_v)
+
+    # Sort the edges by source node, then by target node, like the rows of the adjacency matrix.
+    order = np.lexsort((nodes_v, nodes_u))
+
+    indptr = np.zeros(n_nodes + 1, dtype=int)
+    indptr[1:] = np.cumsum(np.bincount(nodes_u, minlength=n_nodes))
 
-    return adj_matrix_to_list(adj_matrix)
+    return CSRGraph(indptr, nodes_v[order], np.concatenate(list_weights)[order])
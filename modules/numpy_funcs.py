@@ -1,6 +1,6 @@
 """Functions related to NumPy arrays or operations."""
 
-from typing import Iterator
+from typing import Iterator, Tuple
 
 import numpy as np
 from numpy import ndarray
@@ -135,3 +135,88 @@ def filter_labels(labels: array_like, min_elements: int) -> ndarray:
             labels_filtered[is_label] = -1
 
     return labels_filtered
+
+
+def group_medians(groups: array_like, values: array_like, n_groups: int) -> ndarray:
+    """
+    Return the median of the values in each group.
+
+    The values are sorted once by group and value, and the median of each group
+    is read from the middle of its segment. The medians are the same as `np.median`
+    of the values in each group, so the median of a group with a NaN value is NaN.
+
+    Parameters
+    ----------
+    groups : (N,) array_like
+        Group of each value, from 0 to n_groups - 1.
+    values : (N,) array_like
+        Input values.
+    n_groups : int
+        Number of groups.
+
+    Returns
+    -------
+    medians : (n_groups,) ndarray
+        Median of each group.
+        The median of an empty group is NaN.
+
+    Examples
+    --------
+    >>> group_medians([0, 1, 0, 1, 0, 1, 1], [5, 1, 3, 4, 4, 2, 3], 3)
+    array([4. , 2.5, nan])
+
+    >>> group_medians([0, 0, 1, 1], [1, np.nan, 2, 3], 2)
+    array([nan, 2.5])
+
+    """
+    groups = np.asarray(groups, dtype=int)
+    values = np.asarray(values, dtype=float)
+
+    values_sorted = values[np.lexsort((values, groups))]
+
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+
+    medians = np.full(n_groups, np.nan)
+    has_values = counts > 0
+
+    # The two middle values of each segment are the same value if the count is odd.
+    index_lower = (starts + (counts - 1) // 2)[has_values]
+    index_upper = (starts + counts // 2)[has_values]
+
+    medians[has_values] = (values_sorted[index_lower] + values_sorted[index_upper]) / 2
+
+    has_nan = np.bincount(groups, weights=np.isnan(values), minlength=n_groups) > 0
+    medians[has_nan] = np.nan
+
+    return medians
+
+
+def window_pairs(starts: ndarray, stops: ndarray) -> Tuple[ndarray, ndarray]:
+    """
+    Return all pairs (i, j) with j in the window [starts[i], stops[i]).
+
+    Parameters
+    ----------
+    starts, stops : (N,) ndarray
+        Start and stop of the window of each row i.
+
+    Returns
+    -------
+    rows, cols : ndarray
+        Indices i and j of the pairs.
+
+    Examples
+    --------
+    >>> window_pairs(np.array([0, 2, 1]), np.array([2, 2, 4]))
+    (array([0, 0, 2, 2, 2]), array([0, 1, 1, 2, 3]))
+
+    """
+    lengths = np.maximum(stops - starts, 0)
+
+    rows = np.repeat(np.arange(len(starts)), lengths)
+
+    # Position of each pair within its window.
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    return rows, np.repeat(starts, lengths) + offsets
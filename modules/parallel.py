@@ -0,0 +1,262 @@
+"""Functions for running independent tasks (e.g., walking trials) in parallel."""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy import ndarray
+
+# Shared memory was added in Python 3.8.
+HAS_SHARED_MEMORY = find_spec('multiprocessing.shared_memory') is not None
+
+
+class TaskResult(NamedTuple):
+    """Container for the result of a task and the worker that ran it."""
+
+    result: Any
+    pid: int
+    time_elapsed: float
+
+
+class SharedArray(NamedTuple):
+    """Handle of a NumPy array in a block of shared memory."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def run_task(func: Callable, args: Sequence) -> TaskResult:
+    """
+    Run a task and record the worker process and the run time.
+
+    Parameters
+    ----------
+    func : function
+        Function that performs the task.
+    args : Sequence
+        Positional arguments passed to the function.
+
+    Returns
+    -------
+    TaskResult
+        Output of the function, ID of the worker process, and run time (s).
+
+    Examples
+    --------
+    >>> task_result = run_task(max, (3, 5))
+
+    >>> task_result.result
+    5
+
+    >>> task_result.pid == os.getpid()
+    True
+
+    """
+    t = time.time()
+
+    result = func(*args)
+
+    return TaskResult(result, os.getpid(), time.time() - t)
+
+
+def map_tasks(func: Callable, list_args: Sequence[Sequence], jobs: int = 1) -> List[TaskResult]:
+    """
+    Run a function on each set of arguments, optionally with a pool of processes.
+
+    The results are returned in the same order as the arguments.
+
+    Parameters
+    ----------
+    func : function
+        Function that performs a task.
+        It must be defined at the top level of a module so it can be sent to a worker process.
+    list_args : Sequence
+        Each element is a sequence of positional arguments for one task.
+    jobs : int, optional
+        Number of worker processes (default 1).
+        With one job, the tasks are run sequentially in the current process.
+
+    Returns
+    -------
+    list
+        TaskResult of each task.
+
+    Examples
+    --------
+    >>> task_results = map_tasks(max, [(1, 2), (4, 3), (5, 6)])
+
+    >>> [x.result for x in task_results]
+    [2, 4, 6]
+
+    """
+    if jobs == 1:
+        return [run_task(func, args) for args in list_args]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_task, func, args) for args in list_args]
+
+        return [future.result() for future in futures]
+
+
+def run_task_shared(func: Callable, handles: Dict[str, SharedArray], args: Sequence) -> TaskResult:
+    """
+    Run a task on arrays in shared memory.
+
+    The arrays are attached without copying and passed to the function as a dict,
+    followed by the positional arguments.
+
+    Parameters
+    ----------
+    func : function
+        Function that performs the task.
+        It must not return views of the shared arrays.
+    handles : dict
+        SharedArray handle of each array.
+    args : Sequence
+        Positional arguments passed to the function after the arrays.
+
+    Returns
+    -------
+    TaskResult
+        Output of the function, ID of the worker process, and run time (s).
+
+    """
+    from multiprocessing import shared_memory
+
+    blocks = {key: shared_memory.SharedMemory(name=handle.name) for key, handle in handles.items()}
+
+    try:
+        arrays: Dict[str, ndarray] = {
+            key: np.ndarray(handle.shape, dtype=handle.dtype, buffer=blocks[key].buf) for key, handle in handles.items()
+        }
+
+        task_result = run_task(func, (arrays, *args))
+
+        # The arrays must be released before the shared memory is closed.
+        del arrays
+
+        return task_result
+
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+def map_tasks_shared(
+    func: Callable, arrays: Dict[str, ndarray], list_args: Sequence[Sequence], jobs: int = 1
+) -> List[TaskResult]:
+    """
+    Run a function on each set of arguments, with arrays shared by all of the tasks.
+
+    With a pool of processes, the arrays are copied once into shared memory,
+    so they are not pickled for each task. Each task only sends its own arguments
+    (e.g., the start and stop of a slice of the arrays).
+    The results are returned in the same order as the arguments.
+
+    Parameters
+    ----------
+    func : function
+        Function that performs a task.
+        It is called as func(arrays, *args), where arrays is a dict of the shared arrays.
+        It must be defined at the top level of a module so it can be sent to a worker process.
+        It must not modify the arrays or return views of them.
+    arrays : dict
+        Numeric arrays shared by all of the tasks.
+    list_args : Sequence
+        Each element is a sequence of positional arguments for one task.
+    jobs : int, optional
+        Number of worker processes (default 1).
+        With one job, the tasks are run sequentially in the current process.
+
+    Returns
+    -------
+    list
+        TaskResult of each task.
+
+    Examples
+    --------
+    >>> def sum_slice(arrays, index_start, index_stop):
+    ...     return arrays['values'][index_start:index_stop].sum()
+
+    >>> task_results = map_tasks_shared(sum_slice, {'values': np.arange(10)}, [(0, 5), (5, 10)])
+
+    >>> [x.result for x in task_results]
+    [10, 35]
+
+    """
+    if jobs == 1 or not HAS_SHARED_MEMORY:
+        return map_tasks(func, [(arrays, *args) for args in list_args], jobs=jobs)
+
+    from multiprocessing import shared_memory
+
+    blocks = []
+
+    try:
+        handles = {}
+
+        for key, array in arrays.items():
+
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            handles[key] = SharedArray(block.name, array.shape, array.dtype.str)
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(run_task_shared, func, handles, args) for args in list_args]
+
+            return [future.result() for future in futures]
+
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def summarize_workers(task_results: Sequence[TaskResult], sizes: Sequence[int]) -> pd.DataFrame:
+    """
+    Summarize the throughput of each worker process.
+
+    Parameters
+    ----------
+    task_results : Sequence
+        TaskResult of each task.
+    sizes : Sequence
+        Number of items (e.g., frames) processed by each task.
+
+    Returns
+    -------
+    DataFrame
+        One row for each worker process.
+        Columns are 'n_tasks', 'n_items', 'time', 'items_per_second'.
+
+    Examples
+    --------
+    >>> task_results = [TaskResult(None, 10, 2.0), TaskResult(None, 11, 1.0), TaskResult(None, 10, 3.0)]
+
+    >>> df_workers = summarize_workers(task_results, [100, 60, 150])
+
+    >>> df_workers.index.tolist()
+    [10, 11]
+
+    >>> df_workers.items_per_second.tolist()
+    [50.0, 60.0]
+
+    """
+    df_tasks = pd.DataFrame(
+        {
+            'pid': [x.pid for x in task_results],
+            'n_tasks': 1,
+            'n_items': sizes,
+            'time': [x.time_elapsed for x in task_results],
+        }
+    )
+
+    df_workers = df_tasks.groupby('pid').sum()
+
+    return df_workers.assign(items_per_second=df_workers.n_items / df_workers.time)
@@ -1,6 +1,6 @@
 """Module for detecting the phases of a foot during a walking pass."""
 
-from typing import Iterator, NamedTuple, Tuple
+from typing import Dict, Iterable, Iterator, NamedTuple, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -9,7 +9,9 @@ from numpy import ndarray
 from skspatial.transformation import transform_coordinates
 
 import modules.cluster as cl
+import modules.numpy_funcs as nf
 import modules.side_assignment as sa
+from modules.walking_pass import GroupedPoints, as_grouped_points
 
 
 class Stance(NamedTuple):
@@ -20,10 +22,40 @@ class Stance(NamedTuple):
     position: ndarray
 
 
-def stance_props(points_foot: xr.DataArray, labels_stance: ndarray) -> pd.DataFrame:
+class StanceTable(NamedTuple):
+    """
+    Columnar table of stance phases.
+
+    Element i of each array belongs to stance phase i.
+    The stance phases are sorted by initial frame.
+
+    """
+
+    num_stride: ndarray
+    frame_i: ndarray
+    frame_f: ndarray
+    position: ndarray
+    side: ndarray
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Return the table as a DataFrame where each row is a stance phase (see `get_stance_dataframe`)."""
+
+        return pd.DataFrame(
+            {
+                'num_stride': self.num_stride,
+                'frame_i': self.frame_i,
+                'frame_f': self.frame_f,
+                'position': list(self.position),
+                'side': self.side.astype(object),
+            }
+        )
+
+
+def stance_props(points_foot: Union[GroupedPoints, xr.DataArray], labels_stance: ndarray) -> pd.DataFrame:
     """Return properties of each stance phase from one foot in a walking pass."""
 
-    frames = points_foot.coords['frames'].values
+    points_foot = as_grouped_points(points_foot)
+    frames = points_foot.frames
 
     labels_unique = np.unique(labels_stance[labels_stance != -1])
 
@@ -33,7 +65,7 @@ def stance_props(points_foot: xr.DataArray, labels_stance: ndarray) -> pd.DataFr
 
             is_cluster = labels_stance == label
 
-            points_foot_cluster = points_foot[is_cluster]
+            points_foot_cluster = points_foot.points[is_cluster]
             point_foot_med = np.median(points_foot_cluster, axis=0)
 
             frames_cluster = frames[is_cluster]
@@ -45,29 +77,178 @@ def stance_props(points_foot: xr.DataArray, labels_stance: ndarray) -> pd.DataFr
     return pd.DataFrame(yield_props())
 
 
-def label_stances(points_foot_grouped: xr.DataArray, basis: sa.Basis) -> Tuple[ndarray, ndarray]:
-    """Label all stance phases in a walking pass."""
+def stance_signals(
+    points_foot_grouped: Union[GroupedPoints, xr.DataArray], basis: sa.Basis
+) -> Tuple[ndarray, ndarray, ndarray]:
+    """Return the frames, forward signal and side values of the grouped foot points."""
 
-    frames_grouped = points_foot_grouped.coords['frames'].values
+    points_foot_grouped = as_grouped_points(points_foot_grouped)
 
-    array_points = points_foot_grouped.values
+    frames_grouped = points_foot_grouped.frames
+    array_points = points_foot_grouped.points
     signal_grouped = transform_coordinates(array_points, basis.origin, [basis.forward])
     values_side_grouped = transform_coordinates(array_points, basis.origin, [basis.perp])
 
-    labels_grouped = cl.dbscan_st(signal_grouped, times=frames_grouped, eps_spatial=5, eps_temporal=10, min_pts=7)
+    return frames_grouped, signal_grouped, values_side_grouped
+
+
+def label_stances(
+    points_foot_grouped: Union[GroupedPoints, xr.DataArray],
+    basis: sa.Basis,
+    *,
+    eps_spatial: float = 5,
+    eps_temporal: float = 10,
+    min_pts: int = 7,
+) -> Tuple[ndarray, ndarray]:
+    """Label all stance phases in a walking pass."""
+
+    frames_grouped, signal_grouped, values_side_grouped = stance_signals(points_foot_grouped, basis)
+
+    if signal_grouped.ndim == 1 or signal_grouped.shape[1] == 1:
+        # The specialised algorithm gives the same labels for a one-dimensional signal.
+        labels_grouped = cl.dbscan_st_1d(
+            signal_grouped.ravel(), frames_grouped, eps_spatial=eps_spatial, eps_temporal=eps_temporal, min_pts=min_pts
+        )
+    else:
+        labels_grouped = cl.dbscan_st(
+            signal_grouped, times=frames_grouped, eps_spatial=eps_spatial, eps_temporal=eps_temporal, min_pts=min_pts
+        )
+
     labels_grouped_l, labels_grouped_r = sa.assign_sides_grouped(frames_grouped, values_side_grouped, labels_grouped)
 
     return labels_grouped_l, labels_grouped_r
 
 
+def label_stances_grid(
+    points_foot_grouped: Union[GroupedPoints, xr.DataArray],
+    basis: sa.Basis,
+    settings: Iterable[Tuple[float, float, int]],
+) -> Dict[Tuple[float, float, int], Tuple[ndarray, ndarray]]:
+    """
+    Label all stance phases in a walking pass for a grid of DBSCAN hyperparameters.
+
+    The labels of each setting are the same as `label_stances`,
+    but the neighbours of the points are only found once (see `cluster.dbscan_st_grid`).
+
+    Parameters
+    ----------
+    points_foot_grouped : GroupedPoints or xarray.DataArray
+        Foot points of the walking pass, grouped by frame.
+    basis : Basis
+        Basis of the walking pass.
+    settings : iterable
+        Settings (eps_spatial, eps_temporal, min_pts) of the hyperparameters.
+
+    Returns
+    -------
+    dict
+        Left and right stance labels for each setting.
+
+    """
+    frames_grouped, signal_grouped, values_side_grouped = stance_signals(points_foot_grouped, basis)
+
+    dict_labels = cl.dbscan_st_grid(signal_grouped.reshape(len(frames_grouped), -1), frames_grouped, settings)
+
+    return {
+        setting: sa.assign_sides_grouped(frames_grouped, values_side_grouped, labels_grouped)
+        for setting, labels_grouped in dict_labels.items()
+    }
+
+
+def stance_table(
+    points_foot_grouped: Union[GroupedPoints, xr.DataArray], labels_grouped_l: ndarray, labels_grouped_r: ndarray
+) -> StanceTable:
+    """
+    Return a columnar table of the stance phases of both feet.
+
+    The properties of all clusters are found at once with segmented reductions over the points
+    sorted by label. They are the same as `stance_props`.
+
+    Parameters
+    ----------
+    points_foot_grouped : GroupedPoints or xarray.DataArray
+        (N_grouped, N_dims) array of foot points, with a coordinate of frames.
+    labels_grouped_l, labels_grouped_r : (N_grouped,) ndarray
+        Arrays of stance labels for the left and right sides.
+        Non-stance elements are marked with -1.
+
+    Returns
+    -------
+    StanceTable
+        Columnar table of the stance phases.
+        The stride number of a stance phase is its position among the stance phases of its side,
+        in order of label.
+
+    Examples
+    --------
+    >>> array_points = [[0, 0], [1, 1], [5, 0], [6, 0], [9, 1], [10, 1]]
+    >>> points = GroupedPoints([0, 1, 2, 3, 4, 5], array_points)
+
+    >>> table = stance_table(points, np.array([0, 0, -1, -1, 1, 1]), np.array([-1, -1, 0, 0, -1, -1]))
+
+    >>> table.frame_i
+    array([0, 2, 4])
+    >>> table.position
+    array([[0.5, 0.5],
+           [5.5, 0. ],
+           [9.5, 1. ]])
+
+    >>> table.to_dataframe()
+       num_stride  frame_i  frame_f    position side
+    0           0        0        1  [0.5, 0.5]    L
+    1           0        2        3  [5.5, 0.0]    R
+    2           1        4        5  [9.5, 1.0]    L
+
+    """
+    points_foot_grouped = as_grouped_points(points_foot_grouped)
+
+    frames = points_foot_grouped.frames
+    array_points = points_foot_grouped.points
+
+    list_sides, list_nums, list_frames_i, list_frames_f, list_positions = [], [], [], [], []
+
+    for side, labels_grouped in (('L', labels_grouped_l), ('R', labels_grouped_r)):
+
+        is_stance = labels_grouped != -1
+
+        labels_unique, clusters = np.unique(labels_grouped[is_stance], return_inverse=True)
+        n_clusters = len(labels_unique)
+
+        # The frames of each cluster form a contiguous segment.
+        order = np.argsort(clusters, kind='stable')
+        frames_sorted = frames[is_stance][order]
+        index_starts = np.searchsorted(clusters[order], np.arange(n_clusters))
+
+        list_frames_i.append(np.minimum.reduceat(frames_sorted, index_starts))
+        list_frames_f.append(np.maximum.reduceat(frames_sorted, index_starts))
+
+        points_stance = array_points[is_stance]
+        list_positions.append(
+            np.column_stack(
+                [nf.group_medians(clusters, points_stance[:, i], n_clusters) for i in range(array_points.shape[1])]
+            )
+        )
+
+        list_nums.append(np.arange(n_clusters))
+        list_sides.append(np.full(n_clusters, side))
+
+    frames_i = np.concatenate(list_frames_i)
+
+    # The stance phases are sorted as in `DataFrame.sort_values`.
+    order = np.argsort(frames_i, kind='quicksort')
+
+    return StanceTable(
+        num_stride=np.concatenate(list_nums)[order],
+        frame_i=frames_i[order],
+        frame_f=np.concatenate(list_frames_f)[order],
+        position=np.concatenate(list_positions)[order],
+        side=np.concatenate(list_sides)[order],
+    )
+
+
 def get_stance_dataframe(
-    points_foot_grouped: xr.DataArray, labels_grouped_l: ndarray, labels_grouped_r: ndarray
+    points_foot_grouped: Union[GroupedPoints, xr.DataArray], labels_grouped_l: ndarray, labels_grouped_r: ndarray
 ) -> pd.DataFrame:
     """Return DataFrame where each row is a stance phase."""
 
-    df_stance_l = stance_props(points_foot_grouped, labels_grouped_l).assign(side='L')
-    df_stance_r = stance_props(points_foot_grouped, labels_grouped_r).assign(side='R')
-
-    return (
-        pd.concat((df_stance_l, df_stance_r), sort=False).rename_axis('num_stride').sort_values('frame_i').reset_index()
-    )
+    return stance_table(points_foot_grouped, labels_grouped_l, labels_grouped_r).to_dataframe()
@@ -3,11 +3,11 @@
 from typing import Tuple
 
 import numpy as np
-from dpcontracts import require
 from numpy import ndarray
 from numpy.linalg import norm
 from scipy.spatial.distance import cdist
 
+from modules.contracts import require
 from modules.typing import array_like
 
 
@@ -76,6 +76,46 @@ def closest_point(points: array_like, target: array_like) -> Tuple[ndarray, int]
     return point_closest, index_closest
 
 
+def batch_cdist(points_a: ndarray, points_b: ndarray) -> ndarray:
+    """
+    Calculate the Euclidean distances between two sets of points on many frames.
+
+    The distances are summed in the same order as `scipy.spatial.distance.cdist`,
+    so the results are identical.
+
+    Parameters
+    ----------
+    points_a : (F, N_a, D) ndarray
+        Set A of points on each of F frames.
+    points_b : (F, N_b, D) ndarray
+        Set B of points on each of F frames.
+
+    Returns
+    -------
+    (F, N_a, N_b) ndarray
+        Element (f, i, j) is the distance between point i of set A
+        and point j of set B on frame f.
+
+    Examples
+    --------
+    >>> points_a = np.array([[[0, 0], [1, 1]]])
+    >>> points_b = np.array([[[0, 3], [4, 0], [1, 1]]])
+
+    >>> batch_cdist(points_a, points_b)
+    array([[[3.        , 4.        , 1.41421356],
+            [2.23606798, 3.16227766, 0.        ]]])
+
+    """
+    differences = points_a[:, :, np.newaxis, :] - points_b[:, np.newaxis, :, :]
+
+    sum_squares = np.zeros(differences.shape[:-1])
+
+    for k in range(differences.shape[-1]):
+        sum_squares += differences[..., k] ** 2
+
+    return np.sqrt(sum_squares)
+
+
 @require("The args must have the same length.", lambda args: len(set(map(len, args))) == 1)
 def closest_proposals(proposals: array_like, targets: array_like) -> ndarray:
     """
@@ -5,7 +5,8 @@ The pose is estimated by selecting body parts from a set of hypotheses.
 
 """
 import itertools
-from typing import Mapping, Sequence, Tuple, cast
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -14,7 +15,11 @@ from scipy.spatial.distance import cdist
 
 import modules.graphs as gr
 import modules.math_funcs as mf
+import modules.point_processing as pp
+from modules.block_distances import BlockDistances, label_layers
 from modules.constants import PART_CONNECTIONS, PART_TYPES, TYPE_CONNECTIONS
+from modules.distance_cache import DistanceCache
+from modules.running_median import RunningMedian
 from modules.typing import adj_list, array_like, func_ab
 
 
@@ -29,7 +34,15 @@ def score_func(a: float, b: float) -> float:
     return -((x - 1) ** 2) + 1
 
 
-def measure_min_path(population: ndarray, labels: ndarray, label_adj_list: adj_list) -> ndarray:
+def measure_min_path(
+    population: ndarray,
+    labels: ndarray,
+    label_adj_list: adj_list,
+    *,
+    engine: str = 'dict',
+    cache: Optional[DistanceCache] = None,
+    key: Hashable = None,
+) -> ndarray:
     """
     Measure lengths along the minimum shortest path.
 
@@ -45,6 +58,15 @@ def measure_min_path(population: ndarray, labels: ndarray, label_adj_list: adj_l
         Adjacency list for the labels.
         label_adj_list[A][B] is the expected distance between
         a point with label A and a point with label B.
+    engine : {'dict', 'layered', 'csr'}, optional
+        Shortest path engine (default 'dict').
+        See `shortest_paths_engine`.
+    cache : DistanceCache, optional
+        Cache of distances.
+        If given, the distances of the population are read from the cache.
+        The cache must have the label pairs of the adjacency list.
+    key : hashable, optional
+        Key of the population in the cache (e.g., the frame number).
 
     Returns
     -------
@@ -52,8 +74,12 @@ def measure_min_path(population: ndarray, labels: ndarray, label_adj_list: adj_l
         Lengths on the minimum shortest path.
 
     """
-    dist_matrix = cdist(population, population)
-    prev, dist = pop_shortest_paths(dist_matrix, labels, label_adj_list, cost_func)
+    if cache is None:
+        label_pairs = [(label_a, label_b) for label_a in label_adj_list for label_b in label_adj_list[label_a]]
+        dist_matrix = BlockDistances(population, labels, label_pairs)
+    else:
+        dist_matrix = cache.get(key, population, labels)
+    prev, dist = shortest_paths_engine(engine)(dist_matrix, labels, label_adj_list, cost_func)
 
     # Get shortest path to each foot
     paths, path_dist = paths_to_foot(prev, dist, labels)
@@ -64,7 +90,9 @@ def measure_min_path(population: ndarray, labels: ndarray, label_adj_list: adj_l
     return lengths_measured
 
 
-def estimate_lengths(df_hypo_trial: pd.DataFrame, **kwargs) -> ndarray:
+def estimate_lengths(
+    df_hypo_trial: pd.DataFrame, *, engine: str = 'dict', cache_bytes: int = 2 ** 28, **kwargs
+) -> ndarray:
     """
     Estimate the lengths between adjacent body parts in a walking trial.
 
@@ -73,6 +101,11 @@ def estimate_lengths(df_hypo_trial: pd.DataFrame, **kwargs) -> ndarray:
     df_hypo_trial : DataFrame
         Dataframe of position hypotheses for a walking trial.
         Columns include 'population' and 'labels'.
+    engine : {'dict', 'layered', 'csr'}, optional
+        Shortest path engine passed to `measure_min_path` (default 'dict').
+    cache_bytes : int, optional
+        Memory budget in bytes for caching the distances of the frames (default 256 MiB).
+        The populations do not change between iterations, so only the shortest paths are recomputed.
     kwargs : dict, optional
         Keyword arguments passed to `np.allclose`.
 
@@ -83,14 +116,13 @@ def estimate_lengths(df_hypo_trial: pd.DataFrame, **kwargs) -> ndarray:
         These are the expected lengths for the walking trial.
 
     """
-    n_frames = df_hypo_trial.shape[0]
     n_lengths = len(PART_TYPES) - 1
 
-    matrix_lengths_measured = np.full((n_frames, n_lengths), np.nan)
-
     lengths_estimated = np.zeros(n_lengths)
     lengths_prev = np.full(n_lengths, np.inf)
 
+    cache = DistanceCache(cache_bytes, TYPE_CONNECTIONS)
+
     # Use a for loop so algorithm will terminate if convergence does not occur.
     for _ in range(10):
 
@@ -99,16 +131,19 @@ def estimate_lengths(df_hypo_trial: pd.DataFrame, **kwargs) -> ndarray:
         medians_prev = np.full(n_lengths, np.inf)  # Initiate medians.
         lengths_prev = np.copy(lengths_estimated)  # Record previous lengths.
 
+        # Median of the lengths measured so far, updated on each frame.
+        running_median = RunningMedian(n_lengths)
+
         for i, tuple_frame in enumerate(df_hypo_trial.itertuples()):
 
             population, labels = tuple_frame.population, tuple_frame.labels
 
-            lengths_measured = measure_min_path(population, labels, label_adj_list_types)
-
-            matrix_lengths_measured[i] = lengths_measured
-            matrix_lengths_so_far = matrix_lengths_measured[: i + 1]
+            lengths_measured = measure_min_path(
+                population, labels, label_adj_list_types, engine=engine, cache=cache, key=i
+            )
 
-            medians = np.median(matrix_lengths_so_far, axis=0)
+            running_median.update(lengths_measured)
+            medians = running_median.median()
 
             if np.allclose(medians, medians_prev, **kwargs):
                 lengths_estimated = np.copy(medians)
@@ -221,15 +256,16 @@ def lengths_to_adj_list(label_connections: ndarray, lengths: array_like) -> adj_
 
 
 def pop_shortest_paths(
-    dist_matrix: ndarray, labels: ndarray, label_adj_list: adj_list, weight_func: func_ab
+    dist_matrix: Union[ndarray, BlockDistances], labels: ndarray, label_adj_list: adj_list, weight_func: func_ab
 ) -> Tuple[Mapping[int, int], Mapping[int, float]]:
     """
     Calculate shortest paths on the population of body parts.
 
     Parameters
     ----------
-    dist_matrix : (N, N) ndarray
+    dist_matrix : {(N, N) ndarray, BlockDistances}
         Distance matrix of the points.
+        Only the blocks between connected labels are read from a BlockDistances.
     labels : (N,) ndarray
         Array of labels for N positions.
         The labels correspond to body part types (e.g., foot).
@@ -251,7 +287,11 @@ def pop_shortest_paths(
 
     """
     # Represent population as a weighted directed acyclic graph
-    pop_graph = gr.points_to_graph(dist_matrix, labels, label_adj_list, weight_func)
+    if isinstance(dist_matrix, BlockDistances):
+        # Read the blocks between connected labels, without filling the full distance matrix.
+        pop_graph = gr.csr_to_adj_list(gr.points_to_csr(dist_matrix, labels, label_adj_list, weight_func))
+    else:
+        pop_graph = gr.points_to_graph(dist_matrix, labels, label_adj_list, weight_func)
 
     # Run shortest path algorithm
     head_nodes = np.where(labels == 0)[0]  # Source nodes
@@ -262,16 +302,197 @@ def pop_shortest_paths(
     return prev, dist
 
 
-def paths_to_foot(prev: Mapping[int, int], dist: Mapping[int, float], labels: ndarray) -> Tuple[ndarray, ndarray]:
+def pop_shortest_paths_layered(
+    dist_matrix: Union[ndarray, BlockDistances], labels: ndarray, label_adj_list: adj_list, weight_func: func_ab
+) -> Tuple[ndarray, ndarray]:
+    """
+    Calculate shortest paths on the population of body parts, one label layer at a time.
+
+    The nodes with each label are stored as a contiguous block, so the edges
+    between two labels form a dense block of the distance matrix.
+    The distances to a layer are computed from the previous layers with a
+    vectorized min-plus reduction over these blocks.
+
+    The result is the same as `pop_shortest_paths`, including ties, which go
+    to the previous node with the lowest index.
+
+    Parameters
+    ----------
+    dist_matrix : {(N, N) ndarray, BlockDistances}
+        Distance matrix of the points.
+        Only the blocks between connected labels are used.
+    labels : (N,) ndarray
+        Array of labels for N positions.
+        The labels are sorted in ascending order.
+    label_adj_list : dict
+        Adjacency list for the labels.
+        label_adj_list[A][B] is the expected distance between
+        a point with label A and a point with label B.
+        Each label B must be greater than label A.
+    weight_func : function
+        Function used to weight edges of the graph.
+
+    Returns
+    -------
+    prev : (N,) ndarray
+        For each node u in the graph, prev[u] is the previous node
+        on the shortest path to u.
+        The value is -1 if there is no previous node.
+    dist : (N,) ndarray
+        For each node u in the graph, dist[u] is the total distance (weight)
+        of the shortest path to u.
+
+    Examples
+    --------
+    >>> from scipy.spatial.distance import cdist
+
+    >>> points = np.array([[0, 0], [0, 10], [0, 12], [0, 20]])
+    >>> labels = np.array([0, 1, 1, 2])
+    >>> label_adj_list = {0: {1: 10}, 1: {2: 10}, 2: {}}
+
+    >>> prev, dist = pop_shortest_paths_layered(cdist(points, points), labels, label_adj_list, cost_func)
+
+    >>> prev
+    array([-1,  0,  0,  1])
+
+    >>> dist
+    array([0., 0., 4., 0.])
+
+    """
+    n_nodes = len(labels)
+    layers = label_layers(labels)
+
+    prev = np.full(n_nodes, -1)
+    dist = np.full(n_nodes, np.inf)
+
+    # The head nodes are the source nodes.
+    dist[labels == 0] = 0
+
+    nodes = np.arange(n_nodes)
+
+    for label_b, layer_b in layers.items():
+
+        labels_a = [label_a for label_a in layers if label_b in label_adj_list.get(label_a, {})]
+
+        if not labels_a:
+            continue
+
+        # Stack the blocks of all labels connected to B.
+        # The rows remain in ascending order of node.
+        nodes_a = np.concatenate([nodes[layers[label_a]] for label_a in labels_a])
+        weights = np.vstack(
+            [
+                weight_func(dist_matrix[layers[label_a], layer_b], label_adj_list[label_a][label_b])
+                for label_a in labels_a
+            ]
+        )
+
+        # Edges with a NaN weight are not in the graph.
+        dist_candidates = dist[nodes_a].reshape(-1, 1) + np.where(np.isnan(weights), np.inf, weights)
+
+        index_min = np.argmin(dist_candidates, axis=0)
+        dist_min = dist_candidates[index_min, np.arange(dist_candidates.shape[1])]
+
+        is_shorter = dist_min < dist[layer_b]
+
+        dist[layer_b] = np.where(is_shorter, dist_min, dist[layer_b])
+        prev[layer_b] = np.where(is_shorter, nodes_a[index_min], prev[layer_b])
+
+    return prev, dist
+
+
+def pop_shortest_paths_csr(
+    dist_matrix: Union[ndarray, BlockDistances], labels: ndarray, label_adj_list: adj_list, weight_func: func_ab
+) -> Tuple[ndarray, ndarray]:
+    """
+    Calculate shortest paths on the population of body parts using a CSR graph.
+
+    The results are the same as `pop_shortest_paths`,
+    but the previous nodes and distances are arrays.
+
+    Parameters
+    ----------
+    dist_matrix : {(N, N) ndarray, BlockDistances}
+        Distance matrix of the points.
+        Only the blocks between connected labels are read from a BlockDistances.
+    labels : (N,) ndarray
+        Array of labels for N positions.
+        The labels correspond to body part types (e.g., foot).
+    label_adj_list : dict
+        Adjacency list for the labels.
+        label_adj_list[A][B] is the expected distance between
+        a point with label A and a point with label B.
+    weight_func : function
+        Function used to weight edges of the graph.
+
+    Returns
+    -------
+    prev : (N,) ndarray
+        For each node u, prev[u] is the previous node on the shortest path to u.
+        The value is -1 if there is no previous node.
+    dist : (N,) ndarray
+        For each node u, dist[u] is the total distance (weight)
+        of the shortest path to u.
+
+    """
+    # Represent population as a weighted directed acyclic graph
+    if isinstance(dist_matrix, BlockDistances):
+        # Read the blocks between connected labels, without filling the full distance matrix.
+        pop_graph = gr.points_to_csr(dist_matrix, labels, label_adj_list, weight_func)
+    else:
+        pop_graph = gr.adj_matrix_to_csr(gr.points_to_adj_matrix(dist_matrix, labels, label_adj_list, weight_func))
+
+    # The nodes are in a topological ordering, and the head nodes are the sources.
+    head_nodes = np.where(labels == 0)[0]
+
+    return gr.dag_shortest_paths_csr(pop_graph, range(pop_graph.n_nodes), head_nodes)
+
+
+def shortest_paths_engine(engine: str) -> Callable[..., Tuple[Any, Any]]:
+    """
+    Return the function that calculates shortest paths on the population.
+
+    Parameters
+    ----------
+    engine : {'dict', 'layered', 'csr'}
+        Name of the shortest path engine.
+
+    Returns
+    -------
+    function
+        `pop_shortest_paths`, `pop_shortest_paths_layered` or `pop_shortest_paths_csr`.
+
+    Raises
+    ------
+    ValueError
+        If the engine name is not recognized.
+
+    """
+    if engine == 'dict':
+        return pop_shortest_paths
+
+    if engine == 'layered':
+        return pop_shortest_paths_layered
+
+    if engine == 'csr':
+        return pop_shortest_paths_csr
+
+    raise ValueError("The engine must be 'dict', 'layered' or 'csr'.")
+
+
+def paths_to_foot(
+    prev: Union[Mapping[int, int], ndarray], dist: Union[Mapping[int, float], ndarray], labels: ndarray
+) -> Tuple[ndarray, ndarray]:
     """
     Retrieve the shortest path to each foot position.
 
     Parameters
     ----------
-    prev : dict
+    prev : {dict, ndarray}
         For each node u in the graph, prev[u] is the previous node
         on the shortest path to u.
-    dist : dict
+        If an array is given, each path must pass through every label.
+    dist : {dict, ndarray}
         For each node u in the graph, dist[u] is the total distance (weight)
         of the shortest path to u.
     labels : ndarray
@@ -301,12 +522,30 @@ def paths_to_foot(prev: Mapping[int, int], dist: Mapping[int, float], labels: nd
     >>> path_dist
     array([11., 10.])
 
+    The previous nodes and distances can also be arrays.
+
+    >>> prev = np.array([-1, 0, 1, 2, 3, 3])
+    >>> dist = np.array([0, 0, 20, 5, 11, 10])
+
+    >>> paths, path_dist = paths_to_foot(prev, dist, labels)
+
+    >>> paths
+    array([[0, 1, 2, 3, 4],
+           [0, 1, 2, 3, 5]])
+
+    >>> path_dist
+    array([11, 10])
+
     """
     max_label = max(labels)
 
     foot_index = np.where(labels == max_label)[0]
     n_feet = len(foot_index)
 
+    if isinstance(prev, ndarray):
+        # Trace all of the paths back from the feet at once.
+        return gr.trace_paths(prev, foot_index), np.asarray(dist)[foot_index]
+
     paths = np.full((n_feet, max_label + 1), np.nan)
     path_dist = np.full(n_feet, np.nan)
 
@@ -318,7 +557,9 @@ def paths_to_foot(prev: Mapping[int, int], dist: Mapping[int, float], labels: nd
     return paths.astype(int), path_dist
 
 
-def get_scores(dist_matrix: ndarray, paths: ndarray, label_adj_list: adj_list, score_func: func_ab) -> ndarray:
+def get_scores(
+    dist_matrix: Union[ndarray, BlockDistances], paths: ndarray, label_adj_list: adj_list, score_func: func_ab
+) -> ndarray:
     """
     Compute a score matrix from a set of body part positions.
 
@@ -327,8 +568,9 @@ def get_scores(dist_matrix: ndarray, paths: ndarray, label_adj_list: adj_list, s
 
     Parameters
     ----------
-    dist_matrix : (N, N) ndarray
+    dist_matrix : {(N, N) ndarray, BlockDistances}
         Distance matrix for the N position hypotheses.
+        Only the distances between connected labels are used.
     paths : (N_paths, N_types) ndarray
         Each row lists the nodes on a shortest path through the body part
         types, i.e., from head to foot.
@@ -345,23 +587,98 @@ def get_scores(dist_matrix: ndarray, paths: ndarray, label_adj_list: adj_list, s
     score_matrix : (N, N) ndarray
        Array of scores.
 
+    """
+    connections = link_connections(label_adj_list, paths.shape[1])
+
+    return score_paths(dist_matrix, paths, connections, np.vectorize(score_func, otypes=[float]))
+
+
+def link_connections(label_adj_list: adj_list, n_path_nodes: int) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    Return the connections between nodes on the same shortest path.
+
+    Parameters
+    ----------
+    label_adj_list : dict
+        Adjacency list for the labels.
+        label_adj_list[A][B] is the expected distance between
+        a point with label A and a point with label B.
+    n_path_nodes : int
+        Number of nodes on each path.
+
+    Returns
+    -------
+    index_j, index_k : ndarray
+        Positions j and k of the connected nodes along the path.
+    lengths_expected : ndarray
+        Expected distance of each connection.
+
+    Examples
+    --------
+    >>> label_adj_list = {0: {1: 60}, 1: {2: 20, 3: 35}, 2: {}}
+
+    >>> link_connections(label_adj_list, 3)
+    (array([0, 1]), array([1, 2]), array([60., 20.]))
+
+    """
+    connections = [
+        (j, k, label_adj_list[j][k]) for j in range(n_path_nodes) for k in label_adj_list[j] if j <= k < n_path_nodes
+    ]
+
+    index_j = np.array([j for j, _, _ in connections], dtype=int)
+    index_k = np.array([k for _, k, _ in connections], dtype=int)
+    lengths_expected = np.array([length for _, _, length in connections], dtype=float)
+
+    return index_j, index_k, lengths_expected
+
+
+def score_paths(
+    dist_matrix: Union[ndarray, BlockDistances],
+    paths: ndarray,
+    connections: Tuple[ndarray, ndarray, ndarray],
+    score_func: Callable[[ndarray, ndarray], ndarray],
+) -> ndarray:
+    """
+    Compute a score matrix from precomputed connections along the paths.
+
+    Parameters
+    ----------
+    dist_matrix : {(N, N) ndarray, BlockDistances}
+        Distance matrix for the N position hypotheses.
+        Only the distances between connected labels are used.
+    paths : (N_paths, N_types) ndarray
+        Each row lists the nodes on a shortest path through the body part
+        types, i.e., from head to foot.
+    connections : tuple
+        Connections (index_j, index_k, lengths_expected) from `link_connections`.
+    score_func : function
+        Function of form f(a, b) -> c that accepts arrays.
+        Outputs scores given measured distances and expected distances.
+
+    Returns
+    -------
+    score_matrix : (N, N) ndarray
+       Array of scores.
+
     """
     score_matrix = np.zeros(dist_matrix.shape)
-    n_paths, n_path_nodes = paths.shape
 
-    for i in range(n_paths):
-        for j in range(n_path_nodes):
-            for k in range(j, n_path_nodes):
+    index_j, index_k, lengths_expected = connections
 
-                if k in label_adj_list[j]:
-                    # These vertices are connected by a body link and
-                    # are in the same shortest path
-                    u, v = paths[i, j], paths[i, k]
+    # These vertices are connected by a body link and
+    # are in the same shortest path
+    nodes_u, nodes_v = paths[:, index_j].ravel(), paths[:, index_k].ravel()
+    lengths_expected = np.tile(lengths_expected, paths.shape[0])
 
-                    length_expected = label_adj_list[j][k]
-                    length_measured = dist_matrix[u, v]
+    # The paths share nodes (e.g., the head), so each link is only scored once.
+    _, index_unique = np.unique(nodes_u * score_matrix.shape[1] + nodes_v, return_index=True)
+    nodes_u, nodes_v = nodes_u[index_unique], nodes_v[index_unique]
 
-                    score_matrix[u, v] = score_func(length_measured, length_expected)
+    lengths_expected = lengths_expected[index_unique]
+
+    lengths_measured = dist_matrix[nodes_u, nodes_v]
+
+    score_matrix[nodes_u, nodes_v] = score_func(lengths_measured, lengths_expected)
 
     # Ensure that all values are finite so the elements can be summed
     score_matrix[~np.isfinite(score_matrix)] = 0
@@ -389,20 +706,13 @@ def reduce_population(population: ndarray, paths: ndarray) -> Tuple[ndarray, nda
         Shortest paths with new values for the reduced population.
 
     """
-    path_nums = np.unique(paths)
+    path_nums, paths_reduced = np.unique(paths, return_inverse=True)
 
     # Population along the shortest paths
     pop_reduced = population[path_nums, :]
 
-    n_pop = len(path_nums)
-    mapping = {k: v for k, v in zip(path_nums, range(n_pop))}
-
-    paths_reduced = np.zeros(paths.shape, dtype=int)
-    n_paths, n_types = paths.shape
-
-    for i in range(n_paths):
-        for j in range(n_types):
-            paths_reduced[i, j] = mapping[paths[i, j]]
+    # The inverse gives the position of each node in the reduced population.
+    paths_reduced = paths_reduced.reshape(paths.shape)
 
     return pop_reduced, paths_reduced
 
@@ -441,33 +751,47 @@ def in_spheres(within_radius: ndarray, has_sphere: ndarray) -> ndarray:
     """
     Return a boolean vector for the positions in the combined sphere volume.
 
+    The arrays are packed into bitsets, so membership is a bitwise AND of the packed bytes.
+    Leading dimensions of the arrays are broadcast against each other.
+
     Parameters
     ----------
-    within_radius : (N, N) ndarray
+    within_radius : (..., N, N) ndarray
         Boolean array.
         Element (i, j) is True if i is within a given radius from j.
-    has_sphere : (N,) ndarray
+    has_sphere : (..., N) ndarray
         Boolean array.
         Element i is True if position i is the centre of a sphere.
 
     Returns
     -------
-    ndarray
+    (..., N) ndarray
         Boolean array.
         Element i is True if position i is within the combined sphere volume.
 
+    Examples
+    --------
+    >>> within_radius = np.array([[1, 1, 0], [1, 1, 0], [0, 0, 1]], dtype=bool)
+
+    >>> in_spheres(within_radius, np.array([True, False, False]))
+    array([ True,  True, False])
+
+    >>> in_spheres(within_radius, np.array([[False, False, True], [True, False, True]]))
+    array([[False, False,  True],
+           [ True,  True,  True]])
+
     """
-    n = len(has_sphere)
-    tiled = np.tile(has_sphere, (n, 1))
+    within_radius_bits = np.packbits(within_radius, axis=-1)
+    has_sphere_bits = np.packbits(has_sphere, axis=-1)
 
-    return np.any(tiled * within_radius, 1)
+    return (within_radius_bits & has_sphere_bits[..., np.newaxis, :]).any(axis=-1)
 
 
-def select_best_feet(
+def radius_winners(
     dist_matrix: ndarray, score_matrix: ndarray, path_vectors: ndarray, radii: array_like
-) -> Tuple[int, int]:
+) -> Tuple[ndarray, ndarray]:
     """
-    Select the best two feet from multiple hypotheses.
+    Return the winning pairs of feet for each sphere radius.
 
     Parameters
     ----------
@@ -484,53 +808,118 @@ def select_best_feet(
 
     Returns
     -------
-    foot_1, foot_2 : int
-        Numbers of the best two feet.
+    pairs : (N_pairs, 2) ndarray
+        All pairs of foot numbers.
+    winners : (N_radii, N_pairs) ndarray
+        Element (r, p) is True if pair p has the maximum score for radius r.
 
     """
     n_paths = path_vectors.shape[0]
 
-    pairs = [*itertools.combinations(range(n_paths), 2)]
-    n_pairs = len(pairs)
+    pairs = np.array([*itertools.combinations(range(n_paths), 2)], dtype=int).reshape(-1, 2)
+
+    # Element (p, i) is True if position i is the centre of a sphere for pair p.
+    has_sphere = path_vectors[pairs[:, 0]] | path_vectors[pairs[:, 1]]
+
+    # Element (r, i, j) is True if position i is within radius r from position j.
+    within_radius = dist_matrix < np.reshape(radii, (-1, 1, 1))
+
+    # Element (r, p, i) is True if position i is inside the spheres of pair p for radius r.
+    inside_spheres = in_spheres(within_radius[:, np.newaxis], has_sphere)
+    inside_float = inside_spheres.astype(float)
+
+    # Sum the scores of the links with both positions inside the spheres.
+    pair_scores = ((inside_float @ score_matrix) * inside_float).sum(axis=-1)
+
+    # The sums are rounded in a different order from a sum of the masked scores,
+    # so near ties are settled by summing the masked scores of the close pairs.
+    n = dist_matrix.shape[0]
+    abs_scores = ((inside_float @ np.abs(score_matrix)) * inside_float).sum(axis=-1)
+    tolerance = 2 * n * (n + 2) * np.finfo(float).eps * abs_scores.max()
+
+    is_close = pair_scores >= pair_scores.max(axis=1, keepdims=True) - tolerance
 
-    votes, pair_scores = np.zeros(n_pairs), np.zeros(n_pairs)
+    sets_close, set_index = np.unique(inside_spheres[is_close], axis=0, return_inverse=True)
+    set_scores = np.array([score_matrix[np.ix_(is_inside, is_inside)].sum() for is_inside in sets_close])
 
-    for r in radii:
+    # The other pairs cannot have the maximum score.
+    pair_scores = np.full(pair_scores.shape, -np.inf)
+    pair_scores[is_close] = set_scores[set_index]
 
-        within_radius = dist_matrix < r
+    winners = pair_scores == pair_scores.max(axis=1, keepdims=True)
 
-        for i in range(n_pairs):
+    return pairs, winners
 
-            a, b = pairs[i]
 
-            has_sphere_1 = path_vectors[a, :]
-            has_sphere_2 = path_vectors[b, :]
+def select_best_feet(
+    dist_matrix: ndarray, score_matrix: ndarray, path_vectors: ndarray, radii: array_like
+) -> Tuple[int, int]:
+    """
+    Select the best two feet from multiple hypotheses.
+
+    Parameters
+    ----------
+    dist_matrix : (N, N) ndarray
+        Distance matrix for N position hypotheses.
+    score_matrix : (N, N) ndarray
+        Score matrix.
+        The scores depend on the expected and actual lengths between positions.
+    path_vectors : (N_paths, N) ndarray
+        Each row is a boolean vector.
+        Element i is True if position i is in the path.
+    radii : array_like
+        List of radii for the spheres, e.g. [0, 5, 10, 15, 20].
 
-            # Element i is True if i is the centre of a sphere
-            has_sphere = np.logical_or(has_sphere_1, has_sphere_2)
+    Returns
+    -------
+    foot_1, foot_2 : int
+        Numbers of the best two feet.
 
-            # For type checker: cast Union[generic, ndarray] to ndarray.
-            has_sphere = cast(ndarray, has_sphere)
+    """
+    pairs, winners = radius_winners(dist_matrix, score_matrix, path_vectors, radii)
 
-            # Element i is True if i is inside the combined sphere volume
-            inside_spheres = in_spheres(within_radius, has_sphere)
+    # Votes go to the winning pairs of each radius.
+    votes = winners.sum(axis=0)
 
-            in_spheres_col = inside_spheres.reshape(-1, 1)
-            score_included = in_spheres_col @ in_spheres_col.T
-            pair_scores[i] = np.sum(score_matrix[score_included])
+    foot_1, foot_2 = pairs[np.argmax(votes)]
 
-        max_score = max(pair_scores)
+    return int(foot_1), int(foot_2)
 
-        # Winning pairs for this radius
-        radius_winners = pair_scores == max_score
 
-        # Votes go to the winners
-        votes += radius_winners
+def select_best_feet_sweep(
+    dist_matrix: ndarray, score_matrix: ndarray, path_vectors: ndarray, radii: array_like
+) -> List[Tuple[int, int]]:
+    """
+    Select the best two feet for each prefix of the radii.
 
-    winning_pair = np.argmax(votes)
-    foot_1, foot_2 = pairs[winning_pair]
+    The selection for prefix k is the same as
+    `select_best_feet(dist_matrix, score_matrix, path_vectors, radii[:k + 1])`.
 
-    return foot_1, foot_2
+    Parameters
+    ----------
+    dist_matrix : (N, N) ndarray
+        Distance matrix for N position hypotheses.
+    score_matrix : (N, N) ndarray
+        Score matrix.
+        The scores depend on the expected and actual lengths between positions.
+    path_vectors : (N_paths, N) ndarray
+        Each row is a boolean vector.
+        Element i is True if position i is in the path.
+    radii : array_like
+        List of radii for the spheres, e.g. [0, 5, 10, 15, 20].
+
+    Returns
+    -------
+    list
+        Numbers of the best two feet for each prefix of the radii.
+
+    """
+    pairs, winners = radius_winners(dist_matrix, score_matrix, path_vectors, radii)
+
+    # Row k contains the votes of the first k + 1 radii.
+    votes_cumulative = np.cumsum(winners, axis=0)
+
+    return [(int(foot_1), int(foot_2)) for foot_1, foot_2 in pairs[np.argmax(votes_cumulative, axis=1)]]
 
 
 def foot_to_pop(
@@ -575,8 +964,258 @@ def foot_to_pop(
     return pop_1, pop_2
 
 
+class FrameProcessor:
+    """
+    Select the best body part positions on the frames of a trial.
+
+    The body graph templates only depend on the lengths of the trial,
+    so they are compiled once and reused for every frame.
+
+    Parameters
+    ----------
+    lengths : (N_lengths,) ndarray
+        Lengths between adjacent body parts.
+    radii : array_like
+        List of radii used to select the best feet.
+    cost_func : function
+        Cost function used to weight the body part graph.
+    score_func : function
+        Score function used to assign scores to connections between body parts.
+    engine : {'dict', 'layered', 'csr'}, optional
+        Shortest path engine (default 'dict').
+        See `shortest_paths_engine`.
+        With the 'layered' engine, `process_frames` processes the frames in batches.
+
+    Examples
+    --------
+    >>> population = np.array([[0, 80, 0], [0, 20, 0], [0, 0, 0], [0, -15, 0], [0, -35, 0], [0, -55, 0], [9, -55, 0]])
+    >>> labels = np.array([0, 1, 2, 3, 4, 5, 5])
+
+    >>> processor = FrameProcessor([60, 20, 15, 20, 20], range(6), cost_func, score_func)
+
+    >>> pop_1, pop_2 = processor.process(population, labels)
+
+    >>> pop_1[[0, -1]]
+    array([[  0,  80,   0],
+           [  0, -55,   0]])
+
+    >>> pop_2[[0, -1]]
+    array([[  0,  80,   0],
+           [  9, -55,   0]])
+
+    """
+
+    __slots__ = (
+        'lengths',
+        'radii',
+        'cost_func',
+        'score_func',
+        'engine',
+        'shortest_paths',
+        'label_adj_list_types',
+        'label_adj_list_parts',
+        'score_func_vectorized',
+        'connections',
+    )
+
+    def __init__(
+        self, lengths: array_like, radii: array_like, cost_func: func_ab, score_func: func_ab, *, engine: str = 'dict'
+    ):
+
+        self.lengths = lengths
+        self.radii = radii
+
+        self.cost_func = cost_func
+        self.score_func = score_func
+
+        self.engine = engine
+        self.shortest_paths = shortest_paths_engine(engine)
+
+        self.label_adj_list_types = lengths_to_adj_list(TYPE_CONNECTIONS, lengths)
+        self.label_adj_list_parts = lengths_to_adj_list(PART_CONNECTIONS, lengths)
+
+        self.score_func_vectorized = np.vectorize(score_func, otypes=[float])
+
+        # Connections between nodes on the same path, for each number of path nodes.
+        self.connections: Dict[int, Tuple[ndarray, ndarray, ndarray]] = {}
+
+    def score_frame(self, population: ndarray, labels: ndarray) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray]:
+        """
+        Return the shortest paths to the feet and the scores along them.
+
+        Parameters
+        ----------
+        population : (N, 3) ndarray
+            All position hypotheses on a frame.
+        labels : (N,) ndarray
+            Array of labels for N positions.
+
+        Returns
+        -------
+        paths : ndarray
+            One row for each foot position.
+            Each row is a shortest path from head to foot.
+        path_dist : ndarray
+            Total distance of the path to each foot.
+        dist_matrix_reduced : ndarray
+            Distance matrix of the reduced population.
+        score_matrix : ndarray
+            Score matrix of the reduced population.
+        path_vectors : ndarray
+            Element (i, j) is True if position j of the reduced population is in path i.
+
+        """
+        # Only the distances between connected types are needed for the shortest paths.
+        dist_blocks = BlockDistances(population, labels, TYPE_CONNECTIONS)
+
+        # Run shortest path algorithm on the body graph
+        prev, dist = self.shortest_paths(dist_blocks, labels, self.label_adj_list_types, self.cost_func)
+
+        # Get shortest path to each foot
+        paths, path_dist = paths_to_foot(prev, dist, labels)
+
+        pop_reduced, paths_reduced = reduce_population(population, paths)
+
+        n_path_nodes = paths.shape[1]
+
+        if n_path_nodes not in self.connections:
+            self.connections[n_path_nodes] = link_connections(self.label_adj_list_parts, n_path_nodes)
+
+        dist_matrix_reduced = cdist(pop_reduced, pop_reduced)
+        score_matrix = score_paths(
+            dist_matrix_reduced, paths_reduced, self.connections[n_path_nodes], self.score_func_vectorized
+        )
+
+        path_vectors = get_path_vectors(paths_reduced, pop_reduced.shape[0])
+
+        return paths, path_dist, dist_matrix_reduced, score_matrix, path_vectors
+
+    def process(self, population: ndarray, labels: ndarray) -> Tuple[ndarray, ndarray]:
+        """
+        Return chosen body part positions from an input set of position hypotheses.
+
+        Parameters
+        ----------
+        population : (N, 3) ndarray
+            All position hypotheses on a frame.
+        labels : (N,) ndarray
+            Array of labels for N positions.
+
+        Returns
+        -------
+        pop_1, pop_2 : ndarray
+            (n_labels, 3) array of chosen points from the input population.
+            One point for each label (i.e., each body part type).
+
+        """
+        paths, path_dist, dist_matrix, score_matrix, path_vectors = self.score_frame(population, labels)
+
+        foot_1, foot_2 = select_best_feet(dist_matrix, score_matrix, path_vectors, self.radii)
+
+        return foot_to_pop(population, paths, path_dist, foot_1, foot_2)
+
+    def process_sweep(self, population: ndarray, labels: ndarray) -> List[Tuple[ndarray, ndarray]]:
+        """
+        Return chosen body part positions for each prefix of the radii.
+
+        Parameters
+        ----------
+        population : (N, 3) ndarray
+            All position hypotheses on a frame.
+        labels : (N,) ndarray
+            Array of labels for N positions.
+
+        Returns
+        -------
+        list
+            Chosen points (pop_1, pop_2) for each prefix of the radii.
+
+        """
+        paths, path_dist, dist_matrix, score_matrix, path_vectors = self.score_frame(population, labels)
+
+        feet_sweep = select_best_feet_sweep(dist_matrix, score_matrix, path_vectors, self.radii)
+
+        return [foot_to_pop(population, paths, path_dist, foot_1, foot_2) for foot_1, foot_2 in feet_sweep]
+
+    def process_frames(
+        self, populations: Sequence[ndarray], labels: Sequence[ndarray], *, batch_size: int = 256
+    ) -> Tuple[ndarray, ndarray]:
+        """
+        Return chosen body part positions on many frames.
+
+        With the 'layered' engine, the frames are processed in batches with the templates
+        of the processor (see `process_frames`).
+        With another engine, the frames are processed one at a time.
+
+        Parameters
+        ----------
+        populations : (F,) Sequence
+            Each element is the (N, 3) population of a frame.
+        labels : (F,) Sequence
+            Each element is the (N,) array of labels of a frame.
+        batch_size : int, optional
+            Number of frames processed at once (default 256).
+
+        Returns
+        -------
+        pops_1, pops_2 : ndarray
+            (F, n_labels, 3) array of chosen points on each frame.
+
+        """
+        populations, labels = list(populations), list(labels)
+        n_frames = len(populations)
+
+        pops_1 = np.full((n_frames, len(PART_TYPES), 3), np.nan)
+        pops_2 = np.full((n_frames, len(PART_TYPES), 3), np.nan)
+
+        if self.engine != 'layered':
+
+            for i, (population, labels_frame) in enumerate(zip(populations, labels)):
+                pops_1[i], pops_2[i] = self.process(population, labels_frame)
+
+            return pops_1, pops_2
+
+        for i in range(0, n_frames, batch_size):
+
+            batch = slice(i, i + batch_size)
+
+            pops_1[batch], pops_2[batch] = process_batch(self, populations[batch], labels[batch])
+
+        return pops_1, pops_2
+
+
+@lru_cache(maxsize=32)
+def frame_processor(
+    lengths: Tuple[float, ...], radii: Tuple[float, ...], cost_func: func_ab, score_func: func_ab, engine: str
+) -> FrameProcessor:
+    """
+    Return a frame processor, reusing the processor of an earlier call with the same arguments.
+
+    The lengths and radii are tuples, so they can be keys of the cache.
+
+    Examples
+    --------
+    >>> processor = frame_processor((60, 20, 15, 20, 20), (0, 1, 2), cost_func, score_func, 'dict')
+
+    >>> processor is frame_processor((60, 20, 15, 20, 20), (0, 1, 2), cost_func, score_func, 'dict')
+    True
+
+    >>> processor is frame_processor((60, 20, 15, 20, 20), (0, 1, 2), cost_func, score_func, 'layered')
+    False
+
+    """
+    return FrameProcessor(lengths, radii, cost_func, score_func, engine=engine)
+
+
 def process_frame(
-    population: ndarray, labels: ndarray, lengths: ndarray, radii: array_like, cost_func: func_ab, score_func: func_ab
+    population: ndarray,
+    labels: ndarray,
+    lengths: ndarray,
+    radii: array_like,
+    cost_func: func_ab,
+    score_func: func_ab,
+    *,
+    engine: str = 'dict',
 ) -> Tuple[ndarray, ndarray]:
     """
     Return chosen body part positions from an input set of position hypotheses.
@@ -599,6 +1238,9 @@ def process_frame(
         Cost function used to weight the body part graph.
     score_func : function
         Score function used to assign scores to connections between body parts.
+    engine : {'dict', 'layered', 'csr'}, optional
+        Shortest path engine (default 'dict').
+        See `shortest_paths_engine`.
 
     Returns
     -------
@@ -607,26 +1249,370 @@ def process_frame(
         One point for each label (i.e., each body part type).
 
     """
-    dist_matrix = cdist(population, population)
+    processor = frame_processor(tuple(lengths), tuple(radii), cost_func, score_func, engine)
 
-    label_adj_list_types = lengths_to_adj_list(TYPE_CONNECTIONS, lengths)
-    label_adj_list_parts = lengths_to_adj_list(PART_CONNECTIONS, lengths)
+    return processor.process(population, labels)
 
-    # Run shortest path algorithm on the body graph
-    prev, dist = pop_shortest_paths(dist_matrix, labels, label_adj_list_types, cost_func)
 
-    # Get shortest path to each foot
-    paths, path_dist = paths_to_foot(prev, dist, labels)
+def process_frame_sweep(
+    population: ndarray,
+    labels: ndarray,
+    lengths: ndarray,
+    radii: array_like,
+    cost_func: func_ab,
+    score_func: func_ab,
+    *,
+    engine: str = 'dict',
+) -> List[Tuple[ndarray, ndarray]]:
+    """
+    Return chosen body part positions for each prefix of the radii.
+
+    The shortest paths and scores do not depend on the radii,
+    so they are computed once for all prefixes.
+    The selection for prefix k is the same as
+    `process_frame(population, labels, lengths, radii[:k + 1], cost_func, score_func)`.
+
+    Parameters
+    ----------
+    population : (N, 3) ndarray
+        All position hypotheses on a frame.
+    labels : (N,) ndarray
+        Array of labels for N positions.
+        The labels correspond to body part types (e.g., foot).
+    lengths : (N_lengths,) ndarray
+        Lengths between adjacent body parts.
+    radii : array_like
+        List of radii used to select the best feet.
+    cost_func : function
+        Cost function used to weight the body part graph.
+    score_func : function
+        Score function used to assign scores to connections between body parts.
+    engine : {'dict', 'layered', 'csr'}, optional
+        Shortest path engine (default 'dict').
+        See `shortest_paths_engine`.
 
-    pop_reduced, paths_reduced = reduce_population(population, paths)
+    Returns
+    -------
+    list
+        Chosen points (pop_1, pop_2) for each prefix of the radii.
 
-    dist_matrix_reduced = cdist(pop_reduced, pop_reduced)
-    score_matrix = get_scores(dist_matrix_reduced, paths_reduced, label_adj_list_parts, score_func)
+    """
+    processor = frame_processor(tuple(lengths), tuple(radii), cost_func, score_func, engine)
 
-    path_vectors = get_path_vectors(paths_reduced, pop_reduced.shape[0])
+    return processor.process_sweep(population, labels)
 
-    foot_1, foot_2 = select_best_feet(dist_matrix_reduced, score_matrix, path_vectors, radii)
 
-    pop_1, pop_2 = foot_to_pop(population, paths, path_dist, foot_1, foot_2)
+def pack_populations(
+    populations: Sequence[ndarray], labels: Sequence[ndarray], n_labels: int
+) -> Tuple[List[ndarray], ndarray]:
+    """
+    Pack the ragged populations of many frames into padded arrays.
 
-    return pop_1, pop_2
+    There is one padded array for each label.
+    The points with a label keep their order from the frame population.
+
+    Parameters
+    ----------
+    populations : (F,) Sequence
+        Each element is the (N, 3) population of a frame.
+    labels : (F,) Sequence
+        Each element is the (N,) array of labels of a frame.
+        The labels are sorted in ascending order.
+    n_labels : int
+        Number of labels.
+
+    Returns
+    -------
+    layers : list
+        layers[A] is a (F, K_A, 3) array of the points with label A.
+        K_A is the maximum number of these points on a frame.
+        Missing points are filled with NaN.
+    counts : (F, n_labels) ndarray
+        Number of points with each label on each frame.
+
+    Examples
+    --------
+    >>> populations = [np.array([[0, 0, 0], [1, 1, 1], [2, 2, 2]]), np.array([[3, 3, 3], [4, 4, 4]])]
+    >>> labels = [np.array([0, 1, 1]), np.array([0, 1])]
+
+    >>> layers, counts = pack_populations(populations, labels, 2)
+
+    >>> layers[1]
+    array([[[ 1.,  1.,  1.],
+            [ 2.,  2.,  2.]],
+    <BLANKLINE>
+           [[ 4.,  4.,  4.],
+            [nan, nan, nan]]])
+
+    >>> counts
+    array([[1, 2],
+           [1, 1]])
+
+    """
+    n_frames = len(populations)
+
+    population_all = np.concatenate(populations).astype(float)
+    labels_all = np.concatenate(labels)
+
+    n_points = np.array([len(x) for x in labels])
+    frames_all = np.repeat(np.arange(n_frames), n_points)
+
+    # The points are sorted by frame, then by label.
+    keys = frames_all * n_labels + labels_all
+    keys_unique, index_start, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # Position of each point within its group of frame and label.
+    ranks = np.arange(len(keys)) - index_start[inverse]
+
+    counts = np.zeros((n_frames, n_labels), dtype=int)
+    np.add.at(counts, (frames_all, labels_all), 1)
+
+    layers = []
+
+    for label in range(n_labels):
+
+        is_label = labels_all == label
+
+        points_layer = np.full((n_frames, counts[:, label].max(), 3), np.nan)
+        points_layer[frames_all[is_label], ranks[is_label]] = population_all[is_label]
+
+        layers.append(points_layer)
+
+    return layers, counts
+
+
+def process_frames(
+    populations: Sequence[ndarray],
+    labels: Sequence[ndarray],
+    lengths: ndarray,
+    radii: array_like,
+    cost_func: func_ab,
+    score_func: func_ab,
+    *,
+    batch_size: int = 256,
+) -> Tuple[ndarray, ndarray]:
+    """
+    Return chosen body part positions on many frames.
+
+    This is a batched version of `process_frame`.
+    The populations are packed into padded arrays (one for each label),
+    and the distances, shortest paths, scores and foot selection are
+    computed for a whole batch of frames at once.
+
+    The chosen positions are the same as those of `process_frame`.
+    A frame where two pairs of feet have scores that differ only by rounding error
+    is processed on its own, so the near tie is settled in the same way.
+
+    Parameters
+    ----------
+    populations : (F,) Sequence
+        Each element is the (N, 3) population of a frame.
+    labels : (F,) Sequence
+        Each element is the (N,) array of labels of a frame.
+        The labels are sorted in ascending order.
+        Each frame must have every label and at least two feet.
+    lengths : (N_lengths,) ndarray
+        Lengths between adjacent body parts.
+    radii : array_like
+        List of radii used to select the best feet.
+    cost_func : function
+        Cost function used to weight the body part graph.
+        It must accept arrays.
+    score_func : function
+        Score function used to assign scores to connections between body parts.
+    batch_size : int, optional
+        Number of frames processed at once (default 256).
+
+    Returns
+    -------
+    pops_1, pops_2 : ndarray
+        (F, n_labels, 3) array of chosen points on each frame.
+        One point for each label (i.e., each body part type).
+
+    """
+    processor = FrameProcessor(lengths, radii, cost_func, score_func, engine='layered')
+
+    return processor.process_frames(populations, labels, batch_size=batch_size)
+
+
+def process_batch(
+    processor: FrameProcessor, populations: Sequence[ndarray], labels: Sequence[ndarray]
+) -> Tuple[ndarray, ndarray]:
+    """
+    Return chosen body part positions on a batch of frames.
+
+    See `process_frames` for the return values.
+
+    Parameters
+    ----------
+    processor : FrameProcessor
+        Processor with the compiled templates of the trial.
+    populations : (F,) Sequence
+        Each element is the (N, 3) population of a frame.
+    labels : (F,) Sequence
+        Each element is the (N,) array of labels of a frame.
+
+    """
+    n_labels = len(PART_TYPES)
+
+    label_adj_list_types = processor.label_adj_list_types
+    label_adj_list_parts = processor.label_adj_list_parts
+
+    layers, counts = pack_populations(populations, labels, n_labels)
+    n_frames = counts.shape[0]
+    frames = np.arange(n_frames).reshape(-1, 1)
+
+    # %% Shortest paths through the layers, from head to foot.
+
+    dist_layer = np.where(np.isnan(layers[0][..., 0]), np.inf, 0)
+    prev_layers = []
+
+    for label in range(1, n_labels):
+
+        dist_matrix = pp.batch_cdist(layers[label - 1], layers[label])
+        weights = processor.cost_func(dist_matrix, label_adj_list_types[label - 1][label])
+
+        dist_candidates = dist_layer[:, :, np.newaxis] + weights
+        dist_candidates[np.isnan(dist_candidates)] = np.inf
+
+        index_min = np.argmin(dist_candidates, axis=1)
+        dist_layer = np.take_along_axis(dist_candidates, index_min[:, np.newaxis, :], axis=1)[:, 0, :]
+
+        prev_layers.append(index_min)
+
+    # Trace the path to each foot.
+    # paths[f, q, A] is the index in layer A of the node on path q of frame f.
+    n_feet_max = layers[-1].shape[1]
+
+    paths = np.zeros((n_frames, n_feet_max, n_labels), dtype=int)
+    paths[:, :, -1] = np.arange(n_feet_max)
+
+    for label in range(n_labels - 1, 0, -1):
+        paths[:, :, label - 1] = np.take_along_axis(prev_layers[label - 1], paths[:, :, label], axis=1)
+
+    path_dist = dist_layer
+    has_foot = np.arange(n_feet_max) < counts[:, [-1]]
+
+    # (F, N_feet, n_labels, 3) array of the points on the paths.
+    path_points = np.stack([layers[label][frames, paths[:, :, label]] for label in range(n_labels)], axis=2)
+
+    # %% Scores of the body links on the shortest paths.
+
+    # Distance from each point on a path to the closest point on each path.
+    # Element (f, q, A, s) is for the point with label A on path q, and path s.
+    path_points_flat = path_points.reshape(n_frames, -1, 3)
+    dist_matrix = pp.batch_cdist(path_points_flat, path_points_flat)
+
+    dist_to_path = dist_matrix.reshape(n_frames, n_feet_max, n_labels, n_feet_max, n_labels).min(axis=-1)
+
+    pairs = np.array([*itertools.combinations(range(n_feet_max), 2)]).reshape(-1, 2)
+    is_pair_valid = has_foot[:, pairs[:, 1]]
+
+    # Distance from each point on a path to the closest point on each pair of paths.
+    dist_to_pair = np.minimum(dist_to_path[..., pairs[:, 0]], dist_to_path[..., pairs[:, 1]])
+
+    index_feet = np.arange(n_feet_max)
+    is_earlier = index_feet < index_feet.reshape(-1, 1)
+
+    list_scores, list_dist_included = [], []
+
+    for label_a, label_b in PART_CONNECTIONS:
+
+        # The link on each path.
+        # A link shared by multiple paths is only scored once.
+        keys = paths[:, :, label_a] * layers[label_b].shape[1] + paths[:, :, label_b]
+        is_repeat = np.any((keys[:, :, np.newaxis] == keys[:, np.newaxis, :]) & is_earlier, axis=2)
+
+        is_scored = has_foot & ~is_repeat
+
+        lengths_measured = dist_matrix.reshape(n_frames, n_feet_max, n_labels, n_feet_max, n_labels)[
+            :, index_feet, label_a, index_feet, label_b
+        ]
+
+        scores = np.zeros((n_frames, n_feet_max))
+        scores[is_scored] = processor.score_func_vectorized(
+            lengths_measured[is_scored], label_adj_list_parts[label_a][label_b]
+        )
+        scores[~np.isfinite(scores)] = 0
+
+        list_scores.append(scores)
+
+        # The score of the link is included for a pair of feet if both ends of the link
+        # are inside the spheres, i.e., if this distance is less than the radius.
+        list_dist_included.append(np.maximum(dist_to_pair[:, :, label_a], dist_to_pair[:, :, label_b]))
+
+    # (F, N_links, 1) array of link scores and (F, N_links, N_pairs) array of distances.
+    link_scores = np.stack(list_scores, axis=2).reshape(n_frames, -1, 1)
+    dist_included = np.stack(list_dist_included, axis=2).reshape(n_frames, link_scores.shape[1], -1)
+
+    # Nodes on the paths, numbered across the layers.
+    offsets = np.cumsum([0] + [layer.shape[1] for layer in layers[:-1]])
+    nodes = paths + offsets
+    n_nodes = offsets[-1] + layers[-1].shape[1]
+
+    list_pair_scores = []
+    is_near_tie = np.zeros(n_frames, dtype=bool)
+
+    for r in processor.radii:
+
+        is_included = dist_included < r
+
+        pair_scores = np.where(is_included, link_scores, 0).sum(axis=1)
+        pair_scores = np.where(is_pair_valid, pair_scores, -np.inf)
+
+        list_pair_scores.append(pair_scores)
+
+        # The pair scores are summed in a different order from those of `process_frame`.
+        # Pairs with the same nodes inside the spheres have the same score with either order,
+        # but other pairs within rounding error of the maximum can be ranked differently.
+        abs_scores = np.where(is_included, np.abs(link_scores), 0).sum(axis=1)
+        tolerance = 1e-9 * abs_scores.max(axis=1, keepdims=True)
+
+        is_close = pair_scores >= pair_scores.max(axis=1, keepdims=True) - tolerance
+
+        # Pairs without any scored links inside the spheres have a score of exactly zero.
+        frames_check = np.flatnonzero((is_close.sum(axis=1) > 1) & np.any(is_close & (abs_scores > 0), axis=1))
+
+        if frames_check.size == 0:
+            continue
+
+        # Element (f, v, p) is True if node v is inside the spheres of pair p on frame f.
+        has_foot_check = has_foot[frames_check]
+        index_frames, _ = np.nonzero(has_foot_check)
+
+        is_inside = np.zeros((frames_check.size, n_nodes, len(pairs)), dtype=bool)
+        is_inside[index_frames.reshape(-1, 1), nodes[frames_check][has_foot_check]] = (
+            dist_to_pair[frames_check][has_foot_check] < r
+        )
+
+        index_max = np.argmax(pair_scores[frames_check], axis=1).reshape(-1, 1, 1)
+        is_inside_max = np.take_along_axis(is_inside, index_max, axis=2)
+
+        is_other_set = np.any(is_inside != is_inside_max, axis=1)
+        is_near_tie[frames_check] |= np.any(is_close[frames_check] & is_other_set, axis=1)
+
+    # (N_radii, F, N_pairs) array of pair scores.
+    pair_scores = np.stack(list_pair_scores)
+
+    # Votes go to the winning pairs for each radius.
+    votes = np.sum(pair_scores == pair_scores.max(axis=-1, keepdims=True), axis=0)
+    votes = np.where(is_pair_valid, votes, -1)
+
+    feet_1, feet_2 = pairs[np.argmax(votes, axis=1)].T
+
+    # %% Positions on the paths to the selected feet.
+
+    frames = frames.ravel()
+    pops_1, pops_2 = path_points[frames, feet_1], path_points[frames, feet_2]
+
+    # Select the head on the shorter of the two selected shortest paths.
+    is_shorter_2 = path_dist[frames, feet_2] < path_dist[frames, feet_1]
+    heads = np.where(is_shorter_2.reshape(-1, 1), pops_2[:, 0], pops_1[:, 0])
+
+    pops_1[:, 0], pops_2[:, 0] = heads, heads
+
+    # Near ties are settled one frame at a time.
+    for frame in np.flatnonzero(is_near_tie):
+        pops_1[frame], pops_2[frame] = processor.process(populations[frame], labels[frame])
+
+    return pops_1, pops_2
@@ -0,0 +1,89 @@
+"""Module for the running median of a stream of values."""
+
+import heapq
+from typing import List
+
+import numpy as np
+from numpy import ndarray
+
+from modules.typing import array_like
+
+
+class RunningMedian:
+    """
+    Median of each column of a matrix that grows one row at a time.
+
+    Each column has two heaps: a max-heap with the lower half of the values
+    and a min-heap with the upper half. Adding a row takes O(log n) time,
+    where n is the number of rows so far.
+
+    The medians are the same as `np.median(matrix, axis=0)`.
+    The values must not be NaN.
+
+    Parameters
+    ----------
+    n_cols : int
+        Number of columns.
+
+    Examples
+    --------
+    >>> running_median = RunningMedian(2)
+
+    >>> running_median.update([1, 10])
+    >>> running_median.median()
+    array([ 1., 10.])
+
+    >>> running_median.update([5, 2])
+    >>> running_median.median()
+    array([3., 6.])
+
+    >>> running_median.update([3, 4])
+    >>> running_median.median()
+    array([3., 4.])
+
+    >>> len(running_median)
+    3
+
+    """
+
+    __slots__ = ('heaps_lower', 'heaps_upper')
+
+    def __init__(self, n_cols: int):
+
+        # The lower heaps contain negative values, so they are max-heaps.
+        self.heaps_lower: List[list] = [[] for _ in range(n_cols)]
+        self.heaps_upper: List[list] = [[] for _ in range(n_cols)]
+
+    def __len__(self) -> int:
+        """Return the number of rows added so far."""
+        return len(self.heaps_lower[0]) + len(self.heaps_upper[0])
+
+    def update(self, row: array_like) -> None:
+        """Add a row of values."""
+        for value, heap_lower, heap_upper in zip(row, self.heaps_lower, self.heaps_upper):
+
+            if not heap_lower or value <= -heap_lower[0]:
+                heapq.heappush(heap_lower, -value)
+            else:
+                heapq.heappush(heap_upper, value)
+
+            # The lower heap has the same number of values as the upper heap, or one more.
+            if len(heap_lower) > len(heap_upper) + 1:
+                heapq.heappush(heap_upper, -heapq.heappop(heap_lower))
+
+            elif len(heap_upper) > len(heap_lower):
+                heapq.heappush(heap_lower, -heapq.heappop(heap_upper))
+
+    def median(self) -> ndarray:
+        """Return the median of each column."""
+        medians = np.full(len(self.heaps_lower), np.nan)
+
+        for i, (heap_lower, heap_upper) in enumerate(zip(self.heaps_lower, self.heaps_upper)):
+
+            if len(heap_lower) > len(heap_upper):
+                medians[i] = -heap_lower[0]
+
+            elif heap_lower:
+                medians[i] = (-heap_lower[0] + heap_upper[0]) / 2
+
+        return medians
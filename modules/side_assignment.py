@@ -1,16 +1,17 @@
 """Module for assigning left/right sides to the feet."""
 
-from typing import Tuple, NamedTuple
+from typing import NamedTuple, Optional, Tuple, Union
 
 import numpy as np
 import xarray as xr
-from dpcontracts import require, ensure
 from numpy import ndarray
-from skimage.measure import LineModelND, ransac
+from skimage.measure import LineModelND
 from skspatial.objects import Vector
 from statsmodels.robust import mad
 
 import modules.numpy_funcs as nf
+from modules.contracts import ensure
+from modules.walking_pass import GroupedPoints, WalkingPass, as_walking_pass
 
 
 class Basis(NamedTuple):
@@ -22,85 +23,191 @@ class Basis(NamedTuple):
     perp: ndarray
 
 
-def fit_ransac(points: ndarray) -> Tuple[LineModelND, ndarray]:
+def fit_line_batched(
+    points: ndarray,
+    *,
+    max_trials: int = 100,
+    batch_size: int = 25,
+    stop_probability: float = 1,
+    random_state: Optional[int] = None,
+) -> Tuple[LineModelND, ndarray]:
     """
-    Fit a line to the foot points with RANSAC.
+    Fit a line to the foot points with a batched version of RANSAC.
+
+    The hypotheses are the same as `skimage.measure.ransac` with a `LineModelND`:
+    lines fitted to random samples of half of the points.
+    A batch of hypotheses is fitted and scored at once. The mean and scatter matrix of each sample
+    are found with a product of the sample masks and the points, and the direction of each line is
+    the principal eigenvector of its scatter matrix.
+
+    As in `skimage.measure.ransac`, the best hypothesis has the most inliers, with ties broken by
+    the sum of squared residuals. The search stops early when all points are inliers, or when the
+    number of trials reaches the bound given by `stop_probability`.
+    The final model is fitted to the inliers of the best hypothesis.
 
     Parameters
     ----------
     points : (N, D) ndarray
         Input points.
+    max_trials : int, optional
+        Maximum number of hypotheses (default 100).
+    batch_size : int, optional
+        Number of hypotheses scored at once (default 25).
+    stop_probability : float, optional
+        Confidence that a sample free of outliers has been drawn, used to stop early (default 1).
+    random_state : int, optional
+        Seed of the random number generator.
+        The fitted line is deterministic for a given seed.
 
     Returns
     -------
     model : LineModelND
-        Linear model fitted with RANSAC.
+        Linear model fitted to the inliers.
         Params consist of the point and unit vector defining the line.
     is_inlier : (N,) ndarray
         Boolean mask indicating inlier points.
 
+    Raises
+    ------
+    ValueError
+        If no hypothesis has any inliers.
+
+    Examples
+    --------
+    >>> points = np.column_stack((np.arange(0, 100, 10), np.zeros(10), np.tile([1, -1], 5)))
+    >>> points[7, 2] = 40
+
+    >>> model, is_inlier = fit_line_batched(points, random_state=0)
+
+    >>> np.flatnonzero(~is_inlier)
+    array([7])
+
+    >>> point, direction = model.params
+    >>> point.round(2)
+    array([42.22,  0.  ,  0.11])
+
     """
-    model, is_inlier = ransac(
-        points, LineModelND, min_samples=int(0.5 * len(points)), residual_threshold=2.5 * mad(points[:, 2], c=1)
-    )
+    n_points, n_dims = points.shape
+    min_samples = int(0.5 * n_points)
 
-    return model, is_inlier
+    residual_threshold = 2.5 * mad(points[:, 2], c=1)
+
+    rng = np.random.default_rng(random_state)
+
+    # The points are centred to reduce rounding errors in the scatter matrices.
+    points_centred = points - points.mean(axis=0)
+    products = (points_centred[:, :, np.newaxis] * points_centred[:, np.newaxis, :]).reshape(n_points, -1)
+    norms_sq = (points_centred ** 2).sum(axis=1)
+
+    count_best, sum_best = -1, np.inf
+    is_inlier_best = np.zeros(n_points, dtype=bool)
+
+    n_trials = 0
+
+    while n_trials < max_trials:
+
+        n_batch = int(min(batch_size, max_trials - n_trials))
+        n_trials += n_batch
+
+        # Random samples of the points, without replacement.
+        index_samples = np.argpartition(rng.random((n_batch, n_points)), min_samples - 1, axis=1)[:, :min_samples]
+
+        is_sample = np.zeros((n_batch, n_points))
+        np.put_along_axis(is_sample, index_samples, 1, axis=1)
+
+        means = is_sample @ points_centred / min_samples
+        scatters = (is_sample @ products).reshape(n_batch, n_dims, n_dims) / min_samples
+        scatters -= means[:, :, np.newaxis] * means[:, np.newaxis, :]
+
+        # The eigenvalues are in ascending order, so the last eigenvector is the principal one.
+        directions = np.linalg.eigh(scatters)[1][:, :, -1]
+
+        # Squared distances from all points to the line of each hypothesis, found with matrix products.
+        lengths_along = points_centred @ directions.T - (means * directions).sum(axis=1)
+        lengths_sq = norms_sq[:, np.newaxis] - 2 * points_centred @ means.T + (means ** 2).sum(axis=1)
+        residuals = np.sqrt(np.maximum(lengths_sq - lengths_along ** 2, 0)).T
+
+        is_inlier = residuals < residual_threshold
+        counts = is_inlier.sum(axis=1)
+        sums = (residuals ** 2).sum(axis=1)
+
+        # The first of the best hypotheses in the batch.
+        index_best = np.lexsort((sums, -counts))[0]
+
+        if counts[index_best] > count_best or (counts[index_best] == count_best and sums[index_best] < sum_best):
+
+            count_best, sum_best = counts[index_best], sums[index_best]
+            is_inlier_best = is_inlier[index_best]
+
+            # Probability that a sample has only inliers of the best hypothesis.
+            prob_inlier_sample = (count_best / n_points) ** min_samples
+
+            if stop_probability < 1 and 0 < prob_inlier_sample < 1:
+                trials_needed = np.ceil(np.log(1 - stop_probability) / np.log(1 - prob_inlier_sample))
+                max_trials = min(max_trials, trials_needed)
+
+        if count_best == n_points:
+            break
+
+    if count_best <= 0:
+        raise ValueError("No inliers were found.")
+
+    model = LineModelND()
+    model.estimate(points[is_inlier_best])
+
+    return model, is_inlier_best
 
 
-@require(
-    "The layers must include head and two feet.",
-    lambda args: set(args.points_stacked.layers.values) == {'points_a', 'points_b', 'points_head'},
-)
 @ensure(
     # This contract assumes an orientation where x = length along walkway, z = depth.
     # It can be removed if new data does not have this orientation.
     "The perpendicular vector must be to the right of the forward vector.",
     lambda _, result: Vector(result[0].forward[[0, 2]]).side_vector(result[0].perp[[0, 2]]) == 1,
 )
-def compute_basis(points_stacked: xr.DataArray) -> Tuple[Basis, xr.DataArray]:
+def compute_basis(
+    points_stacked: Union[WalkingPass, xr.DataArray], *, random_state: Optional[int] = 0
+) -> Tuple[Basis, GroupedPoints]:
     """
     Return origin and basis vectors of new coordinate system found with RANSAC.
 
     Parameters
     ----------
-    points_stacked : xarray.DataArray
-        (N_frames, N_dims, N_layers) array of points.
+    points_stacked : WalkingPass or xarray.DataArray
+        Head and foot points of a walking pass.
+        A DataArray is converted with `WalkingPass.from_dataarray`.
+    random_state : int, optional
+        Seed of the RANSAC line fit (default 0).
+        If None, the fit is not deterministic.
 
     Returns
     -------
     basis : namedtuple
         Basis of new coordinate system (origin point and three unit vectors).
         Fields include 'origin', 'forward', 'up', 'perp'.
-    points_grouped_inlier : xarray.DataArray
-        (N_frames, N_dims) array.
+    points_grouped_inlier : GroupedPoints
         Grouped foot points that are marked inliers by RANSAC.
 
     """
-    frames = points_stacked.coords['frames'].values
+    walking_pass = as_walking_pass(points_stacked)
 
-    points_head = points_stacked.sel(layers='points_head').values
-    points_a = points_stacked.sel(layers='points_a').values
-    points_b = points_stacked.sel(layers='points_b').values
+    points_head = walking_pass.head
+    points_a = walking_pass.foot_a
+    points_b = walking_pass.foot_b
 
     points_foot_mean = (points_a + points_b) / 2
 
     vectors_up = points_head - points_foot_mean
     vector_up = Vector(np.median(vectors_up, axis=0)).unit()
 
-    frames_grouped = np.repeat(frames, 2)
+    frames_grouped = np.repeat(walking_pass.frames, 2)
     points_grouped = nf.interweave_rows(points_a, points_b)
 
-    model_ransac, is_inlier = fit_ransac(points_grouped)
+    model_ransac, is_inlier = fit_line_batched(points_grouped, random_state=random_state)
     point_origin, vector_forward = model_ransac.params
 
     vector_perp = Vector(vector_up).cross(vector_forward)
 
-    frames_grouped_inlier = frames_grouped[is_inlier]
-    points_grouped_inlier = points_grouped[is_inlier]
-
-    points_grouped_inlier = xr.DataArray(
-        points_grouped_inlier, coords={'frames': frames_grouped_inlier, 'cols': range(3)}, dims=('frames', 'cols')
-    )
+    points_grouped_inlier = GroupedPoints(frames_grouped[is_inlier], points_grouped[is_inlier])
 
     basis = Basis(point_origin, vector_forward, vector_up, vector_perp)
 
@@ -113,12 +220,17 @@ def assign_sides_grouped(
     """
     Assign left/right sides to clusters representing stance phases.
 
+    A cluster is on the right side if the median side value of its points is greater
+    than the median side value of the swing feet, which are the other foot points on the frames
+    of the cluster. The medians of all clusters are found at once with `numpy_funcs.group_medians`.
+
     Parameters
     ----------
     frames_grouped : (N_grouped,) ndarray
         Frames corresponding to grouped foot points.
     values_side_grouped : (N_grouped,) ndarray
         Values related to the side (left/right) of each foot point.
+        A cluster with a NaN median value is on the left side.
     labels_grouped : (N_grouped,) ndarray
         Labels indicating detected clusters (stance phases of the feet).
         Non-cluster elements are marked with -1.
@@ -130,36 +242,49 @@ def assign_sides_grouped(
 
     """
     labels_unique = np.unique(labels_grouped[labels_grouped != -1])
-    set_labels_r = set()
+    n_clusters = len(labels_unique)
+
+    values_side_grouped = np.ravel(values_side_grouped)
+
+    is_cluster = labels_grouped != -1
+    clusters = np.searchsorted(labels_unique, labels_grouped)
+
+    # Foot points grouped by frame.
+    frames_unique, index_frames = np.unique(frames_grouped, return_inverse=True)
+    n_frames = len(frames_unique)
+
+    order_frames = np.argsort(index_frames, kind='stable')
+    index_frames_sorted = index_frames[order_frames]
 
-    for label in labels_unique:
+    starts = np.searchsorted(index_frames_sorted, np.arange(n_frames), side='left')
+    stops = np.searchsorted(index_frames_sorted, np.arange(n_frames), side='right')
 
-        is_cluster = labels_grouped == label
+    # Each frame of each cluster.
+    keys = np.unique(clusters[is_cluster] * n_frames + index_frames[is_cluster])
+    clusters_frame, index_frames_cluster = keys // n_frames, keys % n_frames
 
-        # Element is True for all cluster frames in the grouped array.
-        is_frame_cluster = np.in1d(frames_grouped, frames_grouped[is_cluster])
+    # A foot point that occurred on a frame in the cluster, but is not a part of the cluster itself,
+    # is a swing foot. Each point is only counted once for each cluster.
+    rows, cols = nf.window_pairs(starts[index_frames_cluster], stops[index_frames_cluster])
+    clusters_swing, points_swing = clusters_frame[rows], order_frames[cols]
 
-        # Element is True if the corresponding foot point occurred on a frame in the cluster,
-        # but is not a part of the cluster itself. This means it is a swing foot.
-        is_foot_swing = is_frame_cluster & ~is_cluster
+    is_foot_swing = labels_grouped[points_swing] != labels_unique[clusters_swing]
+    clusters_swing, points_swing = clusters_swing[is_foot_swing], points_swing[is_foot_swing]
 
-        value_side_stance = np.median(values_side_grouped[is_cluster])
+    values_side_stance = nf.group_medians(clusters[is_cluster], values_side_grouped[is_cluster], n_clusters)
+    values_side_swing = nf.group_medians(clusters_swing, values_side_grouped[points_swing], n_clusters)
 
-        if is_foot_swing.sum() > 0:
-            value_side_swing = np.median(values_side_grouped[is_foot_swing])
-        else:
-            # It's possible that there are no swing feet in the cluster.
-            # In this case, the swing value is assumed to be zero.
-            value_side_swing = 0
+    # It's possible that there are no swing feet in the cluster.
+    # In this case, the swing value is assumed to be zero.
+    values_side_swing[np.bincount(clusters_swing, minlength=n_clusters) == 0] = 0
 
-        if value_side_stance > value_side_swing:
-            # The current label is on the right side.
-            set_labels_r.add(label)
+    # The clusters on the right side.
+    is_right = values_side_stance > values_side_swing
 
-    set_labels_l = set(labels_unique) - set_labels_r
+    is_label_grouped_r = np.zeros(len(labels_grouped), dtype=bool)
+    is_label_grouped_r[is_cluster] = is_right[clusters[is_cluster]]
 
-    is_label_grouped_l = np.in1d(labels_grouped, list(set_labels_l))
-    is_label_grouped_r = np.in1d(labels_grouped, list(set_labels_r))
+    is_label_grouped_l = is_cluster & ~is_label_grouped_r
 
     labels_grouped_l = np.copy(labels_grouped)
     labels_grouped_r = np.copy(labels_grouped)
@@ -0,0 +1,242 @@
+"""Module for array-backed containers of the points in a walking pass."""
+
+from typing import Any, Optional, Union
+
+import numpy as np
+import xarray as xr
+
+from modules.contracts import require
+
+LAYERS = ('points_a', 'points_b', 'points_head')
+
+
+class WalkingPass:
+    """
+    Head and foot points of a walking pass.
+
+    Each array is contiguous, and row i of the points is on frame i of the pass.
+
+    Parameters
+    ----------
+    frames : (N_frames,) array_like
+        Frames of the walking pass.
+    head, foot_a, foot_b : (N_frames, N_dims) array_like
+        Points of the head and the two feet.
+        The feet have not been assigned to a side.
+
+    Raises
+    ------
+    ValueError
+        If the arrays do not have one row for each frame.
+
+    Examples
+    --------
+    >>> walking_pass = WalkingPass([0, 1], [[0, 60, 0], [1, 60, 0]], [[0, 0, 1], [1, 0, 1]], [[0, 0, -1], [1, 0, -1]])
+
+    >>> len(walking_pass), walking_pass.nbytes
+    (2, 160)
+
+    >>> points_stacked = walking_pass.to_dataarray()
+    >>> points_stacked.dims
+    ('frames', 'cols', 'layers')
+
+    >>> WalkingPass.from_dataarray(points_stacked).foot_b
+    array([[ 0.,  0., -1.],
+           [ 1.,  0., -1.]])
+
+    """
+
+    __slots__ = ('frames', 'head', 'foot_a', 'foot_b')
+
+    def __init__(self, frames: Any, head: Any, foot_a: Any, foot_b: Any):
+
+        self.frames = np.ascontiguousarray(frames)
+
+        self.head = np.ascontiguousarray(head, dtype=float)
+        self.foot_a = np.ascontiguousarray(foot_a, dtype=float)
+        self.foot_b = np.ascontiguousarray(foot_b, dtype=float)
+
+        if not len(self.head) == len(self.foot_a) == len(self.foot_b) == len(self.frames):
+            raise ValueError("The points must have one row for each frame.")
+
+    def __len__(self) -> int:
+        """Return the number of frames."""
+        return len(self.frames)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the total size of the arrays in bytes."""
+        return self.frames.nbytes + self.head.nbytes + self.foot_a.nbytes + self.foot_b.nbytes
+
+    @classmethod
+    @require(
+        "The layers must include head and two feet.",
+        lambda args: set(args.points_stacked.layers.values) == set(LAYERS),
+    )
+    def from_dataarray(cls, points_stacked: xr.DataArray) -> 'WalkingPass':
+        """
+        Return a walking pass from a DataArray of stacked points.
+
+        Parameters
+        ----------
+        points_stacked : xarray.DataArray
+            (N_frames, N_dims, N_layers) array of points.
+            The layers are 'points_head', 'points_a', 'points_b'.
+
+        """
+        frames = points_stacked.coords['frames'].values
+        layers = list(points_stacked.coords['layers'].values)
+
+        if points_stacked.dims != ('frames', 'cols', 'layers'):
+            points_stacked = points_stacked.transpose('frames', 'cols', 'layers')
+
+        # The layers are selected by position, which is faster than selecting them by label.
+        array_stacked = points_stacked.values
+
+        return cls(
+            frames,
+            head=array_stacked[:, :, layers.index('points_head')],
+            foot_a=array_stacked[:, :, layers.index('points_a')],
+            foot_b=array_stacked[:, :, layers.index('points_b')],
+        )
+
+    def to_dataarray(self) -> xr.DataArray:
+        """Return the points as a DataArray with layers 'points_a', 'points_b', 'points_head'."""
+
+        return xr.DataArray(
+            np.dstack((self.foot_a, self.foot_b, self.head)),
+            coords={'frames': self.frames, 'cols': range(self.head.shape[1]), 'layers': list(LAYERS)},
+            dims=('frames', 'cols', 'layers'),
+        )
+
+
+class GroupedPoints:
+    """
+    Foot points of a walking pass, with the frame of each point.
+
+    A frame can have multiple points (e.g., the two feet).
+
+    Parameters
+    ----------
+    frames : (N,) array_like
+        Frame of each point.
+    points : (N, N_dims) array_like
+        Foot points.
+
+    Raises
+    ------
+    ValueError
+        If the points do not have one frame each.
+
+    Examples
+    --------
+    >>> points_grouped = GroupedPoints([0, 0, 1, 1], [[0, 0], [0, 1], [1, 0], [1, 1]])
+
+    >>> points_grouped[points_grouped.points[:, 1] == 1].frames
+    array([0, 1])
+
+    >>> GroupedPoints.from_dataarray(points_grouped.to_dataarray()).points[-1]
+    array([1., 1.])
+
+    """
+
+    __slots__ = ('frames', 'points')
+
+    def __init__(self, frames: Any, points: Any):
+
+        self.frames = np.ascontiguousarray(frames)
+        self.points = np.ascontiguousarray(points, dtype=float)
+
+        if len(self.frames) != len(self.points):
+            raise ValueError("The points must have one frame each.")
+
+    def __len__(self) -> int:
+        """Return the number of points."""
+        return len(self.frames)
+
+    def __getitem__(self, index: Any) -> 'GroupedPoints':
+        """Return a subset of the points and their frames."""
+        return GroupedPoints(self.frames[index], self.points[index])
+
+    @classmethod
+    def from_dataarray(cls, points_grouped: xr.DataArray) -> 'GroupedPoints':
+        """Return the grouped points of a (N, N_dims) DataArray with a coordinate of frames."""
+        return cls(points_grouped.coords['frames'].values, points_grouped.values)
+
+    def to_dataarray(self) -> xr.DataArray:
+        """Return the points as a (N, N_dims) DataArray with a coordinate of frames."""
+
+        return xr.DataArray(
+            self.points, coords={'frames': self.frames, 'cols': range(self.points.shape[1])}, dims=('frames', 'cols')
+        )
+
+
+def as_walking_pass(points_stacked: Union[WalkingPass, xr.DataArray]) -> WalkingPass:
+    """Return the points of a walking pass as a `WalkingPass`, converting a DataArray of stacked points."""
+
+    if isinstance(points_stacked, WalkingPass):
+        return points_stacked
+
+    return WalkingPass.from_dataarray(points_stacked)
+
+
+def as_grouped_points(points_grouped: Union[GroupedPoints, xr.DataArray]) -> GroupedPoints:
+    """Return grouped foot points as `GroupedPoints`, converting a DataArray with a coordinate of frames."""
+
+    if isinstance(points_grouped, GroupedPoints):
+        return points_grouped
+
+    return GroupedPoints.from_dataarray(points_grouped)
+
+
+def synthetic_walking_pass(n_frames: int, *, random_state: Optional[int] = None) -> WalkingPass:
+    """
+    Return a synthetic walking pass along the x-axis, with a stance phase of each foot every 30 frames.
+
+    Each foot is still for 20 frames, then swings forward by 120 cm in 10 frames.
+    The feet are half a cycle apart, at a depth of 210 and 190 cm.
+    Normal noise with a standard deviation of 1 cm is added to the foot points.
+
+    Parameters
+    ----------
+    n_frames : int
+        Number of frames.
+    random_state : int, optional
+        Seed of the noise.
+
+    Returns
+    -------
+    WalkingPass
+        Head and foot points of the walking pass.
+
+    Examples
+    --------
+    >>> walking_pass = synthetic_walking_pass(90, random_state=0)
+
+    >>> len(walking_pass)
+    90
+    >>> walking_pass.head[:2]
+    array([[-30., 150., 200.],
+           [-30., 150., 200.]])
+
+    """
+    rng = np.random.default_rng(random_state)
+    frames = np.arange(n_frames)
+
+    list_forward = []
+
+    for offset in (0, 15):
+        phase = (frames + offset) % 30
+        forward = 120 * ((frames + offset) // 30) + np.where(phase >= 20, 12 * (phase - 20), 0) - 60 * (offset > 0)
+        list_forward.append(forward)
+
+    points_a = np.column_stack((list_forward[0], np.zeros(n_frames), np.full(n_frames, 210)))
+    points_b = np.column_stack((list_forward[1], np.zeros(n_frames), np.full(n_frames, 190)))
+
+    forward_head = (list_forward[0] + list_forward[1]) / 2
+    points_head = np.column_stack((forward_head, np.full(n_frames, 150), np.full(n_frames, 200)))
+
+    points_a = points_a + rng.normal(0, 1, points_a.shape)
+    points_b = points_b + rng.normal(0, 1, points_b.shape)
+
+    return WalkingPass(frames, head=points_head, foot_a=points_a, foot_b=points_b)
@@ -0,0 +1,50 @@
+"""Benchmark the per-pass overhead of the contracts in each contract mode."""
+
+import timeit
+
+import pandas as pd
+
+import modules.contracts as co
+import modules.gait_parameters as gp
+import modules.phase_detection as pde
+import modules.side_assignment as sa
+from modules.walking_pass import synthetic_walking_pass
+
+
+def main():
+
+    list_rows = []
+
+    for n_frames in [90, 180, 360]:
+
+        walking_pass = synthetic_walking_pass(n_frames, random_state=0)
+
+        # The stance DataFrame of the pass, as input to the contract-checked stances_to_gait.
+        basis, points_grouped_inlier = sa.compute_basis(walking_pass)
+        labels_grouped_l, labels_grouped_r = pde.label_stances(points_grouped_inlier, basis)
+        df_stance = pde.get_stance_dataframe(points_grouped_inlier, labels_grouped_l, labels_grouped_r)
+
+        n_repeats = 20
+
+        for mode in co.MODES:
+
+            with co.policy(mode, every=10):
+
+                time_pass = timeit.timeit(lambda: gp.walking_pass_parameters(walking_pass), number=n_repeats)
+                time_stances = timeit.timeit(lambda: gp.stances_to_gait(df_stance), number=n_repeats)
+
+            list_rows.append((n_frames, len(df_stance), mode, time_pass / n_repeats, time_stances / n_repeats))
+
+    df_bench = pd.DataFrame(list_rows, columns=['n_frames', 'n_stances', 'mode', 's_pass', 's_stances_to_gait'])
+
+    # Overhead of each mode compared to no checks.
+    df_off = df_bench[df_bench['mode'] == 'off'].set_index('n_frames')
+
+    for col_time, col_overhead in [('s_pass', 'ms_overhead_pass'), ('s_stances_to_gait', 'ms_overhead_stances')]:
+        df_bench[col_overhead] = 1e3 * (df_bench[col_time] - df_bench.n_frames.map(df_off[col_time]))
+
+    print(df_bench.round(4).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
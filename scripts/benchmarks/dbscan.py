@@ -0,0 +1,137 @@
+"""Benchmark spatiotemporal DBSCAN on synthetic walking passes of 200 to 20,000 foot points."""
+
+import timeit
+from queue import Queue
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import cdist
+
+import modules.cluster as cl
+import modules.numpy_funcs as nf
+from modules.walking_pass import synthetic_walking_pass
+
+
+def sweep_query(points, times, eps_spatial, eps_temporal):
+    """Return a region query that only measures distances within the temporal window of the point."""
+
+    index = cl.SweepIndex(points, times, eps_spatial, eps_temporal)
+    starts, stops = index.windows()
+
+    # Position of each point in the time order.
+    positions = np.argsort(index.order)
+
+    def query(idx_pt):
+
+        candidates = index.order[starts[positions[idx_pt]] : stops[positions[idx_pt]]]
+
+        dist_temporal = cdist(index.times[[idx_pt]], index.times[candidates])[0]
+        dist_spatial = cdist(index.points[[idx_pt]], index.points[candidates])[0]
+
+        return set(candidates[(dist_spatial <= eps_spatial) & (dist_temporal <= eps_temporal)])
+
+    return query
+
+
+def dbscan_st_queue(points, times, eps_spatial, eps_temporal, min_pts):
+    """
+    Cluster with a region query for every visited point and a thread-safe queue (previous implementation).
+
+    The queries only search the temporal window of each point, so the dense matrices are not needed for large passes.
+
+    """
+    query = sweep_query(points, times, eps_spatial, eps_temporal)
+
+    n_points = len(points)
+    labels = np.zeros(n_points, dtype=int)
+
+    label_cluster = 0
+
+    for idx_pt in range(n_points):
+
+        if labels[idx_pt] != 0:
+            continue
+
+        set_neighbours = query(idx_pt)
+
+        if len(set_neighbours) < min_pts:
+            labels[idx_pt] = -1
+            continue
+
+        label_cluster += 1
+        labels[idx_pt] = label_cluster
+
+        queue_search = Queue()
+
+        for i in set_neighbours:
+            queue_search.put(i)
+
+        while not queue_search.empty():
+
+            idx_next = queue_search.get()
+
+            if labels[idx_next] == -1:
+                labels[idx_next] = label_cluster
+
+            elif labels[idx_next] == 0:
+                labels[idx_next] = label_cluster
+
+                set_neighbours_next = query(idx_next)
+
+                if len(set_neighbours_next) >= min_pts:
+                    for i in set_neighbours_next:
+                        queue_search.put(i)
+
+    labels[labels != -1] -= 1
+
+    return labels
+
+
+def synthetic_foot_points(n_points):
+    """Return the foot points of a synthetic walking pass on the floor (x-z plane) and their frames."""
+
+    walking_pass = synthetic_walking_pass(n_points // 2, random_state=0)
+
+    points = nf.interweave_rows(walking_pass.foot_a, walking_pass.foot_b)[:, [0, 2]]
+    frames = np.repeat(walking_pass.frames, 2)
+
+    return points, frames
+
+
+def main():
+
+    kwargs = dict(eps_spatial=5, eps_temporal=10, min_pts=7)
+
+    list_rows = []
+
+    for n_points in [200, 1000, 5000, 20000]:
+
+        points, frames = synthetic_foot_points(n_points)
+
+        labels = dbscan_st_queue(points, frames, **kwargs)
+        assert np.array_equal(cl.dbscan_st(points, frames, backend='sweep', **kwargs), labels)
+
+        n_repeats = max(1, 2000 // n_points)
+
+        time_queue = timeit.timeit(lambda: dbscan_st_queue(points, frames, **kwargs), number=n_repeats) / n_repeats
+        time_csr = (
+            timeit.timeit(lambda: cl.dbscan_st(points, frames, backend='sweep', **kwargs), number=n_repeats) / n_repeats
+        )
+
+        # The dense matrices of the matrix backend need 16 N^2 bytes.
+        if n_points <= 5000:
+            time_matrix = timeit.timeit(lambda: cl.dbscan_st(points, frames, **kwargs), number=n_repeats) / n_repeats
+        else:
+            time_matrix = np.nan
+
+        list_rows.append((n_points, labels.max() + 1, time_queue, time_csr, time_matrix, time_queue / time_csr))
+
+    df_bench = pd.DataFrame(
+        list_rows, columns=['n_points', 'n_clusters', 's_queue', 's_csr_sweep', 's_csr_matrix', 'speedup_sweep']
+    )
+
+    print(df_bench.round(4).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark the per-frame scoring of the shortest paths for various population sizes."""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import cdist
+
+import modules.pose_estimation as pe
+
+
+def get_scores_loop(dist_matrix, paths, label_adj_list, score_func):
+    """Compute the score matrix one connection at a time (previous implementation)."""
+
+    score_matrix = np.zeros(dist_matrix.shape)
+    n_paths, n_path_nodes = paths.shape
+
+    for i in range(n_paths):
+        for j in range(n_path_nodes):
+            for k in range(j, n_path_nodes):
+
+                if k in label_adj_list[j]:
+                    u, v = paths[i, j], paths[i, k]
+                    score_matrix[u, v] = score_func(dist_matrix[u, v], label_adj_list[j][k])
+
+    score_matrix[~np.isfinite(score_matrix)] = 0
+
+    return score_matrix
+
+
+def reduce_population_loop(population, paths):
+    """Reduce the population with a dictionary that maps the nodes (previous implementation)."""
+
+    path_nums = np.unique(paths)
+    pop_reduced = population[path_nums, :]
+
+    mapping = {k: v for k, v in zip(path_nums, range(len(path_nums)))}
+
+    paths_reduced = np.zeros(paths.shape, dtype=int)
+    n_paths, n_types = paths.shape
+
+    for i in range(n_paths):
+        for j in range(n_types):
+            paths_reduced[i, j] = mapping[paths[i, j]]
+
+    return pop_reduced, paths_reduced
+
+
+def score_frame(population, paths, label_adj_list, reduce_func, scores_func):
+    """Reduce the population of a frame and score the links along the shortest paths."""
+
+    pop_reduced, paths_reduced = reduce_func(population, paths)
+    dist_matrix = cdist(pop_reduced, pop_reduced)
+
+    return scores_func(dist_matrix, paths_reduced, label_adj_list, pe.score_func)
+
+
+def main():
+
+    rng = np.random.default_rng(0)
+
+    lengths = np.array([60, 20, 15, 20, 20])
+
+    label_adj_list_types = pe.lengths_to_adj_list(pe.TYPE_CONNECTIONS, lengths)
+    label_adj_list_parts = pe.lengths_to_adj_list(pe.PART_CONNECTIONS, lengths)
+
+    list_rows = []
+
+    for n_proposals in [10, 25, 50, 100, 200]:
+
+        # Spread the proposals over the six body part types.
+        labels = np.sort(np.append(np.arange(6), rng.integers(0, 6, size=n_proposals - 6)))
+        population = rng.uniform(-100, 100, size=(n_proposals, 3)) - np.outer(labels, [0, 25, 0])
+
+        dist_matrix = cdist(population, population)
+
+        prev, dist = pe.pop_shortest_paths_layered(dist_matrix, labels, label_adj_list_types, pe.cost_func)
+        paths, _ = pe.paths_to_foot(prev, dist, labels)
+
+        args_loop = (population, paths, label_adj_list_parts, reduce_population_loop, get_scores_loop)
+        args_array = (population, paths, label_adj_list_parts, pe.reduce_population, pe.get_scores)
+
+        assert np.array_equal(score_frame(*args_loop), score_frame(*args_array))
+
+        n_repeats = 200
+
+        time_loop = timeit.timeit(lambda: score_frame(*args_loop), number=n_repeats) / n_repeats
+        time_array = timeit.timeit(lambda: score_frame(*args_array), number=n_repeats) / n_repeats
+
+        list_rows.append((n_proposals, len(paths), 1e3 * time_loop, 1e3 * time_array, time_loop / time_array))
+
+    df_bench = pd.DataFrame(
+        list_rows, columns=['n_proposals', 'n_paths', 'ms_per_frame_loop', 'ms_per_frame_array', 'speedup']
+    )
+
+    print(df_bench.round(3).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,13 @@ from os.path import join
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import xarray as xr
 from cycler import cycler
 from matplotlib.cm import get_cmap
 from skspatial.transformation import transform_coordinates
 
 import modules.cluster as cl
 import modules.side_assignment as sa
+from modules.walking_pass import WalkingPass
 
 
 def main():
@@ -27,18 +27,14 @@ def main():
     points_a = np.stack(df_pass.L_FOOT)
     points_b = np.stack(df_pass.R_FOOT)
 
-    points_stacked = xr.DataArray(
-        np.dstack((points_a, points_b, points_head)),
-        coords={'frames': frames, 'cols': range(3), 'layers': ['points_a', 'points_b', 'points_head']},
-        dims=('frames', 'cols', 'layers'),
-    )
+    walking_pass = WalkingPass(frames, head=points_head, foot_a=points_a, foot_b=points_b)
 
-    basis, points_foot_grouped = sa.compute_basis(points_stacked)
+    basis, points_foot_grouped = sa.compute_basis(walking_pass)
 
-    signal_grouped = transform_coordinates(points_foot_grouped.values, basis.origin, [basis.forward])
-    values_side_grouped = transform_coordinates(points_foot_grouped.values, basis.origin, [basis.perp])
+    signal_grouped = transform_coordinates(points_foot_grouped.points, basis.origin, [basis.forward])
+    values_side_grouped = transform_coordinates(points_foot_grouped.points, basis.origin, [basis.perp])
 
-    frames_grouped = points_foot_grouped.coords['frames'].values
+    frames_grouped = points_foot_grouped.frames
 
     labels_grouped = cl.dbscan_st(signal_grouped, times=frames_grouped, eps_spatial=5, eps_temporal=10, min_pts=7)
     labels_grouped_l, labels_grouped_r = sa.assign_sides_grouped(frames_grouped, values_side_grouped, labels_grouped)
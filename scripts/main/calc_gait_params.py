@@ -1,38 +1,63 @@
 """Calculate gait parameters from Kinect data."""
 
+import argparse
 from os.path import join
 
 import numpy as np
 import pandas as pd
-import xarray as xr
 
 import modules.gait_parameters as gp
+import modules.parallel as par
+from modules.walking_pass import WalkingPass
 
 
-def main():
+def calc_pass(arrays, tuple_trial_pass, index_start, index_stop):
+    """Return the gait parameters of one walking pass, from a slice of the shared arrays."""
+
+    print(tuple_trial_pass)  # Print current pass just to show progress
+
+    frames = arrays['frames'][index_start:index_stop]
+
+    points_head = arrays['points_head'][index_start:index_stop]
+    points_a = arrays['points_a'][index_start:index_stop]
+    points_b = arrays['points_b'][index_start:index_stop]
+
+    # The arrays of the walking pass are views of the shared arrays.
+    # This is safe because the walking pass is not returned, and the gait parameters are new arrays.
+    walking_pass = WalkingPass(frames, head=points_head, foot_a=points_a, foot_b=points_b)
+
+    return gp.walking_pass_parameters(walking_pass)
+
+
+def main(jobs=1):
 
     df_selected_passes = pd.read_pickle(join('data', 'kinect', 'df_selected_passes.pkl'))
 
     tuples_trial_pass = df_selected_passes.index.droplevel('frame').values
     dict_gait = dict.fromkeys(tuples_trial_pass)
 
-    for tuple_trial_pass, df_pass in df_selected_passes.groupby(level=[0, 1]):
+    # The rows are sorted by pass, so each pass is a contiguous slice of the arrays.
+    dict_indices = df_selected_passes.groupby(level=[0, 1]).indices
+    df_sorted = df_selected_passes.iloc[np.concatenate(list(dict_indices.values()))]
+
+    arrays = {
+        'frames': df_sorted.reset_index().frame.values,
+        'points_head': np.stack(df_sorted.HEAD),
+        'points_a': np.stack(df_sorted.L_FOOT),
+        'points_b': np.stack(df_sorted.R_FOOT),
+    }
 
-        print(tuple_trial_pass)
+    index_stops = np.cumsum([len(indices) for indices in dict_indices.values()])
+    index_starts = index_stops - [len(indices) for indices in dict_indices.values()]
 
-        frames = df_pass.reset_index().frame.values
+    list_args = list(zip(dict_indices.keys(), index_starts, index_stops))
 
-        points_head = np.stack(df_pass.HEAD)
-        points_a = np.stack(df_pass.L_FOOT)
-        points_b = np.stack(df_pass.R_FOOT)
+    # The worker processes read the points from shared memory.
+    task_results = par.map_tasks_shared(calc_pass, arrays, list_args, jobs=jobs)
 
-        points_stacked = xr.DataArray(
-            np.dstack((points_a, points_b, points_head)),
-            coords={'frames': frames, 'cols': range(3), 'layers': ['points_a', 'points_b', 'points_head']},
-            dims=('frames', 'cols', 'layers'),
-        )
+    for (tuple_trial_pass, _, _), task_result in zip(list_args, task_results):
 
-        df_gait_pass = gp.walking_pass_parameters(points_stacked)
+        df_gait_pass = task_result.result
 
         if not df_gait_pass.empty:
             dict_gait[tuple_trial_pass] = df_gait_pass
@@ -43,6 +68,12 @@ def main():
     # Save the gait parameters for each trial
     df_gait.to_pickle(join('data', 'kinect', 'df_gait.pkl'))
 
+    print(par.summarize_workers(task_results, [index_stop - index_start for _, index_start, index_stop in list_args]))
+
 
 if __name__ == '__main__':
-    main()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=1, help="Number of worker processes (default 1).")
+
+    main(parser.parse_args().jobs)
@@ -1,14 +1,24 @@
 """Estimate lengths of the body for each trial."""
 
+import argparse
 import time
 from os.path import join
 
 import pandas as pd
 
+import modules.parallel as par
 import modules.pose_estimation as pe
 
 
-def main():
+def estimate_trial(trial_name, df_hypo_trial):
+    """Estimate the lengths of the body links in a walking trial."""
+
+    print(trial_name)
+
+    return pe.estimate_lengths(df_hypo_trial, engine='layered', atol=0.1)
+
+
+def main(jobs=1):
 
     df_hypo = pd.read_pickle(join('data', 'kinect', 'df_hypo.pkl'))
     trials_to_run = df_hypo.index.get_level_values(0).unique()
@@ -17,17 +27,13 @@ def main():
 
     # %% Calculate lengths for each walking trial
 
-    list_lengths = []
-
-    for i, (trial_name, df_hypo_trial) in enumerate(df_hypo.groupby(level=0)):
+    list_args = [*df_hypo.groupby(level=0)]
 
-        print(trial_name)
+    task_results = par.map_tasks(estimate_trial, list_args, jobs=jobs)
 
-        lengths_estimated = pe.estimate_lengths(df_hypo_trial, atol=0.1)
+    list_lengths = [x.result for x in task_results]
 
-        list_lengths.append(lengths_estimated)
-
-    df_lengths = pd.DataFrame(list_lengths, index=trials_to_run)
+    df_lengths = pd.DataFrame(list_lengths, index=[trial_name for trial_name, _ in list_args]).reindex(trials_to_run)
     df_lengths.to_csv(join('data', 'kinect', 'kinect_lengths.csv'))
 
     # %% Calculate run-time metrics
@@ -45,6 +51,12 @@ def main():
         )
     )
 
+    print(par.summarize_workers(task_results, [df_hypo_trial.shape[0] for _, df_hypo_trial in list_args]))
+
 
 if __name__ == '__main__':
-    main()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=1, help="Number of worker processes (default 1).")
+
+    main(parser.parse_args().jobs)
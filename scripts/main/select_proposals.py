@@ -1,15 +1,44 @@
 """Select the best body part positions from multiple joint proposals."""
 
+import argparse
 import time
 from os.path import join
 
 import numpy as np
 import pandas as pd
 
+import modules.parallel as par
 import modules.pose_estimation as pe
 
 
-def main():
+def select_trial(trial_name, df_trial, lengths, radii):
+    """Return the best head and foot positions on each frame of a trial."""
+
+    print(trial_name)  # Print current trial just to show progress
+
+    # Array to hold best head and foot positions on each frame
+    array_selected = np.full((df_trial.shape[0], 3), fill_value=None)
+
+    # The body graph of the trial is compiled once for all frames.
+    # The layered engine lets the frames be processed in batches.
+    processor = pe.FrameProcessor(lengths, radii, pe.cost_func, pe.score_func, engine='layered')
+
+    # Select the best two shortest paths on all frames of the trial
+    pops_1, pops_2 = processor.process_frames(df_trial.population, df_trial.labels)
+
+    for index_row, (pos_1, pos_2) in enumerate(zip(pops_1, pops_2)):
+
+        # Positions of the best head and two feet
+        array_selected[index_row, 0] = pos_1[0, :]
+        array_selected[index_row, 1] = pos_1[-1, :]
+        array_selected[index_row, 2] = pos_2[-1, :]
+
+    # The left and right foot labels are just assumptions at this point.
+    # They are later given correct L/R labels.
+    return pd.DataFrame(array_selected, index=df_trial.index, columns=['HEAD', 'L_FOOT', 'R_FOOT'])
+
+
+def main(jobs=1):
 
     radii = [i for i in range(6)]
 
@@ -22,37 +51,18 @@ def main():
     length_path = join('data', 'kinect', 'kinect_lengths.csv')
     df_length = pd.read_csv(length_path, index_col=0)
 
-    # Pre-allocate array to hold best head and foot positions
-    # on each frame
-    array_selected = np.full((n_frames_total, 3), fill_value=None)
-
     t = time.time()
-    index_row = 0
 
-    for trial_name, df_trial in df_hypo.groupby(level=0):
+    # Each trial is processed with its own estimated lengths
+    list_args = [
+        (trial_name, df_trial, df_length.loc[trial_name], radii)
+        for trial_name, df_trial in df_hypo.groupby(level=0)
+    ]
 
-        print(trial_name)  # Print current trial just to show progress
+    task_results = par.map_tasks(select_trial, list_args, jobs=jobs)
 
-        lengths = df_length.loc[trial_name]  # Read estimated lengths for trial
-
-        for tuple_frame in df_trial.itertuples():
-
-            population, labels = tuple_frame.population, tuple_frame.labels
-
-            # Select the best two shortest paths
-            pos_1, pos_2 = pe.process_frame(population, labels, lengths, radii, pe.cost_func, pe.score_func)
-
-            # Positions of the best head and two feet
-            array_selected[index_row, 0] = pos_1[0, :]
-            array_selected[index_row, 1] = pos_1[-1, :]
-            array_selected[index_row, 2] = pos_2[-1, :]
-
-            index_row += 1
-
-    # DataFrame of selected head and foot positions.
-    # The left and right foot labels are just assumptions at this point.
-    # They are later given correct L/R labels.
-    df_selected = pd.DataFrame(array_selected, index=df_hypo.index, columns=['HEAD', 'L_FOOT', 'R_FOOT'])
+    # DataFrame of selected head and foot positions, in the row order of the hypotheses.
+    df_selected = pd.concat([x.result for x in task_results]).reindex(df_hypo.index)
 
     df_selected.to_pickle(join('data', 'kinect', 'df_selected.pkl'))
 
@@ -71,6 +81,12 @@ def main():
         )
     )
 
+    print(par.summarize_workers(task_results, [args[1].shape[0] for args in list_args]))
+
 
 if __name__ == '__main__':
-    main()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=1, help="Number of worker processes (default 1).")
+
+    main(parser.parse_args().jobs)
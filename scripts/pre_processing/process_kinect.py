@@ -1,5 +1,6 @@
 """Transform raw data from the Kinect into a pandas DataFrame."""
 
+import io
 from os.path import join
 
 import numpy as np
@@ -9,6 +10,137 @@ import analysis.images as im
 import modules.pose_estimation as pe
 from modules.constants import PART_TYPES
 
+# Number of lines in the header of a raw Kinect file
+N_HEADER_LINES = 22
+
+
+def find_footer(file, block_size=1024):
+    """Return the position of the last non-empty line of a binary file."""
+
+    file_size = file.seek(0, io.SEEK_END)
+
+    while True:
+
+        # Search backwards from the end of the file in larger blocks
+        # until the start of the last line is found.
+        position = max(file_size - block_size, 0)
+        file.seek(position)
+
+        tail = file.read().rstrip(b'\r\n')
+        index_newline = tail.rfind(b'\n')
+
+        if index_newline != -1 or position == 0:
+            return position + index_newline + 1
+
+        block_size *= 2
+
+
+class DataStream(io.RawIOBase):
+    """
+    Binary stream of the data lines of a raw Kinect file.
+
+    The stream starts after the header and stops before the last line,
+    which says "Quit button pressed".
+
+    """
+
+    def __init__(self, file_path):
+
+        super().__init__()
+
+        self.file = open(file_path, 'rb')
+
+        for _ in range(N_HEADER_LINES):
+            self.file.readline()
+
+        position_start = self.file.tell()
+        self.position_stop = find_footer(self.file)
+
+        self.file.seek(position_start)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+
+        n_bytes = max(min(len(buffer), self.position_stop - self.file.tell()), 0)
+        data = self.file.read(n_bytes)
+
+        buffer[: len(data)] = data
+
+        return len(data)
+
+    def close(self):
+
+        self.file.close()
+        super().close()
+
+
+def read_raw(file_path, n_coord_cols, chunksize=10000):
+    """
+    Return the position hypotheses of a raw Kinect file.
+
+    The data lines are parsed with the C engine in blocks of rows,
+    so the whole file is never held in memory as a table.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the raw text file.
+    n_coord_cols : int
+        Number of columns for the position coordinates.
+    chunksize : int, optional
+        Number of rows in each block (default 10000).
+
+    Returns
+    -------
+    DataFrame
+        Coordinates of the positions, indexed by frame and part.
+        The coordinates of the confidence position and the rows that are all nans are dropped.
+        The rows are cropped at the max frame number (the text file loops back to the beginning).
+
+    """
+    coord_cols = list(range(3, n_coord_cols))
+
+    max_frame, last_index = None, None
+    list_blocks = []
+
+    with DataStream(file_path) as stream:
+
+        reader = pd.read_csv(
+            io.BufferedReader(stream),
+            header=None,
+            names=[i for i in range(-2, n_coord_cols)],
+            sep='\t',
+            chunksize=chunksize,
+        )
+
+        for df_block in reader:
+
+            # Drop the first three numeric columns
+            # (these are the coordinates of the confidence position)
+            df_block = df_block.drop([0, 1, 2], axis=1)
+
+            frames = df_block[-2].values
+
+            # The row index continues across blocks, so it locates the last row of the max frame in the file.
+            if max_frame is None or frames.max() >= max_frame:
+                max_frame = frames.max()
+                last_index = df_block.index[np.nonzero(frames == max_frame)[0][-1]]
+
+            # Drop rows that are all nans
+            list_blocks.append(df_block.dropna(how='all', subset=coord_cols))
+
+    df_raw = pd.concat(list_blocks)
+
+    # Crop the DataFrame at the max frame number
+    df_cropped = df_raw[df_raw.index < last_index]
+
+    # Label some columns
+    df_cropped = df_cropped.rename(columns={-2: 'frame', -1: 'part'})
+
+    return df_cropped.set_index(['frame', 'part'])
+
 
 def main():
 
@@ -30,33 +162,7 @@ def main():
 
         file_path = join(load_dir, trial_name + '.txt')
 
-        df_raw = pd.read_csv(
-            file_path,
-            skiprows=range(22),
-            header=None,
-            names=[i for i in range(-2, n_coord_cols)],
-            sep='\t',
-            skipfooter=1,  # The last night says "Quit button pressed"
-            engine='python',
-        )
-
-        # Label some columns
-        df_raw = df_raw.rename(columns={-2: 'frame', -1: 'part'})
-
-        # Crop the DataFrame at the max frame number
-        # (the text file loops back to the beginning)
-        max_frame = df_raw.frame.max()
-        last_index = np.nonzero(df_raw.frame.values == max_frame)[0][-1]
-        df_cropped = df_raw.iloc[:last_index]
-
-        df_cropped = df_cropped.set_index(['frame', 'part'])
-
-        # Drop the first three numeric columns
-        # (these are the coordinates of the confidence position)
-        df_hypo_raw = df_cropped.drop([0, 1, 2], axis=1)
-
-        # Drop rows that are all nans
-        df_hypo_raw = df_hypo_raw.dropna(how='all')
+        df_hypo_raw = read_raw(file_path, n_coord_cols)
 
         # Convert elements floats because they
         # are 3D coordinates
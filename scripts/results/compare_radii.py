@@ -1,67 +1,90 @@
 """Calculate accuracies for various sphere radii."""
 
+import argparse
 from os.path import join
 
 import numpy as np
 import pandas as pd
 
+import modules.parallel as par
 import modules.pose_estimation as pe
 
 
-def main():
+def select_trial_radii(df_hypo_trial, lengths, radii_max):
+    """Return the best head and foot positions on each frame of a trial, for each max radius."""
 
-    kinect_dir = join('data', 'kinect')
+    # Each max radius uses the radii from zero to the max,
+    # so one sweep over the largest set of radii gives the selections for all of them.
+    radii = [i for i in range(max(radii_max) + 1)]
 
-    df_hypo = pd.read_pickle(join(kinect_dir, 'df_hypo.pkl'))
-    df_truth = pd.read_pickle(join(kinect_dir, 'df_truth.pkl'))
+    # The body graph of the trial is compiled once for all frames
+    processor = pe.FrameProcessor(lengths, radii, pe.cost_func, pe.score_func)
 
-    df_length = pd.read_csv(join(kinect_dir, 'kinect_lengths.csv'), index_col=0)
+    # Pre-allocate array to hold best head and foot positions
+    # on each frame, for each max radius
+    array_selected = np.full((len(radii), df_hypo_trial.shape[0], 3), fill_value=None)
 
-    labelled_trial_names = df_truth.index.get_level_values(0).unique()
-    df_hypo_labelled = df_hypo.loc[labelled_trial_names]
+    for index_row, tuple_frame in enumerate(df_hypo_trial.itertuples()):
 
-    list_dfs_radii = []
-    radii_max = range(11)
+        population, labels = tuple_frame.population, tuple_frame.labels
 
-    for r_max in radii_max:
+        # Select the best two shortest paths for each prefix of the radii
+        list_pops = processor.process_sweep(population, labels)
 
-        radii = [i for i in range(r_max + 1)]
+        for index_radius, (pos_1, pos_2) in enumerate(list_pops):
 
-        # Pre-allocate array to hold best head and foot positions
-        # on each frame
-        array_selected = np.full((df_hypo_labelled.shape[0], 3), fill_value=None)
+            # Positions of the best head and two feet
+            array_selected[index_radius, index_row, 0] = pos_1[0, :]
+            array_selected[index_radius, index_row, 1] = pos_1[-1, :]
+            array_selected[index_radius, index_row, 2] = pos_2[-1, :]
 
-        index_row = 0
+    # DataFrames of selected head and foot positions.
+    # The left and right feet are just assumptions at this point.
+    # They are later given correct L/R labels.
+    list_dfs_radii = [
+        pd.DataFrame(array_selected[r_max], index=df_hypo_trial.index, columns=['HEAD', 'L_FOOT', 'R_FOOT'])
+        for r_max in radii_max
+    ]
 
-        for trial_name, df_hypo_trial in df_hypo_labelled.groupby(level=0):
+    return list_dfs_radii
 
-            lengths = df_length.loc[trial_name]  # Read estimated lengths for trial
 
-            for tuple_frame in df_hypo_trial.itertuples():
+def main(jobs=1):
 
-                population, labels = tuple_frame.population, tuple_frame.labels
+    kinect_dir = join('data', 'kinect')
 
-                # Select the best two shortest paths
-                pos_1, pos_2 = pe.process_frame(population, labels, lengths, radii, pe.cost_func, pe.score_func)
+    df_hypo = pd.read_pickle(join(kinect_dir, 'df_hypo.pkl'))
+    df_truth = pd.read_pickle(join(kinect_dir, 'df_truth.pkl'))
 
-                # Positions of the best head and two feet
-                array_selected[index_row, 0] = pos_1[0, :]
-                array_selected[index_row, 1] = pos_1[-1, :]
-                array_selected[index_row, 2] = pos_2[-1, :]
+    df_length = pd.read_csv(join(kinect_dir, 'kinect_lengths.csv'), index_col=0)
 
-                index_row += 1
+    labelled_trial_names = df_truth.index.get_level_values(0).unique()
+    df_hypo_labelled = df_hypo.loc[labelled_trial_names]
+
+    radii_max = range(11)
 
-        # DataFrame of selected head and foot positions.
-        # The left and right feet are just assumptions at this point.
-        # They are later given correct L/R labels.
-        df_selected = pd.DataFrame(array_selected, index=df_hypo_labelled.index, columns=['HEAD', 'L_FOOT', 'R_FOOT'])
+    list_args = [
+        (df_hypo_trial, df_length.loc[trial_name], radii_max)
+        for trial_name, df_hypo_trial in df_hypo_labelled.groupby(level=0)
+    ]
 
-        list_dfs_radii.append(df_selected)
+    task_results = par.map_tasks(select_trial_radii, list_args, jobs=jobs)
+
+    # For each max radius, combine the trials in the row order of the hypotheses.
+    list_dfs_radii = [
+        pd.concat([x.result[i] for x in task_results]).reindex(df_hypo_labelled.index) for i in range(len(radii_max))
+    ]
 
     df_radii = pd.concat(list_dfs_radii, keys=radii_max, names=['max_radius'])
 
     df_radii.to_pickle(join(kinect_dir, 'df_radii.pkl'))
 
+    print(par.summarize_workers(task_results, [args[0].shape[0] for args in list_args]))
+
 
 if __name__ == '__main__':
-    main()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=1, help="Number of worker processes (default 1).")
+
+    main(parser.parse_args().jobs)
@@ -5,12 +5,13 @@ from os.path import join
 import numpy as np
 import pandas as pd
 import xarray as xr
-from dpcontracts import ensure
 
 import modules.phase_detection as pde
 import modules.point_processing as pp
 import modules.side_assignment as sa
 import modules.xarray_funcs as xrf
+from modules.contracts import ensure
+from modules.walking_pass import WalkingPass
 
 
 @ensure("The arrays must have the same shape", lambda _, result: result[0].shape == result[1].shape)
@@ -74,18 +75,14 @@ def main():
             points_a = np.stack(df_pass.L_FOOT)
             points_b = np.stack(df_pass.R_FOOT)
 
-            points_stacked = xr.DataArray(
-                np.dstack((points_a, points_b, points_head)),
-                coords={'frames': frames, 'cols': range(3), 'layers': ['points_a', 'points_b', 'points_head']},
-                dims=['frames', 'cols', 'layers'],
-            )
+            walking_pass = WalkingPass(frames, head=points_head, foot_a=points_a, foot_b=points_b)
 
-            basis, points_grouped_inlier = sa.compute_basis(points_stacked)
+            basis, points_grouped_inlier = sa.compute_basis(walking_pass)
 
             labels_grouped_l, labels_grouped_r = pde.label_stances(points_grouped_inlier, basis)
 
-            points_pass_l = points_grouped_inlier[labels_grouped_l != -1]
-            points_pass_r = points_grouped_inlier[labels_grouped_r != -1]
+            points_pass_l = points_grouped_inlier[labels_grouped_l != -1].to_dataarray()
+            points_pass_r = points_grouped_inlier[labels_grouped_r != -1].to_dataarray()
 
             # Ensure all frames are unique by taking mean of points on the same frame.
             points_pass_l = xrf.unique_frames(points_pass_l, lambda rows: np.mean(rows, axis=0))
@@ -0,0 +1,54 @@
+"""Compare stance detection and gait parameters for a grid of DBSCAN hyperparameters."""
+
+import itertools
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+import modules.gait_parameters as gp
+from modules.walking_pass import WalkingPass
+
+
+def main():
+
+    df_selected_passes = pd.read_pickle(join('data', 'kinect', 'df_selected_passes.pkl'))
+
+    # The default setting of the stance detection is (5, 10, 7).
+    settings = list(itertools.product([3, 4, 5, 6, 7], [5, 10, 15], [5, 7, 9]))
+
+    dict_sweep = {}
+
+    for tuple_trial_pass, df_pass in df_selected_passes.groupby(level=[0, 1]):
+
+        print(tuple_trial_pass)
+
+        frames = df_pass.reset_index().frame.values
+
+        points_head = np.stack(df_pass.HEAD)
+        points_a = np.stack(df_pass.L_FOOT)
+        points_b = np.stack(df_pass.R_FOOT)
+
+        walking_pass = WalkingPass(frames, head=points_head, foot_a=points_a, foot_b=points_b)
+
+        dict_sweep[tuple_trial_pass] = gp.walking_pass_parameters_grid(walking_pass, settings)
+
+    # Tidy table with one row for each walking pass and setting.
+    df_sweep = pd.concat(dict_sweep, names=['trial_name', 'num_pass'])
+    df_sweep.to_pickle(join('data', 'kinect', 'df_stance_sweep.pkl'))
+
+    # Total counts and median gait parameters of each setting.
+    levels_setting = ['eps_spatial', 'eps_temporal', 'min_pts']
+    columns_count = ['n_stances_l', 'n_stances_r', 'n_strides']
+
+    df_counts = df_sweep[columns_count].groupby(level=levels_setting).sum()
+    df_params = df_sweep[gp.GAIT_PARAMS].groupby(level=levels_setting).median()
+
+    df_summary = pd.concat([df_counts, df_params], axis=1)
+
+    with open(join('results', 'tables', 'stance_sweep.csv'), 'w') as file:
+        file.write(df_summary.round(2).to_csv())
+
+
+if __name__ == '__main__':
+    main()
@@ -5,3 +5,5 @@ from typing import Callable
 def require(msg: str, func: Callable) -> Callable: ...
 
 def ensure(msg: str, func: Callable) -> Callable: ...
+
+def get_wrapped_func(func: Callable) -> Callable: ...
@@ -1,12 +1,20 @@
 
-from typing import Callable, Iterable, Iterator, Tuple
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
 
 from modules.typing import array_like
 
 
+class MultiIndex:
+
+    def __init__(self, levels: Sequence, codes: Sequence, names: Optional[Sequence[str]] = None): ...
+
+    @classmethod
+    def from_tuples(cls, tuples: Iterable[Tuple], names: Optional[Sequence[str]] = None): ...
+
+
 class DataFrame:
 
-    def __init__(self, data: Iterable): ...
+    def __init__(self, data: Optional[Iterable] = None, index: Any = None): ...
 
     def assign(self, **kwargs) -> 'DataFrame': ...
 
@@ -14,6 +22,8 @@ class DataFrame:
 
     def pipe(self, func: Callable, *args, **kwargs): ...
 
+    def groupby(self, by=None, **kwargs): ...
+
     def itertuples(self, index: bool = True, name: str = 'Pandas') -> Iterator: ...
 
     @property
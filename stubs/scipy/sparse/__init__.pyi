@@ -0,0 +1,7 @@
+
+from typing import Any, Optional, Tuple
+
+
+class coo_matrix:
+
+    def __init__(self, arg1: Any, shape: Optional[Tuple[int, int]] = None, dtype: Any = None, copy: bool = False): ...
@@ -0,0 +1,9 @@
+
+from typing import Any, Tuple
+
+import numpy as np
+
+
+def connected_components(
+    csgraph: Any, directed: bool = True, connection: str = 'weak', return_labels: bool = True
+) -> Tuple[int, np.ndarray]: ...
@@ -18,6 +18,8 @@ class LineModelND(BaseModel):
 
         self.params: Tuple[ndarray, ndarray]
 
+    def estimate(self, data: array_like) -> bool: ...
+
 
 M = TypeVar('M', bound=BaseModel)
 
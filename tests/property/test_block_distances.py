@@ -0,0 +1,67 @@
+"""Property tests for block-sparse distance matrices."""
+
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import given
+from hypothesis.extra.numpy import arrays
+from scipy.spatial.distance import cdist
+
+from modules.block_distances import BlockDistances, label_layers
+from modules.constants import PART_CONNECTIONS, TYPE_CONNECTIONS
+
+
+@st.composite
+def labelled_points(draw):
+    """Generate points sorted by label, with every label from 0 to 5."""
+    counts = draw(
+        st.lists(st.integers(min_value=1, max_value=5), min_size=6, max_size=6)
+    )
+    labels = np.repeat(np.arange(6), counts)
+
+    population = draw(
+        arrays(
+            'float',
+            (len(labels), 3),
+            elements=st.floats(min_value=-50, max_value=50),
+        )
+    )
+
+    return population, labels
+
+
+@given(
+    labelled_points(), st.sampled_from([TYPE_CONNECTIONS, PART_CONNECTIONS])
+)
+def test_block_distances(population_labelled, label_pairs):
+    """Test that the blocks match the full distance matrix."""
+    population, labels = population_labelled
+
+    dist_matrix = cdist(population, population)
+    dist_blocks = BlockDistances(population, labels, label_pairs)
+
+    layers = label_layers(labels)
+
+    is_connected = np.zeros(dist_matrix.shape, dtype=bool)
+
+    for label_a, label_b in label_pairs:
+
+        layer_a, layer_b = layers[label_a], layers[label_b]
+        is_connected[layer_a, layer_b] = True
+
+        assert np.array_equal(
+            dist_blocks[layer_a, layer_b], dist_matrix[layer_a, layer_b]
+        )
+
+    dist_dense = np.asarray(dist_blocks)
+
+    assert np.array_equal(dist_dense[is_connected], dist_matrix[is_connected])
+    assert np.isnan(dist_dense[~is_connected]).all()
+
+    nodes_u, nodes_v = np.nonzero(np.ones(dist_matrix.shape, dtype=bool))
+
+    assert np.array_equal(
+        dist_blocks[nodes_u, nodes_v],
+        dist_dense[nodes_u, nodes_v],
+        equal_nan=True,
+    )
+    assert dist_blocks.nbytes == 8 * is_connected.sum()
@@ -0,0 +1,119 @@
+"""Property tests for clustering points in space."""
+
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import given
+from hypothesis.extra.numpy import arrays
+from numpy.testing import assert_array_equal
+
+import modules.cluster as cl
+
+eps_spatial_values = st.sampled_from([0.1, 0.5, 1, 2])
+eps_temporal_values = st.sampled_from([0.1, 0.5, 1, 3, 5, 10])
+min_pts_values = st.integers(min_value=1, max_value=5)
+
+
+@st.composite
+def points_times(draw, n_dim=2):
+    """Generate points on a grid of 0.1 and their integer times."""
+    n_points = draw(st.integers(min_value=1, max_value=60))
+
+    # Points on a grid have distances exactly equal to eps.
+    points = draw(
+        arrays(
+            'float',
+            (n_points, n_dim),
+            elements=st.integers(min_value=0, max_value=60),
+        )
+    )
+    times = draw(
+        arrays(
+            'int',
+            n_points,
+            elements=st.integers(min_value=0, max_value=30),
+        )
+    )
+
+    return points / 10, times
+
+
+@given(
+    points_times(),
+    eps_spatial_values,
+    eps_temporal_values,
+    min_pts_values,
+)
+def test_dbscan_st_backends(points_times, eps_spatial, eps_temporal, min_pts):
+    """Test that the sweep backend gives the same labels as the matrices."""
+    points, times = points_times
+
+    labels = cl.dbscan_st(points, times, eps_spatial, eps_temporal, min_pts)
+    labels_sweep = cl.dbscan_st(
+        points, times, eps_spatial, eps_temporal, min_pts, backend='sweep'
+    )
+
+    assert_array_equal(labels_sweep, labels)
+
+
+@given(
+    points_times(n_dim=1),
+    eps_spatial_values,
+    eps_temporal_values,
+    min_pts_values,
+)
+def test_dbscan_st_1d(points_times, eps_spatial, eps_temporal, min_pts):
+    """Test that the 1D signal clustering matches the general clustering."""
+    points, times = points_times
+
+    labels = cl.dbscan_st(points, times, eps_spatial, eps_temporal, min_pts)
+    labels_1d = cl.dbscan_st_1d(
+        points.ravel(), times, eps_spatial, eps_temporal, min_pts
+    )
+
+    assert_array_equal(labels_1d, labels)
+
+
+@given(
+    points_times(),
+    eps_spatial_values,
+    eps_temporal_values,
+    min_pts_values,
+)
+def test_dbscan_st_online(points_times, eps_spatial, eps_temporal, min_pts):
+    """Test that clustering the frames in time order matches all at once."""
+    points, times = points_times
+    times = np.sort(times)
+
+    labels = cl.dbscan_st(points, times, eps_spatial, eps_temporal, min_pts)
+    labels_online = cl.dbscan_st_online(
+        points, times, eps_spatial, eps_temporal, min_pts
+    )
+
+    assert_array_equal(labels_online, labels)
+
+
+@given(
+    points_times(),
+    st.lists(
+        st.tuples(eps_spatial_values, eps_temporal_values, min_pts_values),
+        min_size=1,
+        max_size=6,
+        unique=True,
+    ),
+)
+def test_dbscan_st_grid(points_times, settings):
+    """Test that the grid of settings matches clustering with each setting."""
+    points, times = points_times
+
+    dict_labels = cl.dbscan_st_grid(points, times, settings)
+
+    assert set(dict_labels) == set(settings)
+
+    for eps_spatial, eps_temporal, min_pts in settings:
+
+        labels_expected = cl.dbscan_st(
+            points, times, eps_spatial, eps_temporal, min_pts
+        )
+        assert_array_equal(
+            dict_labels[eps_spatial, eps_temporal, min_pts], labels_expected
+        )
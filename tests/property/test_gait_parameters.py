@@ -1,10 +1,51 @@
 """Property tests for gait parameters."""
 
+import hypothesis.strategies as st
 import numpy as np
+import pandas as pd
+import pytest
 from hypothesis import assume, given
+from hypothesis.extra.numpy import arrays
 from skspatial.tests.property.strategies import consistent_dim, points
 
 import modules.gait_parameters as gp
+import modules.phase_detection as pde
+
+
+@st.composite
+def stance_tables(draw):
+    """Generate a table of stance phases sorted by initial frame."""
+    n_stances = draw(st.integers(min_value=3, max_value=25))
+
+    frame_i = np.sort(
+        draw(
+            st.lists(
+                st.integers(min_value=0, max_value=1000),
+                min_size=n_stances,
+                max_size=n_stances,
+                unique=True,
+            )
+        )
+    )
+    durations = draw(
+        arrays(
+            'int', n_stances, elements=st.integers(min_value=0, max_value=30)
+        )
+    )
+
+    return pde.StanceTable(
+        num_stride=np.array(draw(st.permutations(range(n_stances)))),
+        frame_i=frame_i,
+        frame_f=frame_i + durations,
+        position=draw(
+            arrays(
+                'float',
+                (n_stances, 3),
+                elements=st.integers(min_value=-300, max_value=300),
+            )
+        ),
+        side=draw(arrays('<U1', n_stances, elements=st.sampled_from('LR'))),
+    )
 
 
 @given(consistent_dim(3 * [points]))
@@ -26,3 +67,21 @@ def test_pythagorean(points):
     )
 
     assert np.isclose(dict_spatial['absolute_step_length'], hypotenuse)
+
+
+@given(stance_tables())
+def test_stances_to_gait_batch(stances):
+    """Test that the strides computed at once match one stride at a time."""
+    try:
+        df_gait = gp.stances_to_gait(stances.to_dataframe())
+
+    except ValueError:
+        # Foot A is in the same position at the start and end of a stride.
+        with pytest.raises(ValueError):
+            gp.stances_to_gait_batch(stances)
+
+        return
+
+    df_gait_batch = gp.stances_to_gait_batch(stances)
+
+    pd.testing.assert_frame_equal(df_gait_batch, df_gait, rtol=1e-12)
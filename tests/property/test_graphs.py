@@ -27,3 +27,32 @@ def test_adj_list_conversion(adj_matrix):
     adj_matrix_new = gr.adj_list_to_matrix(adj_list)
 
     assert np.array_equal(adj_matrix, adj_matrix_new)
+
+
+@st.composite
+def labelled_distances(draw):
+    """Generate a distance matrix of points sorted by label."""
+    counts = draw(st.lists(st.integers(min_value=1, max_value=4), min_size=1, max_size=5))
+    labels = np.repeat(np.arange(len(counts)), counts)
+
+    points = draw(arrays('float', (len(labels), 2), st.floats(min_value=-50, max_value=50)))
+
+    return np.sqrt(((points[:, np.newaxis] - points) ** 2).sum(axis=-1)), labels
+
+
+@given(labelled_distances())
+def test_points_to_csr(distances_labelled):
+    """Test that reading the label blocks gives the graph of the full adjacency matrix."""
+    dist_matrix, labels = distances_labelled
+
+    n_labels = labels.max() + 1
+    label_adj_list = {a: {b: float(b - a) for b in range(a + 1, n_labels)} for a in range(n_labels)}
+
+    def weight_func(a, b):
+        return np.where(a > 20, np.nan, abs(a - b))
+
+    csr_graph = gr.points_to_csr(dist_matrix, labels, label_adj_list, weight_func)
+    csr_graph_dense = gr.adj_matrix_to_csr(gr.points_to_adj_matrix(dist_matrix, labels, label_adj_list, weight_func))
+
+    for array, array_dense in zip(csr_graph, csr_graph_dense):
+        assert np.array_equal(array, array_dense)
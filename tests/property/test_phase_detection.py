@@ -0,0 +1,79 @@
+"""Property tests for detecting the phases of a foot."""
+
+import hypothesis.strategies as st
+import numpy as np
+import numpy.testing as npt
+from hypothesis import given
+from hypothesis.extra.numpy import arrays
+
+import modules.phase_detection as pde
+from modules.walking_pass import GroupedPoints
+
+
+@st.composite
+def labelled_feet(draw):
+    """Generate two foot points on each frame with left and right labels."""
+    n_frames = draw(st.integers(min_value=1, max_value=50))
+    n_points = 2 * n_frames
+
+    points = draw(
+        arrays(
+            'float',
+            (n_points, 3),
+            elements=st.floats(min_value=-100, max_value=100),
+        )
+    )
+    labels_grouped = draw(
+        arrays(
+            'int',
+            n_points,
+            elements=st.integers(min_value=-1, max_value=11),
+        )
+    )
+    is_left = draw(arrays('bool', n_points))
+
+    labels_grouped_l = np.where(is_left, labels_grouped, -1)
+    labels_grouped_r = np.where(~is_left, labels_grouped, -1)
+
+    points_grouped = GroupedPoints(np.repeat(np.arange(n_frames), 2), points)
+
+    return points_grouped, labels_grouped_l, labels_grouped_r
+
+
+@given(labelled_feet())
+def test_stance_table(labelled_feet):
+    """Test that the stance table has the properties of each stance phase."""
+    points_grouped, labels_grouped_l, labels_grouped_r = labelled_feet
+
+    table = pde.stance_table(
+        points_grouped, labels_grouped_l, labels_grouped_r
+    )
+
+    assert np.all(np.diff(table.frame_i) >= 0)
+
+    for side, labels_grouped_side in (
+        ('L', labels_grouped_l),
+        ('R', labels_grouped_r),
+    ):
+
+        df_props = pde.stance_props(points_grouped, labels_grouped_side)
+        is_side = table.side == side
+
+        assert is_side.sum() == len(df_props)
+
+        if df_props.empty:
+            continue
+
+        # The stride numbers of each side index the rows of the stance properties.
+        index_rows = table.num_stride[is_side]
+
+        npt.assert_array_equal(
+            table.frame_i[is_side], df_props.frame_i.values[index_rows]
+        )
+        npt.assert_array_equal(
+            table.frame_f[is_side], df_props.frame_f.values[index_rows]
+        )
+        npt.assert_array_equal(
+            table.position[is_side],
+            np.stack(df_props.position.values)[index_rows],
+        )
@@ -0,0 +1,284 @@
+"""Property tests for pose estimation from multiple joint proposals."""
+
+import itertools
+
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import given
+from hypothesis.extra.numpy import arrays
+from scipy.spatial.distance import cdist
+
+import modules.pose_estimation as pe
+
+LENGTHS = np.array([60, 20, 15, 20, 20])
+
+
+def select_best_feet_loop(dist_matrix, score_matrix, path_vectors, radii):
+    """Select the best two feet one radius and one pair at a time, as in the original loop."""
+    pairs = [*itertools.combinations(range(len(path_vectors)), 2)]
+    votes = np.zeros(len(pairs))
+
+    for r in radii:
+
+        pair_scores = np.zeros(len(pairs))
+
+        for i, (a, b) in enumerate(pairs):
+
+            has_sphere = path_vectors[a] | path_vectors[b]
+            inside_spheres = np.any(has_sphere * (dist_matrix < r), 1)
+
+            pair_scores[i] = np.sum(
+                score_matrix[np.outer(inside_spheres, inside_spheres)]
+            )
+
+        votes += pair_scores == pair_scores.max()
+
+    return pairs[np.argmax(votes)]
+
+
+@st.composite
+def populations(draw, n_max=7):
+    """Generate a population with every label on the body graph."""
+    counts = draw(
+        st.lists(
+            st.integers(min_value=2, max_value=n_max), min_size=6, max_size=6
+        )
+    )
+    labels = np.repeat(np.arange(6), counts)
+
+    population = draw(
+        arrays(
+            'float',
+            (len(labels), 3),
+            elements=st.floats(min_value=-50, max_value=50),
+        )
+    )
+    population[:, 1] -= 15 * labels
+
+    return population, labels
+
+
+@given(populations())
+def test_pop_shortest_paths_layered(population_labelled):
+    """Test that the layered shortest paths match the dictionary version."""
+    population, labels = population_labelled
+
+    label_adj_list = pe.lengths_to_adj_list(pe.TYPE_CONNECTIONS, LENGTHS)
+    dist_matrix = cdist(population, population)
+
+    prev, dist = pe.pop_shortest_paths(
+        dist_matrix, labels, label_adj_list, pe.cost_func
+    )
+    prev_layered, dist_layered = pe.pop_shortest_paths_layered(
+        dist_matrix, labels, label_adj_list, pe.cost_func
+    )
+
+    assert np.array_equal([dist[u] for u in dist], dist_layered)
+
+    paths, path_dist = pe.paths_to_foot(prev, dist, labels)
+    paths_layered, path_dist_layered = pe.paths_to_foot(
+        prev_layered, dist_layered, labels
+    )
+
+    assert np.array_equal(paths, paths_layered)
+    assert np.array_equal(path_dist, path_dist_layered)
+
+
+@given(populations())
+def test_process_frame_engines(population_labelled):
+    """Test that all shortest path engines select the same positions."""
+    population, labels = population_labelled
+    radii = range(6)
+
+    pops = pe.process_frame(
+        population, labels, LENGTHS, radii, pe.cost_func, pe.score_func
+    )
+
+    for engine in ['layered', 'csr']:
+
+        pops_engine = pe.process_frame(
+            population,
+            labels,
+            LENGTHS,
+            radii,
+            pe.cost_func,
+            pe.score_func,
+            engine=engine,
+        )
+
+        assert np.array_equal(pops, pops_engine)
+
+
+@given(
+    st.lists(populations(), min_size=1, max_size=20),
+    st.integers(min_value=1, max_value=8),
+)
+def test_process_frames(populations_labelled, batch_size):
+    """Test that processing frames in batches matches one frame at a time."""
+    populations, labels = zip(*populations_labelled)
+    radii = range(6)
+
+    pops_1, pops_2 = pe.process_frames(
+        populations,
+        labels,
+        LENGTHS,
+        radii,
+        pe.cost_func,
+        pe.score_func,
+        batch_size=batch_size,
+    )
+
+    for i, (population, labels_frame) in enumerate(zip(populations, labels)):
+
+        pop_1, pop_2 = pe.process_frame(
+            population,
+            labels_frame,
+            LENGTHS,
+            radii,
+            pe.cost_func,
+            pe.score_func,
+        )
+
+        assert np.array_equal(pops_1[i], pop_1)
+        assert np.array_equal(pops_2[i], pop_2)
+
+
+@given(
+    st.lists(populations(), min_size=1, max_size=5),
+    st.sampled_from(['dict', 'layered', 'csr']),
+)
+def test_frame_processor(populations_labelled, engine):
+    """Test that one processor for many frames matches each frame alone."""
+    populations, labels = zip(*populations_labelled)
+    radii = range(6)
+
+    processor = pe.FrameProcessor(
+        LENGTHS, radii, pe.cost_func, pe.score_func, engine=engine
+    )
+
+    pops_1, pops_2 = processor.process_frames(populations, labels)
+
+    for i, (population, labels_frame) in enumerate(zip(populations, labels)):
+
+        pop_1, pop_2 = pe.process_frame(
+            population,
+            labels_frame,
+            LENGTHS,
+            radii,
+            pe.cost_func,
+            pe.score_func,
+        )
+
+        assert np.array_equal(
+            processor.process(population, labels_frame), (pop_1, pop_2)
+        )
+        assert np.array_equal(
+            processor.process_sweep(population, labels_frame)[-1],
+            (pop_1, pop_2),
+        )
+
+        assert np.array_equal(pops_1[i], pop_1)
+        assert np.array_equal(pops_2[i], pop_2)
+
+
+@given(populations(n_max=9))
+def test_process_frame_sweep(population_labelled):
+    """Test that each prefix of the sweep matches processing that prefix."""
+    population, labels = population_labelled
+    radii = range(11)
+
+    list_pops = pe.process_frame_sweep(
+        population, labels, LENGTHS, radii, pe.cost_func, pe.score_func
+    )
+
+    assert len(list_pops) == len(radii)
+
+    for r_max, (pop_1, pop_2) in enumerate(list_pops):
+
+        pop_1_expected, pop_2_expected = pe.process_frame(
+            population,
+            labels,
+            LENGTHS,
+            radii[: r_max + 1],
+            pe.cost_func,
+            pe.score_func,
+        )
+
+        assert np.array_equal(pop_1, pop_1_expected)
+        assert np.array_equal(pop_2, pop_2_expected)
+
+
+@given(populations(n_max=9))
+def test_select_best_feet(population_labelled):
+    """Test that the vectorized selection of feet matches the original loop."""
+    population, labels = population_labelled
+    radii = range(11)
+
+    label_adj_list_types = pe.lengths_to_adj_list(pe.TYPE_CONNECTIONS, LENGTHS)
+    label_adj_list_parts = pe.lengths_to_adj_list(pe.PART_CONNECTIONS, LENGTHS)
+
+    prev, dist = pe.pop_shortest_paths(
+        cdist(population, population),
+        labels,
+        label_adj_list_types,
+        pe.cost_func,
+    )
+    paths, _ = pe.paths_to_foot(prev, dist, labels)
+
+    pop_reduced, paths_reduced = pe.reduce_population(population, paths)
+
+    dist_matrix = cdist(pop_reduced, pop_reduced)
+    score_matrix = pe.get_scores(
+        dist_matrix, paths_reduced, label_adj_list_parts, pe.score_func
+    )
+    path_vectors = pe.get_path_vectors(paths_reduced, pop_reduced.shape[0])
+
+    assert pe.select_best_feet(
+        dist_matrix, score_matrix, path_vectors, radii
+    ) == select_best_feet_loop(dist_matrix, score_matrix, path_vectors, radii)
+
+
+def test_select_best_feet_near_tie():
+    """Test a near tie, where the pair scores only differ by rounding."""
+    # Each position is only within the radius of itself.
+    dist_matrix = 10 * (1 - np.eye(5))
+
+    # The three pairs of feet have a score of 0.6 in exact arithmetic,
+    # but 0.1 + 0.2 + 0.3 rounds up to 0.6000000000000001.
+    score_matrix = np.zeros((5, 5))
+    score_matrix[0, 1], score_matrix[1, 2] = 0.1, 0.2
+    score_matrix[0, 3], score_matrix[0, 4] = 0.3, 0.3
+
+    path_vectors = np.zeros((3, 5), dtype=bool)
+    path_vectors[0, [0, 1, 2]] = True
+    path_vectors[1, [0, 3]] = True
+    path_vectors[2, [0, 4]] = True
+
+    for radii in ([1], [0, 1, 20]):
+
+        assert (
+            pe.select_best_feet(dist_matrix, score_matrix, path_vectors, radii)
+            == select_best_feet_loop(
+                dist_matrix, score_matrix, path_vectors, radii
+            )
+            == (0, 1)
+        )
+
+    _, winners = pe.radius_winners(
+        dist_matrix, score_matrix, path_vectors, [1]
+    )
+
+    assert np.array_equal(winners, [[True, True, False]])
+
+    # The near tie is settled the same way for any order of the positions.
+    for order in itertools.permutations(range(5)):
+
+        index = np.array(order)
+        args = (
+            dist_matrix,
+            score_matrix[np.ix_(index, index)],
+            path_vectors[:, index],
+            [1],
+        )
+
+        assert pe.select_best_feet(*args) == select_best_feet_loop(*args)
@@ -0,0 +1,30 @@
+"""Property tests for the running median."""
+
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import given
+from hypothesis.extra.numpy import arrays
+
+from modules.running_median import RunningMedian
+
+matrices = arrays(
+    'float',
+    st.tuples(st.integers(min_value=1, max_value=50), st.integers(1, 5)),
+    elements=st.floats(min_value=-1e6, max_value=1e6),
+)
+
+
+@given(matrices)
+def test_running_median(matrix):
+    """Test that the running median matches the median of the rows so far."""
+    running_median = RunningMedian(matrix.shape[1])
+
+    for i, row in enumerate(matrix):
+
+        running_median.update(row)
+
+        assert np.array_equal(
+            running_median.median(), np.median(matrix[: i + 1], axis=0)
+        )
+
+    assert len(running_median) == len(matrix)
@@ -0,0 +1,41 @@
+"""Unit tests for block-sparse distance matrices."""
+
+import numpy as np
+import pytest
+from numpy import nan
+
+from modules.block_distances import BlockDistances, label_layers
+
+
+@pytest.fixture
+def dist_blocks():
+    """Return the distances of points on a line, with labels 0, 1, 1, 2."""
+    population = np.array([[0, 0], [0, 10], [0, 12], [0, 20]])
+    labels = np.array([0, 1, 1, 2])
+
+    return BlockDistances(population, labels, [(0, 1), (1, 2)])
+
+
+def test_label_layers():
+
+    assert label_layers(np.array([2, 2, 5, 7, 7, 7])) == {
+        2: slice(0, 2),
+        5: slice(2, 3),
+        7: slice(3, 6),
+    }
+
+
+def test_block_distances(dist_blocks):
+
+    assert np.array_equal(dist_blocks[0:1, 1:3], [[10, 12]])
+    assert np.array_equal(dist_blocks[1:3, 3:4], [[10], [8]])
+
+    # The slices of a pair without a block give NaN.
+    assert np.isnan(dist_blocks[0:1, 3:4]).all()
+
+    assert np.array_equal(
+        dist_blocks[np.array([0, 0, 2, 3]), np.array([2, 3, 3, 0])],
+        [12, nan, 8, nan],
+        equal_nan=True,
+    )
+    assert dist_blocks.nbytes == 8 * 4
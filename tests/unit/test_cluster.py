@@ -78,3 +78,184 @@ def test_dbscan_st(walking_pass_points):
         min_pts=2,
     )
     assert np.all(labels == -1)
+
+
+@pytest.mark.parametrize("backend", ['matrix', 'sweep'])
+def test_dbscan_st_backends(walking_pass_points, backend):
+
+    # The second cluster is far in time from the others.
+    times = [0, 0, 1, 9, 9, 9, 1, 2, 2, 2, 2, 3]
+
+    labels = cl.dbscan_st(
+        walking_pass_points,
+        times,
+        eps_spatial=1,
+        eps_temporal=1,
+        min_pts=2,
+        backend=backend,
+    )
+
+    assert_array_equal(labels, [0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3])
+
+    with pytest.raises(ValueError):
+        cl.dbscan_st(walking_pass_points, times, backend='other')
+
+
+@pytest.mark.parametrize("backend", ['matrix', 'sweep'])
+def test_neighbourhoods_st(backend):
+
+    indptr, indices = cl.neighbourhoods_st(
+        np.empty((0, 2)), [], 1, 1, backend=backend
+    )
+    assert_array_equal(indptr, [0])
+    assert indices.size == 0
+
+    # All points are too far apart in space or time to be neighbours.
+    points = [[0, 0], [5, 0], [0, 0]]
+    times = [0, 0, 5]
+
+    indptr, indices = cl.neighbourhoods_st(
+        points, times, 1, 1, backend=backend
+    )
+    assert_array_equal(indptr, [0, 1, 2, 3])
+    assert_array_equal(indices, [0, 1, 2])
+
+
+def test_neighbour_pairs_st():
+
+    rows, cols, dist_spatial, dist_temporal = cl.neighbour_pairs_st(
+        np.empty((0, 2)), [], 1, 1
+    )
+    assert rows.size == cols.size == 0
+    assert dist_spatial.size == dist_temporal.size == 0
+
+    # Each point is only its own neighbour.
+    rows, cols, dist_spatial, dist_temporal = cl.neighbour_pairs_st(
+        [[0, 0], [5, 0], [0, 0]], [0, 0, 5], 1, 1
+    )
+    assert_array_equal(rows, [0, 1, 2])
+    assert_array_equal(cols, [0, 1, 2])
+    assert_array_equal(dist_spatial, 0)
+    assert_array_equal(dist_temporal, 0)
+
+
+@pytest.fixture
+def border_points():
+    """
+    Return two clusters of 1D points with a shared border point.
+
+    The last point is in the neighbourhood of a core point of each cluster,
+    but it is not a core point itself.
+
+    """
+    return np.array([0, 0.2, 0.4, 1, 3, 3.6, 3.8, 4, 2]).reshape(-1, 1)
+
+
+@pytest.mark.parametrize("backend", ['matrix', 'sweep'])
+def test_neighbourhoods_st_border(border_points, backend):
+
+    indptr, indices = cl.neighbourhoods_st(
+        border_points, None, 1, 1, backend=backend
+    )
+
+    assert_array_equal(np.diff(indptr), [4, 4, 4, 5, 5, 4, 4, 4, 3])
+    assert_array_equal(indices[indptr[-2] :], [3, 4, 8])
+
+
+def test_expand_clusters(border_points):
+
+    labels = cl.expand_clusters(
+        np.zeros(1, dtype=int), np.array([], dtype=int), np.array([])
+    )
+    assert labels.size == 0
+
+    # Without core points, all points are noise.
+    indptr, indices = cl.neighbourhoods_st(border_points, None, 1, 1)
+
+    labels = cl.expand_clusters(indptr, indices, np.zeros(9, dtype=bool))
+    assert_array_equal(labels, -1)
+
+    # The border point joins the first cluster to reach it.
+    is_core = np.diff(indptr) >= 4
+
+    labels = cl.expand_clusters(indptr, indices, is_core)
+    assert_array_equal(labels, [0, 0, 0, 0, 1, 1, 1, 1, 0])
+
+    order = [4, 5, 6, 7, 0, 1, 2, 3, 8]
+    indptr, indices = cl.neighbourhoods_st(border_points[order], None, 1, 1)
+
+    labels = cl.expand_clusters(indptr, indices, is_core[order])
+    assert_array_equal(labels, [0, 0, 0, 0, 1, 1, 1, 1, 0])
+
+
+def test_dbscan_st_1d():
+
+    # The times are not sorted, and the last value is noise.
+    signal = [5, 0, 6, 1, 2, 7, 20]
+    times = [10, 0, 11, 1, 2, 12, 13]
+
+    labels = cl.dbscan_st_1d(
+        signal, times, eps_spatial=1, eps_temporal=1, min_pts=2
+    )
+
+    assert_array_equal(labels, [0, 1, 0, 1, 1, 0, -1])
+
+
+@pytest.mark.parametrize(
+    "eps_temporal, labels_expected",
+    [
+        (2, [0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3]),
+        # The last point of each cluster is too late for the first point.
+        (1, [0, 0, -1, 1, 1, -1, 2, 2, -1, 3, 3, -1]),
+    ],
+)
+def test_dbscan_st_online(walking_pass_points, eps_temporal, labels_expected):
+
+    times = np.arange(len(walking_pass_points))
+
+    labels = cl.dbscan_st_online(
+        walking_pass_points,
+        times,
+        eps_spatial=1,
+        eps_temporal=eps_temporal,
+        min_pts=2,
+    )
+
+    assert_array_equal(labels, labels_expected)
+
+
+def test_online_dbscan_times():
+
+    clusterer = cl.OnlineDBSCAN()
+    clusterer.update([[0, 0]], time=5)
+
+    with pytest.raises(ValueError):
+        clusterer.update([[0, 0]], time=4)
+
+
+def test_dbscan_st_grid(walking_pass_points):
+
+    times = [0, 0, 1, 9, 9, 9, 1, 2, 2, 2, 2, 3]
+
+    settings = [(1, 1, 2), (1, 1, 3), (8, 1, 3), (1, 0.5, 1)]
+    dict_labels = cl.dbscan_st_grid(walking_pass_points, times, settings)
+
+    assert list(dict_labels) == settings
+
+    assert_array_equal(
+        dict_labels[1, 1, 2], [0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3]
+    )
+    assert_array_equal(
+        dict_labels[1, 1, 3], [0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3]
+    )
+
+    # The third and fourth clusters are close in space and time.
+    assert_array_equal(
+        dict_labels[8, 1, 3], [0, 0, 0, 1, 1, 1, 2, 2, 2, 2, 2, 2]
+    )
+
+    # Each point is a core point, so each group of neighbours on a frame
+    # is a cluster.
+    assert_array_equal(
+        dict_labels[1, 0.5, 1], [0, 0, 1, 2, 2, 2, 3, 4, 5, 6, 6, 7]
+    )
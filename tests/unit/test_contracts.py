@@ -0,0 +1,63 @@
+import pytest
+from dpcontracts import PostconditionError, PreconditionError
+
+import modules.contracts as co
+
+
+@co.require("The input must be positive.", lambda args: args.x > 0)
+@co.ensure("The output must be even.", lambda args, result: result % 2 == 0)
+def double(x, *, offset=0):
+    return 2 * x + offset
+
+
+def test_full():
+
+    assert co.get_policy().mode == 'full'
+
+    assert double(3) == 6
+
+    with pytest.raises(PreconditionError):
+        double(-1)
+
+    with pytest.raises(PostconditionError):
+        double(1, offset=1)
+
+
+def test_off():
+
+    with co.policy('off'):
+        assert double(-1) == -2
+        assert double(1, offset=1) == 3
+
+    # The previous policy is restored.
+    with pytest.raises(PreconditionError):
+        double(-1)
+
+
+def test_sampled():
+
+    @co.require("The input must be positive.", lambda args: args.x > 0)
+    def identity(x):
+        return x
+
+    with co.policy('sampled', every=3):
+
+        # The first call of every three is checked.
+        with pytest.raises(PreconditionError):
+            identity(-1)
+
+        assert identity(-1) == -1
+        assert identity(-1) == -1
+
+        with pytest.raises(PreconditionError):
+            identity(-1)
+
+
+@pytest.mark.parametrize(
+    "mode, every",
+    [('partial', 10), ('sampled', 0)],
+)
+def test_invalid_policy(mode, every):
+
+    with pytest.raises(ValueError):
+        co.set_policy(mode, every)
@@ -0,0 +1,68 @@
+"""Unit tests for the cache of frame distances."""
+
+import numpy as np
+import pytest
+
+from modules.distance_cache import DistanceCache
+
+
+@pytest.fixture
+def populations():
+    """Return populations with two points of each label, so each has 32 bytes of distances."""
+    labels = np.array([0, 0, 1, 1])
+
+    return {
+        key: (np.arange(12).reshape(4, 3) + key, labels) for key in range(4)
+    }
+
+
+def test_byte_budget(populations):
+
+    cache = DistanceCache(max_bytes=80, label_pairs=[(0, 1)])
+
+    for key, (population, labels) in populations.items():
+
+        cache.get(key, population, labels)
+
+        assert cache.nbytes <= cache.max_bytes
+        assert cache.nbytes == sum(
+            dist_blocks.nbytes for dist_blocks in cache.entries.values()
+        )
+
+    # Only two populations fit in the budget.
+    assert len(cache) == 2
+    assert cache.nbytes == 64
+
+
+def test_lru_eviction(populations):
+
+    cache = DistanceCache(max_bytes=64, label_pairs=[(0, 1)])
+
+    for key in [0, 1, 0, 2]:
+        cache.get(key, *populations[key])
+
+    # Population 0 was used more recently than population 1,
+    # so population 1 is evicted.
+    assert list(cache.entries) == [0, 2]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    dist_blocks = cache.get(0, *populations[0])
+
+    assert cache.get(0, *populations[0]) is dist_blocks
+    assert list(cache.entries) == [2, 0]
+
+
+def test_cyclic_scan(populations):
+
+    # The budget holds two of the three populations in the working set.
+    cache = DistanceCache(max_bytes=64, label_pairs=[(0, 1)])
+
+    for _ in range(3):
+        for key in range(3):
+            cache.get(key, *populations[key])
+
+    # A cyclic scan larger than the cache evicts each population
+    # just before it is needed again, so every lookup is a miss.
+    assert (cache.hits, cache.misses) == (0, 9)
+    assert list(cache.entries) == [1, 2]
+    assert cache.nbytes == 64
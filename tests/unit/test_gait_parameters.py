@@ -0,0 +1,64 @@
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+import modules.gait_parameters as gp
+import modules.phase_detection as pde
+
+
+def test_stances_to_gait_batch():
+
+    # The feet alternate sides, each 50 along the walkway and 10 to the side.
+    stances = pde.StanceTable(
+        num_stride=np.array([0, 0, 1, 1]),
+        frame_i=np.array([0, 15, 30, 45]),
+        frame_f=np.array([20, 35, 50, 65]),
+        position=np.array([[0, 0], [50, 10], [100, 0], [150, 10]]),
+        side=np.array(['L', 'R', 'L', 'R']),
+    )
+
+    df_gait = gp.stances_to_gait_batch(stances)
+
+    assert df_gait.index.to_list() == [('L', 0), ('R', 0)]
+
+    for param, value in [
+        ('stride_length', 100),
+        ('absolute_step_length', np.sqrt(50**2 + 10**2)),
+        ('step_length', 50),
+        ('stride_width', 10),
+        ('stride_time', 1),
+        ('stride_velocity', 100),
+        ('stance_percentage', 200 / 3),
+    ]:
+        npt.assert_allclose(df_gait[param], value)
+
+
+def test_stances_to_gait_batch_empty():
+
+    stances = pde.StanceTable(
+        num_stride=np.array([0, 0]),
+        frame_i=np.array([0, 10]),
+        frame_f=np.array([5, 15]),
+        position=np.array([[0, 0], [10, 5]]),
+        side=np.array(['L', 'R']),
+    )
+
+    assert gp.stances_to_gait_batch(stances).empty
+
+
+def test_stances_to_gait_batch_zero_stride():
+
+    # Foot L has the same position at the start and end of the stride.
+    stances = pde.StanceTable(
+        num_stride=np.array([0, 0, 1]),
+        frame_i=np.array([0, 10, 20]),
+        frame_f=np.array([5, 15, 25]),
+        position=np.array([[0, 0], [5, 1], [0, 0]]),
+        side=np.array(['L', 'R', 'L']),
+    )
+
+    with pytest.raises(ValueError, match="zero vector"):
+        gp.stances_to_gait(stances.to_dataframe())
+
+    with pytest.raises(ValueError, match="zero vector"):
+        gp.stances_to_gait_batch(stances)
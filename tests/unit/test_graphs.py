@@ -98,6 +98,32 @@ def test_shortest_paths(directed_acyclic_graph, node_target, path):
     assert gr.trace_path(prev, node_target) == path
 
 
+def test_shortest_paths_csr(directed_acyclic_graph):
+
+    graph, order, nodes_source = directed_acyclic_graph
+
+    prev, dist = gr.dag_shortest_paths(graph, order, nodes_source)
+
+    csr_graph = gr.adj_list_to_csr(graph)
+    prev_csr, dist_csr = gr.dag_shortest_paths_csr(
+        csr_graph, order, list(nodes_source)
+    )
+
+    assert gr.csr_to_adj_list(csr_graph) == graph
+
+    assert np.array_equal(dist_csr, [dist[node] for node in graph])
+    assert np.array_equal(
+        prev_csr,
+        [-1 if np.isnan(prev[node]) else prev[node] for node in graph],
+    )
+
+    paths = gr.trace_paths(prev_csr, [5, 3, 0])
+
+    assert np.array_equal(
+        paths, [[1, 2, 4, 5], [1, 2, 3, -1], [0, -1, -1, -1]]
+    )
+
+
 def test_labelled_nodes_to_graph(label_graph):
 
     node_labels, label_adj_list, graph_expected = label_graph
@@ -105,3 +131,45 @@ def test_labelled_nodes_to_graph(label_graph):
     graph_from_labels = gr.labelled_nodes_to_graph(node_labels, label_adj_list)
 
     assert graph_from_labels == graph_expected
+
+
+def test_labelled_nodes_to_matrix(label_graph):
+
+    node_labels, label_adj_list, graph_expected = label_graph
+
+    # Replace the label names with integers.
+    label_nums = {label: i for i, label in enumerate(label_adj_list)}
+
+    labels = [label_nums[label] for label in node_labels.values()]
+    label_matrix = gr.adj_list_to_matrix(
+        {
+            label_nums[a]: {
+                label_nums[b]: w for b, w in label_adj_list[a].items()
+            }
+            for a in label_adj_list
+        }
+    )
+
+    adj_matrix = gr.labelled_nodes_to_matrix(labels, label_matrix)
+
+    assert np.array_equal(
+        adj_matrix, gr.adj_list_to_matrix(graph_expected), equal_nan=True
+    )
+
+
+def test_points_to_graph_labels(label_graph):
+
+    node_labels, label_adj_list, graph_expected = label_graph
+
+    # The points are one unit apart, so each weight is an expected distance.
+    dist_matrix = 1 - np.eye(len(node_labels))
+    labels = list(node_labels.values())
+
+    def weight_func(a, b):
+        return b
+
+    # The label names are not integers and are not in sorted order.
+    assert (
+        gr.points_to_graph(dist_matrix, labels, label_adj_list, weight_func)
+        == graph_expected
+    )
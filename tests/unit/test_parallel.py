@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+import modules.parallel as par
+
+
+def sum_rows(arrays, index_start, index_stop):
+    """Return the sums of a slice of rows, scaled by a weight."""
+    rows = arrays['values'][index_start:index_stop]
+
+    return rows.sum(axis=1) * arrays['weight'][0]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_map_tasks_shared(jobs):
+
+    arrays = {
+        'values': np.arange(30, dtype=float).reshape(10, 3),
+        'weight': np.array([2]),
+    }
+    list_args = [(0, 4), (4, 5), (5, 10), (3, 3)]
+
+    task_results = par.map_tasks_shared(sum_rows, arrays, list_args, jobs=jobs)
+
+    # The results are in the order of the arguments.
+    for (index_start, index_stop), task_result in zip(list_args, task_results):
+        expected = arrays['values'][index_start:index_stop].sum(axis=1) * 2
+        np.testing.assert_array_equal(task_result.result, expected)
@@ -0,0 +1,39 @@
+import numpy as np
+import numpy.testing as npt
+
+import modules.phase_detection as pde
+from modules.walking_pass import GroupedPoints
+
+
+def test_stance_table():
+
+    frames = np.repeat(np.arange(6), 2)
+    points = [
+        [0, 0],
+        [9, 9],
+        [1, 0],
+        [10, 1],
+        [5, 0],
+        [11, 1],
+        [9, 9],
+        [12, 4],
+        [20, 0],
+        [9, 9],
+        [22, 2],
+        [9, 9],
+    ]
+
+    labels_grouped_l = np.array([3, -1, 3, -1, 3, -1, -1, -1, 7, -1, 7, -1])
+    labels_grouped_r = np.array([-1, -1, -1, 0, -1, 0, -1, 0, -1, -1, -1, -1])
+
+    table = pde.stance_table(
+        GroupedPoints(frames, points), labels_grouped_l, labels_grouped_r
+    )
+
+    # The stride numbers count the stance phases of each side.
+    npt.assert_array_equal(table.num_stride, [0, 0, 1])
+    npt.assert_array_equal(table.side, ['L', 'R', 'L'])
+
+    npt.assert_array_equal(table.frame_i, [0, 1, 4])
+    npt.assert_array_equal(table.frame_f, [2, 3, 5])
+    npt.assert_array_equal(table.position, [[1, 0], [11, 1], [21, 1]])
@@ -39,3 +39,75 @@ def test_pop_shortest_paths(sample_population):
     )
 
     assert prev == {0: np.nan, 1: np.nan, 2: 0, 3: 0, 4: 2, 5: 2}
+
+
+def test_process_frame_engine(sample_population):
+
+    population, labels, _ = sample_population
+
+    with pytest.raises(ValueError):
+        pe.process_frame(
+            population,
+            labels,
+            [60, 20],
+            range(3),
+            pe.cost_func,
+            pe.score_func,
+            engine='other',
+        )
+
+
+def test_reduce_population():
+
+    population = np.arange(30).reshape(10, 3)
+    paths = np.array([[1, 4, 9], [1, 5, 7]])
+
+    pop_reduced, paths_reduced = pe.reduce_population(population, paths)
+
+    assert np.array_equal(pop_reduced, population[[1, 4, 5, 7, 9]])
+    assert np.array_equal(paths_reduced, [[0, 1, 4], [0, 2, 3]])
+
+
+@pytest.mark.parametrize("engine", ['dict', 'layered', 'csr'])
+def test_frame_processor(engine):
+
+    population = np.array(
+        [
+            [0, 80, 0],
+            [0, 20, 0],
+            [0, 0, 0],
+            [0, -15, 0],
+            [0, -35, 0],
+            [0, -55, 0],
+            [9, -55, 0],
+        ]
+    )
+    labels = np.array([0, 1, 2, 3, 4, 5, 5])
+
+    processor = pe.FrameProcessor(
+        [60, 20, 15, 20, 20],
+        range(6),
+        pe.cost_func,
+        pe.score_func,
+        engine=engine,
+    )
+
+    pop_1, pop_2 = processor.process(population, labels)
+
+    assert np.array_equal(pop_1, population[:6])
+    assert np.array_equal(pop_2, population[[0, 1, 2, 3, 4, 6]])
+
+    pop_1_swept, pop_2_swept = processor.process_sweep(population, labels)[-1]
+
+    assert np.array_equal(pop_1_swept, pop_1)
+    assert np.array_equal(pop_2_swept, pop_2)
+
+    # The second frame is the first one moved forward.
+    shift = np.array([0, 0, 100])
+
+    pops_1, pops_2 = processor.process_frames(
+        [population, population + shift], [labels, labels]
+    )
+
+    assert np.array_equal(pops_1, [pop_1, pop_1 + shift])
+    assert np.array_equal(pops_2, [pop_2, pop_2 + shift])
@@ -0,0 +1,27 @@
+"""Unit tests for the running median."""
+
+import numpy as np
+import pytest
+
+from modules.running_median import RunningMedian
+
+
+@pytest.mark.parametrize(
+    "rows, medians_expected",
+    [
+        ([[4, 1]], [4, 1]),
+        ([[4, 1], [2, 1]], [3, 1]),
+        ([[4, 1], [2, 1], [2, 7]], [2, 1]),
+        ([[4, 1], [2, 1], [2, 7], [9, 8]], [3, 4]),
+        ([[4, 1], [2, 1], [2, 7], [9, 8], [-1, 0]], [2, 1]),
+    ],
+)
+def test_running_median(rows, medians_expected):
+
+    running_median = RunningMedian(2)
+
+    for row in rows:
+        running_median.update(row)
+
+    assert np.array_equal(running_median.median(), medians_expected)
+    assert len(running_median) == len(rows)
@@ -1,6 +1,8 @@
 import numpy as np
 import numpy.testing as npt
 import xarray as xr
+from skimage.measure import LineModelND, ransac
+from statsmodels.robust import mad
 
 import modules.side_assignment as sa
 
@@ -52,3 +54,69 @@ def test_compute_basis():
     npt.assert_array_equal(basis.forward, [1, 0, 0])
     npt.assert_array_equal(basis.up, [0, 1, 0])
     npt.assert_array_equal(basis.perp, [0, 0, -1])
+
+
+def test_fit_line_batched():
+
+    rng = np.random.default_rng(0)
+
+    x = np.arange(0, 400, 2)
+    points = np.column_stack(
+        (x, rng.normal(0, 1, x.size), np.tile([210, 190], x.size // 2))
+    )
+
+    # Outliers far from the walking line.
+    points[[10, 50, 150]] += [0, 0, 100]
+
+    model, is_inlier = sa.fit_line_batched(points, random_state=1)
+    model_ransac, is_inlier_ransac = ransac(
+        points,
+        LineModelND,
+        min_samples=points.shape[0] // 2,
+        residual_threshold=2.5 * mad(points[:, 2], c=1),
+        random_state=0,
+    )
+
+    npt.assert_array_equal(is_inlier, is_inlier_ransac)
+    npt.assert_array_equal(np.flatnonzero(~is_inlier), [10, 50, 150])
+
+    npt.assert_allclose(model.params[0], model_ransac.params[0])
+    npt.assert_allclose(
+        abs(model.params[1]), abs(model_ransac.params[1]), atol=1e-12
+    )
+
+    # The fit is deterministic for a given seed.
+    model_repeat, is_inlier_repeat = sa.fit_line_batched(
+        points, random_state=1
+    )
+
+    npt.assert_array_equal(is_inlier_repeat, is_inlier)
+    npt.assert_array_equal(model_repeat.params[1], model.params[1])
+
+
+def test_assign_sides_grouped():
+
+    frames_grouped = np.array([0, 0, 1, 1, 2, 2, 3, 3, 4])
+    values_side_grouped = np.array([5, -5, 6, -4, -5, 5, -6, 4, 7])
+    labels_grouped = np.array([0, -1, 0, -1, 1, -1, 1, -1, 2])
+
+    labels_grouped_l, labels_grouped_r = sa.assign_sides_grouped(
+        frames_grouped, values_side_grouped, labels_grouped
+    )
+
+    # Cluster 2 has no swing feet, so its side value is compared to zero.
+    npt.assert_array_equal(
+        labels_grouped_l, [-1, -1, -1, -1, 1, -1, 1, -1, -1]
+    )
+    npt.assert_array_equal(labels_grouped_r, [0, -1, 0, -1, -1, -1, -1, -1, 2])
+
+    # A NaN median compares as False, so the cluster is on the left side.
+    values_side_grouped = values_side_grouped.astype(float)
+    values_side_grouped[[1, 8]] = np.nan
+
+    labels_grouped_l, labels_grouped_r = sa.assign_sides_grouped(
+        frames_grouped, values_side_grouped, labels_grouped
+    )
+
+    npt.assert_array_equal(labels_grouped_l, [0, -1, 0, -1, 1, -1, 1, -1, 2])
+    npt.assert_array_equal(labels_grouped_r, -1)
@@ -0,0 +1,70 @@
+import numpy as np
+import numpy.testing as npt
+import pandas as pd
+import pytest
+from dpcontracts import PreconditionError
+
+import modules.gait_parameters as gp
+from modules.walking_pass import (
+    GroupedPoints,
+    WalkingPass,
+    synthetic_walking_pass,
+)
+
+
+def test_from_dataarray():
+
+    rng = np.random.default_rng(0)
+
+    walking_pass = WalkingPass(
+        np.arange(5, 15),
+        head=rng.normal(size=(10, 3)),
+        foot_a=rng.normal(size=(10, 3)),
+        foot_b=rng.normal(size=(10, 3)),
+    )
+
+    points_stacked = walking_pass.to_dataarray()
+
+    # The layers are found by label, in any order of the layers and dims.
+    points_reordered = points_stacked.sel(
+        layers=['points_head', 'points_b', 'points_a']
+    ).transpose('layers', 'frames', 'cols')
+
+    for points in (points_stacked, points_reordered):
+
+        walking_pass_new = WalkingPass.from_dataarray(points)
+
+        npt.assert_array_equal(walking_pass_new.frames, walking_pass.frames)
+        npt.assert_array_equal(walking_pass_new.head, walking_pass.head)
+        npt.assert_array_equal(walking_pass_new.foot_a, walking_pass.foot_a)
+        npt.assert_array_equal(walking_pass_new.foot_b, walking_pass.foot_b)
+
+        assert walking_pass_new.head.flags.c_contiguous
+
+    with pytest.raises(PreconditionError):
+        WalkingPass.from_dataarray(
+            points_stacked.sel(layers=['points_a', 'points_b'])
+        )
+
+
+def test_invalid_lengths():
+
+    with pytest.raises(ValueError):
+        WalkingPass(
+            [0, 1], np.zeros((2, 3)), np.zeros((2, 3)), np.zeros((3, 3))
+        )
+
+    with pytest.raises(ValueError):
+        GroupedPoints([0, 1], np.zeros((3, 3)))
+
+
+@pytest.mark.parametrize("n_frames", [90, 180])
+def test_walking_pass_parameters(n_frames):
+
+    walking_pass = synthetic_walking_pass(n_frames, random_state=0)
+
+    df_gait = gp.walking_pass_parameters(walking_pass)
+    df_gait_xr = gp.walking_pass_parameters(walking_pass.to_dataarray())
+
+    assert not df_gait.empty
+    pd.testing.assert_frame_equal(df_gait, df_gait_xr)